@@ -0,0 +1,225 @@
+"""In-process HTTP benchmarks for main.app.
+
+Drives the ASGI app through httpx's ASGITransport, so results measure the
+framework and services without sockets. Each traffic mix runs at each dataset
+size. Throughput and p95 latency are divided by those of a reference mix of
+GET /health measured in the same run, so they compare across machines; these
+ratios are compared with a baseline recorded locally (not kept in git) and
+regressions beyond the threshold make the run exit non-zero.
+
+    python -m benchmarks.asgi_bench --sizes small,medium
+    python -m benchmarks.asgi_bench --update-baseline
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import httpx
+
+from benchmarks.common import (
+    COURSE_WORDS, DEFAULT_THRESHOLD, find_regressions, format_table, load_baseline, percentile,
+    save_baseline, seed_services, user_search_prefix
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# (users, courses, enrollments)
+SIZES: Dict[str, Tuple[int, int, int]] = {
+    "small": (1_000, 100, 5_000),
+    "medium": (10_000, 500, 50_000),
+    "large": (50_000, 1_000, 250_000),
+}
+
+# Measured against the reference mix, which only exercises the middleware and routing
+REFERENCE_MIX = "reference"
+CHECKS = (("throughput_ratio", True), ("p95_ratio", False))
+
+Operation = Callable[[httpx.AsyncClient, random.Random, Dict[str, int]], Awaitable[httpx.Response]]
+
+
+async def create_user(client, rng, dataset):
+    dataset["users"] += 1
+    number = dataset["users"]
+    return await client.post("/users/", json={"name": f"New User {number}", "email": f"new{number}@example.com"})
+
+
+async def create_course(client, rng, dataset):
+    dataset["courses"] += 1
+    title = f"{rng.choice(COURSE_WORDS).title()} Workshop {dataset['courses']}"
+    return await client.post("/courses/", json={"title": title, "description": " ".join(rng.choices(COURSE_WORDS, k=6))})
+
+
+async def create_enrollment(client, rng, dataset):
+    enrollment = {"user_id": rng.randint(1, dataset["users"]), "course_id": rng.randint(1, dataset["courses"])}
+    return await client.post("/enrollments/", json=enrollment)
+
+
+async def get_user(client, rng, dataset):
+    return await client.get(f"/users/{rng.randint(1, dataset['users'])}")
+
+
+async def get_user_enrollments(client, rng, dataset):
+    return await client.get(f"/enrollments/user/{rng.randint(1, dataset['users'])}")
+
+
+async def search_courses(client, rng, dataset):
+    return await client.get("/courses/search", params={"q": rng.choice(COURSE_WORDS)})
+
+
+async def search_users(client, rng, dataset):
+    return await client.get("/users/search", params={"prefix": user_search_prefix(rng)})
+
+
+async def course_roster(client, rng, dataset):
+    return await client.get(f"/courses/{rng.randint(1, dataset['courses'])}/enrollments")
+
+
+async def course_roster_fields(client, rng, dataset):
+    return await client.get(
+        f"/courses/{rng.randint(1, dataset['courses'])}/enrollments",
+        params={"fields": "id,user_name,completed"}
+    )
+
+
+async def health(client, rng, dataset):
+    return await client.get("/health")
+
+
+MIXES: Dict[str, Sequence[Tuple[str, Operation, float]]] = {
+    REFERENCE_MIX: (
+        ("GET /health", health, 1.0),
+    ),
+    "onboarding": (
+        ("POST /users/", create_user, 0.4),
+        ("POST /courses/", create_course, 0.1),
+        ("POST /enrollments/", create_enrollment, 0.5),
+    ),
+    "dashboard": (
+        ("GET /users/{id}", get_user, 0.3),
+        ("GET /enrollments/user/{id}", get_user_enrollments, 0.4),
+        ("GET /courses/search", search_courses, 0.15),
+        ("GET /users/search", search_users, 0.15),
+    ),
+    "roster": (
+        ("GET /courses/{id}/enrollments", course_roster, 0.7),
+        ("GET /courses/{id}/enrollments?fields", course_roster_fields, 0.3),
+    ),
+}
+
+
+async def run_mix(app: Any, mix: str, dataset: Dict[str, int], requests: int, concurrency: int, seed: int) -> Dict[str, float]:
+    operations = MIXES[mix]
+    calls = [call for _, call, _ in operations]
+    weights = [weight for _, _, weight in operations]
+    rng = random.Random(seed)
+    plan = rng.choices(range(len(operations)), weights=weights, k=requests)
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors, next_request
+        while next_request < len(plan):
+            index = plan[next_request]
+            next_request += 1
+            started = time.perf_counter()
+            try:
+                response = await calls[index](client, rng, dataset)
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="In-process ASGI benchmarks for EduTrack Lite")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated dataset sizes: {', '.join(SIZES)}")
+    parser.add_argument(
+        "--mixes", default=",".join(mix for mix in MIXES if mix != REFERENCE_MIX), help="comma-separated traffic mixes"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mix and size")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed fractional slowdown relative to the reference"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    from main import app
+    from services import user_service, course_service, enrollment_service, admission
+
+    # Measure the application itself, not load shedding of the single benchmark client
+    admission.concurrency = None
+
+    reference = asyncio.run(
+        run_mix(app, REFERENCE_MIX, {"users": 0, "courses": 0}, args.requests, args.concurrency, args.seed)
+    )
+    results: Dict[str, Dict[str, float]] = {REFERENCE_MIX: reference}
+    for size in args.sizes.split(","):
+        users, courses, enrollments = SIZES[size]
+        for mix in args.mixes.split(","):
+            # Every mix starts from the same data so create-heavy runs don't skew later reads
+            seed_services(user_service, course_service, enrollment_service, users, courses, enrollments, args.seed)
+            dataset = {"users": users, "courses": courses}
+            result = asyncio.run(run_mix(app, mix, dataset, args.requests, args.concurrency, args.seed))
+            result["throughput_ratio"] = round(result["throughput_rps"] / reference["throughput_rps"], 4)
+            result["p95_ratio"] = round(result["p95_ms"] / reference["p95_ms"], 4) if reference["p95_ms"] else 0.0
+            results[f"{mix}@{size}"] = result
+
+    print(format_table(
+        ("run", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "req/s x ref", "p95 x ref"),
+        [
+            (
+                name, r["requests"], r["errors"], r["throughput_rps"], r["p50_ms"], r["p95_ms"], r["p99_ms"],
+                r.get("throughput_ratio", 1.0), r.get("p95_ratio", 1.0)
+            )
+            for name, r in results.items()
+        ]
+    ))
+
+    if args.update_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; record one with --update-baseline")
+        return 0
+    regressions = find_regressions(results, baseline, CHECKS, args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import json
+import math
+import os
+import random
+from typing import Dict, List, Sequence, Tuple
+from benchmarks.dataset import COURSE_WORDS, FIRST_NAMES, LAST_NAMES, generate, load
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.user_service import UserService
+
+# Allowed change of a metric relative to the same run's reference measurement
+DEFAULT_THRESHOLD = 0.25
+
+
+def seed_services(
+    user_service: UserService, course_service: CourseService, enrollment_service: EnrollmentService,
+    users: int, courses: int, enrollments: int, seed: int = 0
+):
+    """Replace the services' data with a uniform dataset: every user active, every course open"""
+    dataset = generate(users, courses, enrollments, seed, skew=0.0, inactive_users=0.0, closed_courses=0.0, completed=0.0)
+    load(dataset, user_service, course_service, enrollment_service)
+
+
+def user_search_prefix(rng: random.Random) -> str:
+    """A 2-3 letter prefix of a generated first or last name, so user searches find matches"""
+    name = rng.choice(FIRST_NAMES if rng.random() < 0.5 else LAST_NAMES)
+    return name[:rng.randint(2, 3)].lower()
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+    checks: Sequence[Tuple[str, bool]], threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """Compare results with the baseline.
+
+    checks lists (metric, higher_is_better) pairs. A metric regresses when it
+    is worse than the baseline by more than threshold (a fraction). Check
+    machine-independent metrics, such as ratios to a reference measured in
+    the same run, so a baseline from another machine does not fail the run.
+    """
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in checks:
+            current, previous = metrics.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+            change = (current - previous) / previous
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(f"{name}: {metric} {previous:g} -> {current:g} ({change:+.0%})")
+    return regressions
+
+
+def format_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> str:
+    cells = [[str(header) for header in headers]] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
@@ -0,0 +1,243 @@
+"""Deterministic synthetic datasets for testing at production scale.
+
+Generates users, courses and enrollments column by column from a seed. Course
+popularity follows a Zipf distribution, so a few courses hold most of the
+enrollments while the long tail has a handful each, and a share of users are
+inactive and of courses closed. Datasets are loaded straight into the services
+through construct_many() and the restore() paths, skipping HTTP and per-row
+validation, or written as CSV files in the /data/import formats.
+
+    python -m benchmarks.dataset --users 200000 --courses 10000 --enrollments 1000000 --out data/
+"""
+import argparse
+import csv
+import gc
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, List, Sequence
+
+from schemas.common import construct_many
+from schemas.course import Course
+from schemas.enrollment import Enrollment
+from schemas.user import User
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.user_service import UserService
+
+DEFAULT_SKEW = 1.0
+DEFAULT_INACTIVE_USERS = 0.05
+DEFAULT_CLOSED_COURSES = 0.1
+DEFAULT_COMPLETED = 0.3
+
+# Timestamps spread over this window, accounts and courses first, then enrollments
+START = datetime(2024, 1, 1)
+SPAN = timedelta(days=365)
+
+FIRST_NAMES = (
+    "Ada", "Amara", "Baraka", "Chen", "Chidi", "Diego", "Elena", "Fatima", "Grace", "Hana",
+    "Ibrahim", "Ivan", "Jamal", "Kofi", "Lena", "Mateo", "Nia", "Omar", "Priya", "Sofia",
+)
+LAST_NAMES = (
+    "Adeyemi", "Bello", "Costa", "Dubois", "Eze", "Garcia", "Haddad", "Ito", "Kamau", "Kim",
+    "Mensah", "Novak", "Okafor", "Patel", "Rossi", "Santos", "Silva", "Tanaka", "Wanjiru", "Zhang",
+)
+COURSE_WORDS = (
+    "python", "data", "web", "design", "cloud", "security", "machine", "learning",
+    "mobile", "devops", "testing", "databases", "networks", "product", "writing", "finance",
+)
+
+Columns = Dict[str, Sequence[Any]]
+
+
+@contextmanager
+def _gc_paused():
+    # Millions of new objects would otherwise trigger repeated full GC passes
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _timestamps(count: int, start: datetime, span: timedelta) -> List[datetime]:
+    step = span / max(count, 1)
+    return [start + step * i for i in range(count)]
+
+
+def _flags(rng: random.Random, count: int, rate: float) -> List[bool]:
+    """A list of count booleans where about `rate` of them are True"""
+    chance = rng.random
+    return [chance() < rate for _ in range(count)]
+
+
+def generate_users(rng: random.Random, count: int, inactive: float) -> Columns:
+    first_names = rng.choices(FIRST_NAMES, k=count)
+    last_names = rng.choices(LAST_NAMES, k=count)
+    return {
+        "id": range(1, count + 1),
+        "name": [f"{first} {last}" for first, last in zip(first_names, last_names)],
+        "email": [
+            f"{first.lower()}.{last.lower()}{i}@example.com"
+            for i, (first, last) in enumerate(zip(first_names, last_names), start=1)
+        ],
+        "is_active": [not flag for flag in _flags(rng, count, inactive)],
+        "created_at": _timestamps(count, START, SPAN / 2),
+    }
+
+
+def generate_courses(rng: random.Random, count: int, closed: float) -> Columns:
+    return {
+        "id": range(1, count + 1),
+        "title": [
+            f"{rng.choice(COURSE_WORDS).title()} {rng.choice(COURSE_WORDS).title()} {i}"
+            for i in range(1, count + 1)
+        ],
+        "description": [" ".join(rng.choices(COURSE_WORDS, k=8)) for _ in range(count)],
+        "is_open": [not flag for flag in _flags(rng, count, closed)],
+        "created_at": _timestamps(count, START, SPAN / 2),
+    }
+
+
+def generate_enrollments(
+    rng: random.Random, count: int, users: int, courses: int, skew: float, completed: float
+) -> Columns:
+    """Unique (user, course) pairs, users uniform and courses Zipf(skew) by popularity.
+
+    Popularity ranks are shuffled so the most popular course is not always id 1.
+    Pairs are packed into one int and deduplicated with dict.update, which keeps
+    the first occurrence and generation order, in batches until enough unique
+    pairs exist or further draws stop finding new ones.
+    """
+    count = min(count, users * courses)
+    by_rank = list(range(1, courses + 1))
+    rng.shuffle(by_rank)
+    cum_weights = list(accumulate(1 / rank ** skew for rank in range(1, courses + 1)))
+    stride = courses + 1
+    chance = rng.random
+
+    pairs: Dict[int, None] = {}
+    for _ in range(50):
+        missing = count - len(pairs)
+        if not missing:
+            break
+        course_ids = rng.choices(by_rank, cum_weights=cum_weights, k=missing)
+        pairs.update(dict.fromkeys(
+            int(chance() * users + 1) * stride + course_id for course_id in course_ids
+        ))
+    keys = list(pairs)
+    created_at = _timestamps(len(keys), START + SPAN / 2, SPAN / 2)
+    return {
+        "id": range(1, len(keys) + 1),
+        "user_id": [key // stride for key in keys],
+        "course_id": [key % stride for key in keys],
+        "enrolled_date": [moment.date() for moment in created_at],
+        "completed": _flags(rng, len(keys), completed),
+        "created_at": created_at,
+    }
+
+
+def generate(
+    users: int, courses: int, enrollments: int, seed: int = 0, skew: float = DEFAULT_SKEW,
+    inactive_users: float = DEFAULT_INACTIVE_USERS, closed_courses: float = DEFAULT_CLOSED_COURSES,
+    completed: float = DEFAULT_COMPLETED
+) -> Dict[str, Columns]:
+    """Columns per table; the same arguments always give the same dataset"""
+    rng = random.Random(seed)
+    with _gc_paused():
+        return {
+            "users": generate_users(rng, users, inactive_users),
+            "courses": generate_courses(rng, courses, closed_courses),
+            "enrollments": generate_enrollments(rng, enrollments, users, courses, skew, completed),
+        }
+
+
+def load(
+    dataset: Dict[str, Columns], user_service: UserService, course_service: CourseService,
+    enrollment_service: EnrollmentService
+):
+    """Replace the services' data with the dataset through the trusted bulk paths"""
+    with _gc_paused():
+        for name, model, service in (
+            ("users", User, user_service),
+            ("courses", Course, course_service),
+            ("enrollments", Enrollment, enrollment_service),
+        ):
+            rows = construct_many(model, dataset[name])
+            service.restore(rows, len(rows) + 1)
+
+
+# Columns of each CSV file, matching the create schemas /data/import validates
+IMPORT_COLUMNS = {
+    "users": ("name", "email"),
+    "courses": ("title", "description"),
+    "enrollments": ("user_id", "course_id"),
+}
+
+
+def write_csv(dataset: Dict[str, Columns], directory: str) -> Dict[str, str]:
+    """Write one import file per table and return their paths.
+
+    Imports assign ids in file order, so the enrollment file refers to the
+    right rows when the files are imported, users first, into an empty server.
+    Active and open flags are not part of the import format.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, columns in IMPORT_COLUMNS.items():
+        paths[name] = os.path.join(directory, f"{name}.csv")
+        with open(paths[name], "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(zip(*(dataset[name][column] for column in columns)))
+    return paths
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic EduTrack Lite dataset")
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--courses", type=int, default=10_000)
+    parser.add_argument("--enrollments", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=DEFAULT_SKEW, help="Zipf exponent of course popularity")
+    parser.add_argument("--inactive-users", type=float, default=DEFAULT_INACTIVE_USERS)
+    parser.add_argument("--closed-courses", type=float, default=DEFAULT_CLOSED_COURSES)
+    parser.add_argument("--completed", type=float, default=DEFAULT_COMPLETED)
+    parser.add_argument("--out", help="write import CSV files to this directory")
+    parser.add_argument("--snapshot", help="load the dataset and save it as a snapshot file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    dataset = generate(
+        args.users, args.courses, args.enrollments, args.seed, args.skew,
+        args.inactive_users, args.closed_courses, args.completed
+    )
+    counts = ", ".join(f"{len(columns['id']):,} {name}" for name, columns in dataset.items())
+    print(f"generated {counts} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    if args.out:
+        started = time.perf_counter()
+        paths = write_csv(dataset, args.out)
+        print(f"wrote {', '.join(paths.values())} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    if args.snapshot:
+        from services.snapshot_service import SnapshotService
+
+        user_service, course_service = UserService(), CourseService()
+        enrollment_service = EnrollmentService(user_service, course_service)
+        started = time.perf_counter()
+        load(dataset, user_service, course_service, enrollment_service)
+        print(f"loaded into services in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        SnapshotService(user_service, course_service, enrollment_service).save(args.snapshot)
+        print(f"saved snapshot to {args.snapshot}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
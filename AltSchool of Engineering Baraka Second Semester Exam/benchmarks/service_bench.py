@@ -0,0 +1,181 @@
+"""Service-level microbenchmarks with complexity curves.
+
+Times UserService, CourseService and EnrollmentService methods directly, with
+no HTTP, on datasets of growing size. The dataset keeps the rows per user and
+per course constant as it grows, so point operations should stay flat and only
+full listings should grow with N. The exponent of the fitted time ~ N^k curve
+is compared with each method's expected complexity and any method growing
+faster than expected makes the run exit non-zero.
+
+    python -m benchmarks.service_bench --sizes 1000,100000,1000000
+"""
+import argparse
+import gc
+import json
+import math
+import random
+import sys
+import time
+from functools import partial
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from benchmarks.common import COURSE_WORDS, format_table, seed_services, user_search_prefix
+from schemas.course import CourseUpdate
+from schemas.enrollment import EnrollmentCreate, EnrollmentUpdate
+from schemas.user import UserCreate, UserUpdate
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.user_service import UserService
+
+ENROLLMENTS_PER_USER = 5
+ENROLLMENTS_PER_COURSE = 100
+MIN_SECONDS = 0.2
+MAX_CALLS = 2000
+REPEATS = 3
+
+# Largest acceptable fitted exponent for each expected complexity
+ALLOWED_EXPONENT = {"1": 0.5, "n": 1.3}
+
+
+class Services:
+    def __init__(self, rows: int, seed: int):
+        self.users = UserService()
+        self.courses = CourseService()
+        self.enrollments = EnrollmentService(self.users, self.courses)
+        self.user_count = max(1, rows // ENROLLMENTS_PER_USER)
+        self.course_count = max(1, rows // ENROLLMENTS_PER_COURSE)
+        seed_services(self.users, self.courses, self.enrollments, self.user_count, self.course_count, rows, seed)
+        self.enrollment_count = self.enrollments.count()
+
+    def user_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.user_count)
+
+    def course_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.course_count)
+
+    def enrollment_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.enrollment_count)
+
+
+Case = Callable[[Services, random.Random], Callable[[], object]]
+
+# (method, expected complexity, factory returning one call with fresh arguments).
+# Arguments, including request models, are built by the factory so their
+# validation is not part of the timed call.
+CASES: Sequence[Tuple[str, str, Case]] = (
+    ("UserService.create_user", "1", lambda s, rng: partial(
+        s.users.create_user, UserCreate(name="Bench User", email=f"bench{rng.random()}@example.com"))),
+    ("UserService.get_user", "1", lambda s, rng: partial(s.users.get_user, s.user_id(rng))),
+    ("UserService.update_user", "1", lambda s, rng: partial(
+        s.users.update_user, s.user_id(rng), UserUpdate(name=f"Renamed {rng.randint(1, 10 ** 6)}"))),
+    ("UserService.search_users", "1", lambda s, rng: partial(s.users.search_users, user_search_prefix(rng))),
+    ("UserService.get_all_users", "n", lambda s, rng: s.users.get_all_users),
+    ("CourseService.get_course", "1", lambda s, rng: partial(s.courses.get_course, s.course_id(rng))),
+    ("CourseService.update_course", "1", lambda s, rng: partial(
+        s.courses.update_course, s.course_id(rng), CourseUpdate(title=f"{rng.choice(COURSE_WORDS)} course"))),
+    ("CourseService.search_courses", "1", lambda s, rng: partial(s.courses.search_courses, rng.choice(COURSE_WORDS))),
+    ("EnrollmentService.create_enrollment", "1", lambda s, rng: partial(
+        s.enrollments.create_enrollment, EnrollmentCreate(user_id=s.user_id(rng), course_id=s.course_id(rng)))),
+    ("EnrollmentService.get_enrollment", "1", lambda s, rng: partial(s.enrollments.get_enrollment, s.enrollment_id(rng))),
+    ("EnrollmentService.update_enrollment", "1", lambda s, rng: partial(
+        s.enrollments.update_enrollment, s.enrollment_id(rng), EnrollmentUpdate(completed=rng.random() < 0.5))),
+    ("EnrollmentService.mark_completion", "1", lambda s, rng: partial(s.enrollments.mark_completion, s.enrollment_id(rng))),
+    ("EnrollmentService.get_user_enrollments", "1", lambda s, rng: partial(
+        s.enrollments.get_user_enrollments, s.user_id(rng))),
+    ("EnrollmentService.get_course_enrollments", "1", lambda s, rng: partial(
+        s.enrollments.get_course_enrollments, s.course_id(rng))),
+    ("EnrollmentService.get_all_enrollments", "n", lambda s, rng: s.enrollments.get_all_enrollments),
+)
+
+
+def time_case(services: Services, case: Case, seed: int) -> float:
+    """Best per-call time over REPEATS batches of fresh calls"""
+    rng = random.Random(seed)
+    best = math.inf
+    for _ in range(REPEATS):
+        gc.collect()
+        calls = 0
+        elapsed = 0.0
+        while elapsed < MIN_SECONDS and calls < MAX_CALLS:
+            call = case(services, rng)
+            started = time.perf_counter()
+            call()
+            elapsed += time.perf_counter() - started
+            calls += 1
+        best = min(best, elapsed / calls)
+    return best
+
+
+def fit_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """Least-squares slope of log(time) against log(size)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in seconds]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 0.0
+
+
+def describe(exponent: float) -> str:
+    if exponent < 0.5:
+        return "O(1)"
+    if exponent < 0.8:
+        return "sublinear"
+    if exponent < 1.3:
+        return "O(n)"
+    return "superlinear"
+
+
+def format_seconds(value: float) -> str:
+    if value >= 1:
+        return f"{value:.2f}s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.2f}ms"
+    return f"{value * 1e6:.1f}us"
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Service microbenchmarks for EduTrack Lite")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated enrollment counts")
+    parser.add_argument("--methods", default="", help="only run methods containing this text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the timings to this file")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    cases = [case for case in CASES if args.methods in case[0]]
+    timings: Dict[str, List[float]] = {name: [] for name, _, _ in cases}
+    for size in sizes:
+        started = time.perf_counter()
+        services = Services(size, args.seed)
+        print(f"seeded {size:,} enrollments in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        for name, _, case in cases:
+            timings[name].append(time_case(services, case, args.seed))
+        del services
+
+    rows = []
+    failures = []
+    for name, expected, _ in cases:
+        exponent = fit_exponent(sizes, timings[name]) if len(sizes) > 1 else 0.0
+        if len(sizes) > 1 and exponent > ALLOWED_EXPONENT[expected]:
+            failures.append(f"{name}: expected O({expected}), time grows as N^{exponent:.2f}")
+        rows.append(
+            [name] + [format_seconds(value) for value in timings[name]]
+            + [f"{exponent:.2f}", describe(exponent), f"O({expected})"]
+        )
+
+    print(format_table(["method"] + [f"N={size:,}" for size in sizes] + ["exponent", "observed", "expected"], rows))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump({"sizes": sizes, "seconds_per_call": timings}, file, indent=2)
+
+    if failures:
+        print("\nComplexity regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
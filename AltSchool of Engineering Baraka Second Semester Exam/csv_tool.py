@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+CSV import/export tool for EduTrack Lite API
+Streams CSV files to and from a running server without loading them into memory
+"""
+
+import argparse
+import json
+import sys
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+CHUNK_SIZE = 64 * 1024
+KINDS = ["users", "courses", "enrollments"]
+
+
+def read_chunks(path):
+    """Yield a file in fixed-size chunks"""
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def import_csv(base_url, kind, path):
+    """Upload a CSV file and print the import summary"""
+    response = httpx.post(
+        f"{base_url}/data/import/{kind}",
+        content=read_chunks(path),
+        headers={"Content-Type": "text/csv"},
+        timeout=None
+    )
+    response.raise_for_status()
+    summary = response.json()
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+def export_csv(base_url, kind, path):
+    """Download a store as CSV into a file"""
+    with httpx.stream("GET", f"{base_url}/data/export/{kind}", timeout=None) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_bytes():
+                f.write(chunk)
+    print(f"Exported {kind} to {path}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=BASE_URL, help="API base URL")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import a CSV file")
+    import_parser.add_argument("kind", choices=KINDS)
+    import_parser.add_argument("path")
+
+    export_parser = subparsers.add_parser("export", help="Export a store to a CSV file")
+    export_parser.add_argument("kind", choices=KINDS)
+    export_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        return import_csv(args.url, args.kind, args.path)
+    return export_csv(args.url, args.kind, args.path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Report aggregations run in worker processes. Spawned workers import this
+# module to unpickle the report function, so it must stay free of import side
+# effects: nothing from the services package, which builds every shared
+# service when imported. Columns arrive as NumPy arrays; NumPy is imported on
+# first use.
+from typing import Any, Dict, Optional
+
+
+def _rate(completed: int, enrollments: int) -> Optional[float]:
+    return round(completed / enrollments, 4) if enrollments else None
+
+
+def _per_id(ids: "np.ndarray", keys: "np.ndarray", completed: "np.ndarray"):
+    """Enrollments and completions counted per id in ids, ignoring other keys"""
+    import numpy as np
+
+    # Ids are allocated sequentially, so a table indexed by id stays small
+    size = int(max(ids.max(initial=0), keys.max(initial=0))) + 1
+    counts = np.bincount(keys, minlength=size)
+    done = np.bincount(keys[completed], minlength=size)
+    return counts[ids], done[ids]
+
+
+def course_completion(
+    course_ids: "np.ndarray", titles: "np.ndarray", is_open: "np.ndarray",
+    enrollment_courses: "np.ndarray", completed: "np.ndarray"
+) -> Dict[str, Any]:
+    """Enrollments, completions and completion rate per course, most enrolled first"""
+    import numpy as np
+
+    counts, done = _per_id(course_ids, enrollment_courses, completed)
+    order = np.lexsort((course_ids, -counts))
+    courses = [
+        {
+            "course_id": course_id,
+            "title": title,
+            "is_open": open_flag,
+            "enrollments": count,
+            "completed": finished,
+            "completion_rate": _rate(finished, count),
+        }
+        for course_id, title, open_flag, count, finished in zip(
+            course_ids[order].tolist(), titles[order].tolist(), is_open[order].tolist(),
+            counts[order].tolist(), done[order].tolist()
+        )
+    ]
+    total, total_done = len(enrollment_courses), int(np.count_nonzero(completed))
+    return {
+        "enrollments": total,
+        "completed": total_done,
+        "completion_rate": _rate(total_done, total),
+        "courses": courses,
+    }
+
+
+def _histogram(counts: "np.ndarray") -> Dict[str, int]:
+    """How many ids have each count, for zero and the counts that occur"""
+    import numpy as np
+
+    histogram = np.bincount(counts, minlength=1)
+    present = np.flatnonzero(histogram)
+    if not histogram[0]:
+        present = np.concatenate(([0], present))
+    return {str(count): number for count, number in zip(present.tolist(), histogram[present].tolist())}
+
+
+def user_activity(
+    user_ids: "np.ndarray", is_active: "np.ndarray", enrollment_users: "np.ndarray", completed: "np.ndarray"
+) -> Dict[str, Any]:
+    """Active users and how many enrollments and completions users have"""
+    import numpy as np
+
+    enrolled, done = _per_id(user_ids, enrollment_users, completed)
+    users, active = len(user_ids), int(np.count_nonzero(is_active))
+    return {
+        "users": users,
+        "active": active,
+        "inactive": users - active,
+        "mean_enrollments": round(int(enrolled.sum()) / users, 4) if users else None,
+        "enrollments_per_user": _histogram(enrolled),
+        "completions_per_user": _histogram(done),
+    }
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Concurrent load generator for EduTrack Lite API
+Replays the demo.py workflow as weighted scenarios over a pooled async client
+and reports per-endpoint throughput, latency percentiles and error rates
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import format_table, percentile
+
+BASE_URL = "http://localhost:8000"
+DEFAULT_WEIGHTS = "browse=4,enroll=3,roster=2,search=2,signup=1,complete=1"
+CLIENT_ID_HEADER = "X-Client-Id"
+COURSE_TOPICS = ["Python", "JavaScript", "Data", "Cloud", "Security", "Design", "Testing", "Mobile"]
+
+
+# Each worker is one virtual user with its own client id, as labeled in the slow request log.
+# Admission control keys on the address, so it sees all workers as one client.
+_client_id: contextvars.ContextVar[str] = contextvars.ContextVar("load_test_client_id", default="load-test")
+
+
+class Stats:
+    """Latencies and outcomes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.client_errors: Dict[str, int] = defaultdict(int)
+        self.shed: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint, seconds, status_code):
+        self.latencies[endpoint].append(seconds)
+        if status_code == 503:
+            # Load shedding by admission control, not a failure of the request
+            self.shed[endpoint] += 1
+        elif status_code is None or status_code >= 500:
+            self.errors[endpoint] += 1
+        elif status_code >= 400:
+            self.client_errors[endpoint] += 1
+
+    def report(self, elapsed):
+        results = {}
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            count = len(latencies)
+            results[endpoint] = {
+                "requests": count,
+                "throughput_rps": round(count / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "client_error_rate": round(self.client_errors[endpoint] / count, 4),
+                "shed_rate": round(self.shed[endpoint] / count, 4),
+                "error_rate": round(self.errors[endpoint] / count, 4),
+            }
+        return results
+
+
+class Pacer:
+    """Spaces request starts evenly to hold a target request rate across all workers"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_slot = time.perf_counter()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class LoadRun:
+    """Shared state for one load run: client, id pools, pacing and stats"""
+
+    def __init__(self, client, pacer, rng, tag):
+        self.client = client
+        self.pacer = pacer
+        self.rng = rng
+        self.tag = tag
+        self.stats = Stats()
+        self.user_ids: List[int] = []
+        self.course_ids: List[int] = []
+        self.enrollment_ids: List[int] = []
+        self.counter = 0
+
+    async def request(self, endpoint, method, url, **kwargs) -> Optional[httpx.Response]:
+        await self.pacer.wait()
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers={CLIENT_ID_HEADER: _client_id.get()}, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, time.perf_counter() - started, None)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code)
+        return response
+
+    def new_user(self):
+        self.counter += 1
+        return {"name": f"Load User {self.counter}", "email": f"load-{self.tag}-{self.counter}@example.com"}
+
+    def new_course(self):
+        self.counter += 1
+        topic = self.rng.choice(COURSE_TOPICS)
+        return {"title": f"{topic} Basics {self.counter}", "description": f"Learn {topic} fundamentals"}
+
+
+async def signup(run):
+    response = await run.request("POST /users/", "POST", "/users/", json=run.new_user())
+    if response is not None and response.status_code == 201:
+        user_id = response.json()["id"]
+        run.user_ids.append(user_id)
+        await run.request("GET /users/{user_id}", "GET", f"/users/{user_id}")
+
+
+async def browse(run):
+    await run.request("GET /courses/?fields", "GET", "/courses/", params={"fields": "id,title,is_open"})
+    await run.request("GET /courses/{course_id}", "GET", f"/courses/{run.rng.choice(run.course_ids)}")
+
+
+async def search(run):
+    await run.request("GET /courses/search", "GET", "/courses/search", params={"q": run.rng.choice(COURSE_TOPICS)})
+
+
+async def enroll(run):
+    user_id = run.rng.choice(run.user_ids)
+    enrollment = {"user_id": user_id, "course_id": run.rng.choice(run.course_ids)}
+    response = await run.request("POST /enrollments/", "POST", "/enrollments/", json=enrollment)
+    if response is not None and response.status_code == 201:
+        run.enrollment_ids.append(response.json()["id"])
+    await run.request("GET /enrollments/user/{user_id}", "GET", f"/enrollments/user/{user_id}")
+
+
+async def complete(run):
+    if not run.enrollment_ids:
+        return await enroll(run)
+    enrollment_id = run.rng.choice(run.enrollment_ids)
+    await run.request("PATCH /enrollments/{id}/complete", "PATCH", f"/enrollments/{enrollment_id}/complete")
+
+
+async def roster(run):
+    course_id = run.rng.choice(run.course_ids)
+    await run.request("GET /courses/{course_id}/enrollments", "GET", f"/courses/{course_id}/enrollments")
+
+
+SCENARIOS = {
+    "signup": signup,
+    "browse": browse,
+    "search": search,
+    "enroll": enroll,
+    "complete": complete,
+    "roster": roster,
+}
+
+
+def parse_weights(text):
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def setup(client, run, users, courses):
+    """Create the users and courses scenarios pick from; not part of the measurements"""
+    async def create(path, body, pool):
+        response = await client.post(path, json=body)
+        response.raise_for_status()
+        pool.append(response.json()["id"])
+
+    await asyncio.gather(*(create("/users/", run.new_user(), run.user_ids) for _ in range(users)))
+    await asyncio.gather(*(create("/courses/", run.new_course(), run.course_ids) for _ in range(courses)))
+
+
+async def run_load(args):
+    weights = args.weights
+    names = list(weights)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        run = LoadRun(client, Pacer(args.rate), rng, f"{args.seed}-{int(time.time())}")
+        await setup(client, run, args.users, args.courses)
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(number):
+            _client_id.set(f"load-test-{number}")
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(names, weights=[weights[name] for name in names])[0]
+                await SCENARIOS[scenario](run)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(number) for number in range(args.concurrency)))
+        return run.stats.report(time.perf_counter() - started)
+
+
+def start_server(port):
+    """Start a local uvicorn server and wait until it answers /health.
+
+    Every virtual user connects from the same address, which admission
+    control counts as one client, so its concurrency caps are turned off
+    to measure the application rather than load shedding.
+    """
+    env = {**os.environ, "EDUTRACK_LIST_CONCURRENCY": "0", "EDUTRACK_CLIENT_CONCURRENCY": "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EduTrack Lite load generator")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--start-server", action="store_true", help="start a local server on --port first")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users (and connections)")
+    parser.add_argument("--rate", type=float, default=0.0, help="target requests per second; 0 means as fast as possible")
+    parser.add_argument("--weights", type=parse_weights, default=parse_weights(DEFAULT_WEIGHTS),
+                        help=f"scenario weights, e.g. {DEFAULT_WEIGHTS}")
+    parser.add_argument("--users", type=int, default=100, help="users created before the run")
+    parser.add_argument("--courses", type=int, default=20, help="courses created before the run")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server = start_server(args.port)
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    total = sum(result["requests"] for result in results.values())
+    print(format_table(
+        ("endpoint", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms", "4xx", "shed", "errors"),
+        [
+            (endpoint, r["requests"], r["throughput_rps"], r["p50_ms"], r["p95_ms"], r["p99_ms"],
+             f"{r['client_error_rate']:.1%}", f"{r['shed_rate']:.1%}", f"{r['error_rate']:.1%}")
+            for endpoint, r in results.items()
+        ]
+    ))
+    print(f"\n{total} requests, {sum(r['throughput_rps'] for r in results.values()):.1f} req/s overall")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(r["error_rate"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
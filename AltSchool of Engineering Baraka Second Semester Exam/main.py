@@ -1,11 +1,37 @@
+import time
+# First, so the reported import time covers every import below
+IMPORT_STARTED = time.perf_counter()
+
+import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import users, courses, enrollments
+from fastapi.middleware.gzip import GZipMiddleware
+from routes import users, courses, enrollments, data, admin, monitoring, reports, analytics
+from middleware.admission import AdmissionMiddleware
+from middleware.idempotency import IdempotencyMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.shared_state import SharedStateMiddleware
+from middleware.slow_requests import SlowRequestMiddleware
+from middleware.tracing import TracingMiddleware
+from services import user_service, course_service, enrollment_service, snapshot_service, report_service, tracer, profiler, slow_request_log, admission, idempotency_cache
+from services.journal import SharedJournal
+
+logger = logging.getLogger("edutrack.startup")
+
+# "lazy" builds the OpenAPI schema on the first /openapi.json or /docs request,
+# "precompute" builds it during startup and "off" serves no schema or docs
+OPENAPI_MODES = ("lazy", "precompute", "off")
+openapi_mode = os.environ.get("EDUTRACK_OPENAPI", "lazy")
+if openapi_mode not in OPENAPI_MODES:
+    raise ValueError(f"EDUTRACK_OPENAPI must be one of {', '.join(OPENAPI_MODES)}, not {openapi_mode!r}")
 
 app = FastAPI(
     title="EduTrack Lite API",
     description="A simple course management system for tracking user enrollments and course completion",
-    version="1.0.0"
+    version="1.0.0",
+    openapi_url=None if openapi_mode == "off" else "/openapi.json"
 )
 
 # Add CORS middleware
@@ -17,10 +43,100 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Replay responses of create requests retried with the same Idempotency-Key.
+# Added before GZip so stored bodies are uncompressed and re-encoded per retry.
+app.add_middleware(IdempotencyMiddleware, cache=idempotency_cache)
+
+# Compress responses over EDUTRACK_GZIP_MIN_BYTES for clients sending Accept-Encoding: gzip.
+# Level 5 keeps nearly all of level 9's ratio on JSON at about a third of the CPU.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.environ.get("EDUTRACK_GZIP_MIN_BYTES", 1024)),
+    compresslevel=int(os.environ.get("EDUTRACK_GZIP_LEVEL", 5))
+)
+
+# Multi-worker mode: every worker shares state through one operation log
+shared_journal = None
+if os.environ.get("EDUTRACK_SHARED_LOG"):
+    shared_journal = SharedJournal(
+        os.environ["EDUTRACK_SHARED_LOG"], user_service, course_service, enrollment_service,
+        compact_bytes=int(float(os.environ.get("EDUTRACK_SHARED_LOG_COMPACT_MB", 64)) * 1024 * 1024)
+    )
+    app.add_middleware(SharedStateMiddleware, journal=shared_journal)
+
+# Sampled request tracing, see EDUTRACK_TRACE_SAMPLE_RATE
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
+# Structured log of requests slower than EDUTRACK_SLOW_REQUEST_MS
+app.add_middleware(SlowRequestMiddleware, log=slow_request_log)
+
+# Per-client rate limits and load shedding on expensive list routes
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# Request metrics, exposed at /metrics
+app.add_middleware(MetricsMiddleware, registry=monitoring.metrics_registry)
+
+# On-demand profiling for requests carrying the admin token
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
 # Include routers
 app.include_router(users.router)
 app.include_router(courses.router)
 app.include_router(enrollments.router)
+app.include_router(data.router)
+app.include_router(admin.router)
+app.include_router(reports.router)
+app.include_router(analytics.router)
+app.include_router(monitoring.router)
+
+
+@app.on_event("startup")
+def load_snapshot():
+    """Bulk-load the stores from the shared log or the configured snapshot"""
+    started = time.perf_counter()
+    if shared_journal is not None:
+        shared_journal.catch_up()
+    else:
+        snapshot_service.load_if_present()
+    app.state.startup_seconds["load"] = round(time.perf_counter() - started, 4)
+
+
+def report_startup(target: FastAPI, mode: str):
+    """Build target's OpenAPI schema when precomputing it, then report startup time and mark it ready"""
+    timings = target.state.startup_seconds
+    if mode == "precompute":
+        started = time.perf_counter()
+        # FastAPI keeps the schema once built, so no request pays for it
+        target.openapi()
+        timings["openapi"] = round(time.perf_counter() - started, 4)
+    timings["total"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    logger.info("Ready in %.3fs (%s)", timings["total"], ", ".join(
+        f"{phase} {seconds:.3f}s" for phase, seconds in timings.items() if phase != "total"
+    ))
+    target.state.ready = True
+
+
+@app.on_event("startup")
+def finish_startup():
+    report_startup(app, openapi_mode)
+
+
+@app.on_event("shutdown")
+def flush_slow_request_log():
+    """Write out slow requests still waiting in the log queue"""
+    slow_request_log.close()
+
+
+@app.on_event("shutdown")
+def flush_traces():
+    """Write out traces still waiting in the export queue"""
+    tracer.close()
+
+
+@app.on_event("shutdown")
+def stop_report_workers():
+    """Stop the report worker processes, abandoning unfinished jobs"""
+    report_service.close()
 
 
 @app.get("/")
@@ -29,11 +145,14 @@ def read_root():
     return {
         "message": "Welcome to EduTrack Lite API",
         "version": "1.0.0",
-        "docs": "/docs",
+        "docs": "/docs" if app.openapi_url else None,
         "endpoints": {
             "users": "/users",
             "courses": "/courses", 
-            "enrollments": "/enrollments"
+            "enrollments": "/enrollments",
+            "data": "/data",
+            "reports": "/reports",
+            "analytics": "/analytics"
         }
     }
 
@@ -44,6 +163,10 @@ def health_check():
     return {"status": "healthy"}
 
 
+# Seconds per startup phase, reported by /ready and /metrics
+app.state.startup_seconds = {"import": round(time.perf_counter() - IMPORT_STARTED, 4)}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,76 @@
+import math
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from services.rate_limit import AdmissionController
+
+SHED_RETRY_AFTER = 1
+
+
+def client_address(scope: Scope) -> str:
+    """The peer address, the identity limits and idempotency keys are scoped to.
+
+    Unlike the X-Client-Id header, which any client can set to anything and
+    is only used as a label in logs, the address comes from the connection.
+    Behind a reverse proxy, run uvicorn with --proxy-headers and
+    --forwarded-allow-ips so it is taken from the proxy's X-Forwarded-For.
+    """
+    peer = scope.get("client")
+    return peer[0] if peer else "unknown"
+
+
+def label_route(scope: Scope):
+    """Match a request answered before routing, so metrics count it against its route"""
+    for route in getattr(scope.get("app"), "routes", ()):
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            scope.update(child_scope)
+            return
+
+
+class AdmissionMiddleware:
+    """Rejects rate-limited clients with 429 and sheds expensive requests with 503.
+
+    Both responses carry Retry-After. Clients are identified by their
+    address, see client_address.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        method, path = scope["method"], scope["path"]
+        limited = controller.client_limit is not None or controller.route_limits
+        capped = controller.capped(method, path)
+        if not (limited or capped):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_address(scope)
+        if limited:
+            wait = controller.check_rate(client, method, path)
+            if wait:
+                await self.reject(scope, receive, send, 429, "Rate limit exceeded", max(1, math.ceil(wait)))
+                return
+        if not capped:
+            await self.app(scope, receive, send)
+            return
+
+        if not controller.acquire(client):
+            await self.reject(scope, receive, send, 503, "Server is busy, retry later", SHED_RETRY_AFTER)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(client)
+
+    async def reject(self, scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: int):
+        label_route(scope)
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": str(retry_after)})
+        await response(scope, receive, send)
@@ -0,0 +1,131 @@
+import hashlib
+from typing import List, Optional
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from middleware.admission import client_address, label_route
+from routes.encoding import MAX_BODY_BYTES
+from services.idempotency import MAX_KEY_LENGTH, MAX_STORED_BODY, IdempotencyCache, StoredResponse
+
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response when a create request is retried with the same Idempotency-Key.
+
+    The first request with a key runs normally and its response is stored,
+    unless it failed with a 5xx. A retry with the same key and body gets
+    that response back, marked with Idempotent-Replayed: true, without
+    running the endpoint again. Reusing a key with a different body is
+    rejected with 422, and a retry while the first request is still running
+    gets 409. Keys are scoped to the client address, like admission control.
+
+    The cache lives in each worker, so with several workers a retry that
+    reaches another worker runs again.
+    """
+
+    def __init__(self, app: ASGIApp, cache: IdempotencyCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_KEY_HEADER)
+        route = self.cache.routes.match(scope["method"], scope["path"]) if idempotency_key is not None else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await self.reject(scope, receive, send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        try:
+            body = await self._read_body(receive)
+        except ValueError:
+            await self.reject(scope, receive, send, 413, "Request body too large")
+            return
+        if body is None:
+            return
+        key = (client_address(scope), route, idempotency_key)
+        fingerprint = hashlib.sha256(body).digest()
+
+        cache = self.cache
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                await self.reject(scope, receive, send, 422, "Idempotency-Key was already used with a different request body")
+            elif entry.response is None:
+                await self.reject(scope, receive, send, 409, "A request with this Idempotency-Key is still in progress")
+            else:
+                cache.replayed += 1
+                await self.replay(scope, send, entry.response)
+            return
+
+        entry = cache.reserve(key, fingerprint)
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_and_capture(message: Message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body" and size <= MAX_STORED_BODY:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+        except BaseException:
+            cache.discard(key, entry)
+            raise
+        if start is None or start["status"] >= 500 or size > MAX_STORED_BODY:
+            cache.discard(key, entry)
+        else:
+            cache.complete(key, entry, StoredResponse(start["status"], list(start.get("headers", [])), b"".join(chunks)))
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> Optional[bytes]:
+        """The whole request body, or None if the client disconnected first.
+
+        Raises ValueError once the body passes MAX_BODY_BYTES.
+        """
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > MAX_BODY_BYTES:
+                raise ValueError("request body too large")
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def replay(self, scope: Scope, send: Send, response: StoredResponse):
+        label_route(scope)
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(REPLAYED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def reject(self, scope: Scope, receive: Receive, send: Send, status_code: int, detail: str):
+        label_route(scope)
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
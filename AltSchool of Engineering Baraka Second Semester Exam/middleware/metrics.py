@@ -0,0 +1,123 @@
+import bisect
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RouteStats:
+    __slots__ = ("requests", "client_errors", "server_errors", "latency_sum", "bucket_counts")
+
+    def __init__(self):
+        self.requests = 0
+        self.client_errors = 0
+        self.server_errors = 0
+        self.latency_sum = 0.0
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class MetricsRegistry:
+    """Per-route request counters and latency histograms.
+
+    Updated only from the event loop thread, so no locking is needed and
+    recording a request is a dict lookup, a bisect and a few increments.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.route_paths: Dict[Any, str] = {}
+
+    def route_path(self, app: Any, endpoint: Any) -> str:
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self.route_paths.get(endpoint)
+        if path is None:
+            self.route_paths = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(app, "routes", ())
+            }
+            path = self.route_paths.setdefault(endpoint, UNMATCHED_ROUTE)
+        return path
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.requests += 1
+        if status_code >= 500:
+            stats.server_errors += 1
+        elif status_code >= 400:
+            stats.client_errors += 1
+        stats.latency_sum += seconds
+        stats.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP edutrack_http_requests_total Requests handled, by route.",
+            "# TYPE edutrack_http_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), stats in routes:
+            lines.append(f'edutrack_http_requests_total{{method="{method}",route="{route}"}} {stats.requests}')
+
+        lines += [
+            "# HELP edutrack_http_request_errors_total Requests that returned a 4xx or 5xx status, by route.",
+            "# TYPE edutrack_http_request_errors_total counter",
+        ]
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{route}"'
+            lines.append(f'edutrack_http_request_errors_total{{{labels},class="4xx"}} {stats.client_errors}')
+            lines.append(f'edutrack_http_request_errors_total{{{labels},class="5xx"}} {stats.server_errors}')
+
+        lines += [
+            "# HELP edutrack_http_request_duration_seconds Request latency, by route.",
+            "# TYPE edutrack_http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), stats.bucket_counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'edutrack_http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'edutrack_http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum}')
+            lines.append(f'edutrack_http_request_duration_seconds_count{{{labels}}} {stats.requests}')
+        return lines
+
+
+def render_gauges(name: str, help_text: str, label: str, values: Iterable[Tuple[str, float]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f'{name}{{{label}="{key}"}} {value}' for key, value in values]
+    return lines
+
+
+class MetricsMiddleware:
+    """Records a count, status class and latency for every HTTP request"""
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the shared scope dict
+            route = self.registry.route_path(scope.get("app"), scope.get("endpoint"))
+            self.registry.observe(scope["method"], route, status_code, time.perf_counter() - started)
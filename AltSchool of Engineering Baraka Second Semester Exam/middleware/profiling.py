@@ -0,0 +1,51 @@
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.profiling import SORT_KEYS, Profiler
+
+PROFILE_HEADER = "x-profile"
+PROFILE_SORT_HEADER = "x-profile-sort"
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry the admin token in an X-Profile header.
+
+    The normal response is discarded and replaced by the sorted cProfile
+    report; its status code is returned in X-Profiled-Status. Requests without
+    the header, or with a wrong token, are served as usual.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.profiler.token:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not self.profiler.authorized(headers.get(PROFILE_HEADER)):
+            await self.app(scope, receive, send)
+            return
+
+        sort = headers.get(PROFILE_SORT_HEADER, SORT_KEYS[0])
+        if sort not in SORT_KEYS:
+            response = PlainTextResponse(f"X-Profile-Sort must be one of: {', '.join(SORT_KEYS)}", status_code=400)
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def capture(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        with self.profiler.profile_request() as profile:
+            if profile is None:
+                response = PlainTextResponse("Another request is being profiled", status_code=409)
+            else:
+                await self.app(scope, receive, capture)
+        if profile is not None:
+            response = PlainTextResponse(profile.render(sort), headers={"X-Profiled-Status": str(status_code)})
+        await response(scope, receive, send)
@@ -0,0 +1,23 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from services.journal import SharedJournal
+
+
+class SharedStateMiddleware:
+    """Keeps this worker in step with the shared journal.
+
+    Every request first replays any entries other workers appended. Writes
+    need nothing more here: each mutating service call locks the log,
+    catches up again and appends its change in one threadpool call, so
+    checks such as duplicate enrollment see every worker's data without a
+    lock being held while the request awaits.
+    """
+
+    def __init__(self, app: ASGIApp, journal: SharedJournal):
+        self.app = app
+        self.journal = journal
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and self.journal.has_updates():
+            await run_in_threadpool(self.journal.catch_up)
+        await self.app(scope, receive, send)
@@ -0,0 +1,89 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from routes.tracing import TIMINGS_SCOPE_KEY, RequestTimings
+from services.slow_log import SlowRequestLog
+
+CLIENT_ID_HEADER = "x-client-id"
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 3)
+
+
+class SlowRequestMiddleware:
+    """Sends requests slower than the log's threshold to the slow-request log.
+
+    Fast requests only pay for counting body bytes; the record is built only
+    once a request is known to be slow.
+    """
+
+    def __init__(self, app: ASGIApp, log: SlowRequestLog):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            finished = time.perf_counter()
+            if finished - started >= self.log.threshold:
+                self.log.record(self.entry(scope, started, finished, status_code, request_bytes, response_bytes))
+
+    def entry(
+        self, scope: Scope, started: float, finished: float,
+        status_code: int, request_bytes: int, response_bytes: int
+    ) -> Dict[str, Any]:
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        timings: Optional[RequestTimings] = scope.get(TIMINGS_SCOPE_KEY)
+        breakdown: Dict[str, Optional[float]] = {"total": _ms(started, finished)}
+        if timings is not None:
+            breakdown.update(
+                routing=_ms(started, timings.started),
+                validate=_ms(timings.started, timings.endpoint_started),
+                endpoint=_ms(timings.endpoint_started, timings.endpoint_finished),
+                encode=_ms(timings.endpoint_finished, timings.finished),
+                send=_ms(timings.finished, finished),
+            )
+        return {
+            "time": datetime.now().isoformat(),
+            "method": scope["method"],
+            "route": timings.route if timings is not None else None,
+            "path": scope["path"],
+            "path_params": scope.get("path_params", {}),
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status_code,
+            "rows": timings.rows if timings is not None else None,
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "client": headers.get(CLIENT_ID_HEADER) or (client[0] if client else None),
+            "timings_ms": breakdown,
+        }
@@ -0,0 +1,27 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.tracing import Tracer
+
+
+class TracingMiddleware:
+    """Opens the root span of each sampled request, covering the whole response"""
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.tracer.trace(f"{scope['method']} {scope['path']}", method=scope["method"], path=scope["path"]) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    root.set(status_code=message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
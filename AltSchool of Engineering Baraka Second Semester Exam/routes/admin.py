@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from routes.dependencies import require_admin_token
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.admin import SnapshotInfo
+from services import profiler, snapshot_service
+from services.profiling import MAX_SAMPLE_SECONDS
+
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=EncodedRoute, default_response_class=EncodedResponse)
+
+
+def snapshot_info(rows=None) -> SnapshotInfo:
+    return SnapshotInfo(
+        path=snapshot_service.path,
+        rows=rows or {},
+        last_saved_at=snapshot_service.last_saved_at,
+        last_loaded_at=snapshot_service.last_loaded_at,
+        last_load_seconds=snapshot_service.last_load_seconds
+    )
+
+
+@router.get("/snapshot", response_model=SnapshotInfo, dependencies=[Depends(require_admin_token)])
+def get_snapshot_info():
+    """Get the snapshot path and when it was last saved or loaded"""
+    return snapshot_info()
+
+
+@router.post("/snapshot", response_model=SnapshotInfo, dependencies=[Depends(require_admin_token)])
+def save_snapshot():
+    """Write a binary snapshot of all stores to the configured path"""
+    if not snapshot_service.path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Snapshot path not configured. Set EDUTRACK_SNAPSHOT_PATH."
+        )
+    return snapshot_info(snapshot_service.save())
+
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin_token)])
+def sample_profile(
+    seconds: float = Query(5.0, gt=0, le=MAX_SAMPLE_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000)
+):
+    """Sample live request stacks for a time window and return them as collapsed stacks"""
+    return PlainTextResponse("\n".join(profiler.sample(seconds, interval_ms / 1000)) + "\n")
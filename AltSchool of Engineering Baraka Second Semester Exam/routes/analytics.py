@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from routes.dependencies import require_numpy
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.analytics import CompletionByCourse, CompletionByUserStatus, CompletionByWeek
+from services import analytics_service
+
+router = APIRouter(
+    prefix="/analytics", tags=["analytics"], dependencies=[Depends(require_numpy)],
+    route_class=EncodedRoute, default_response_class=EncodedResponse
+)
+
+
+@router.get("/completion/weekly", response_model=CompletionByWeek)
+async def completion_by_week():
+    """Completion rate of enrollments by the week they were made in"""
+    await analytics_service.refresh()
+    return await run_in_threadpool(analytics_service.completion_by_week)
+
+
+@router.get("/completion/courses", response_model=CompletionByCourse)
+async def completion_by_course():
+    """Completion rate per course"""
+    await analytics_service.refresh()
+    return await run_in_threadpool(analytics_service.completion_by_course)
+
+
+@router.get("/completion/user-status", response_model=CompletionByUserStatus)
+async def completion_by_user_status():
+    """Completion rate for enrollments of active, inactive and deleted users"""
+    await analytics_service.refresh(users=True)
+    return await run_in_threadpool(analytics_service.completion_by_user_status)
@@ -1,17 +1,16 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from schemas.course import Course, CourseCreate, CourseUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional, Tuple
+from routes.dependencies import FieldSelector
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.common import BatchGetRequest, project
+from schemas.course import Course, CourseBatch, CourseCreate, CourseUpdate, CourseSearchResults
 from schemas.enrollment import EnrollmentWithDetails
-from services.course_service import CourseService
-from services.enrollment_service import EnrollmentService
-from services.user_service import UserService
+from services import course_service, enrollment_service
 
-router = APIRouter(prefix="/courses", tags=["courses"])
+router = APIRouter(prefix="/courses", tags=["courses"], route_class=EncodedRoute, default_response_class=EncodedResponse)
 
-# Initialize services
-user_service = UserService()
-course_service = CourseService()
-enrollment_service = EnrollmentService(user_service, course_service)
+select_course_fields = FieldSelector(Course)
+select_enrollment_fields = FieldSelector(EnrollmentWithDetails)
 
 
 @router.post("/", response_model=Course, status_code=status.HTTP_201_CREATED)
@@ -21,13 +20,43 @@ def create_course(course_data: CourseCreate):
 
 
 @router.get("/", response_model=List[Course])
-def get_all_courses():
+def get_all_courses(fields: Optional[Tuple[str, ...]] = Depends(select_course_fields)):
     """Get all courses"""
-    return course_service.get_all_courses()
+    courses = course_service.get_all_courses()
+    if fields:
+        return EncodedResponse([project(course, fields) for course in courses])
+    return courses
+
+
+@router.post("/batch-get", response_model=CourseBatch)
+def batch_get_courses(request: BatchGetRequest):
+    """Get many courses by ID in one call, reporting IDs that were not found"""
+    found, missing = course_service.get_courses(request.ids)
+    return CourseBatch(found=found, missing=missing)
+
+
+@router.get("/search", response_model=CourseSearchResults)
+def search_courses(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[Tuple[str, ...]] = Depends(select_course_fields)
+):
+    """Search courses by keywords in their title and description"""
+    total, results = course_service.search_courses(q, skip, limit)
+    if fields:
+        return EncodedResponse({
+            "query": q,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "results": [project(course, fields) for course in results]
+        })
+    return CourseSearchResults(query=q, total=total, skip=skip, limit=limit, results=results)
 
 
 @router.get("/{course_id}", response_model=Course)
-def get_course(course_id: int):
+def get_course(course_id: int, fields: Optional[Tuple[str, ...]] = Depends(select_course_fields)):
     """Get a specific course by ID"""
     course = course_service.get_course(course_id)
     if not course:
@@ -35,6 +64,8 @@ def get_course(course_id: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
+    if fields:
+        return EncodedResponse(project(course, fields))
     return course
 
 
@@ -73,7 +104,10 @@ def close_enrollment(course_id: int):
 
 
 @router.get("/{course_id}/enrollments", response_model=List[EnrollmentWithDetails])
-def get_course_enrollments(course_id: int):
+def get_course_enrollments(
+    course_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(select_enrollment_fields)
+):
     """Get all users enrolled in a particular course"""
     # Check if course exists
     course = course_service.get_course(course_id)
@@ -83,4 +117,7 @@ def get_course_enrollments(course_id: int):
             detail="Course not found"
         )
     
-    return enrollment_service.get_course_enrollments(course_id)
+    enrollments = enrollment_service.get_course_enrollments(course_id, fields)
+    if fields:
+        return EncodedResponse(enrollments)
+    return enrollments
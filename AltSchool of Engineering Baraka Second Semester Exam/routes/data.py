@@ -0,0 +1,36 @@
+import codecs
+from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from routes.encoding import EncodedRequest, EncodedResponse, EncodedRoute
+from schemas.transfer import DataKind, ImportSummary
+from services import csv_service
+from services.csv_service import RecordTooLarge
+
+router = APIRouter(prefix="/data", tags=["data"], route_class=EncodedRoute, default_response_class=EncodedResponse)
+
+
+@router.post("/import/{kind}", response_model=ImportSummary)
+async def import_csv(kind: DataKind, request: EncodedRequest):
+    """Stream a CSV body, optionally gzip-encoded, into the store, validating and inserting rows in chunks"""
+    csv_import = csv_service.start_import(kind)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    
+    try:
+        async for chunk in request.decoded_stream():
+            await run_in_threadpool(csv_import.feed, decoder.decode(chunk))
+        await run_in_threadpool(csv_import.feed, decoder.decode(b"", final=True))
+    except RecordTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    
+    return await run_in_threadpool(csv_import.finish)
+
+
+@router.get("/export/{kind}")
+def export_csv(kind: DataKind):
+    """Stream a store out as CSV"""
+    return StreamingResponse(
+        csv_service.export(kind),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{kind.value}.csv"'}
+    )
@@ -0,0 +1,46 @@
+from fastapi import Header, HTTPException, Query, status
+from pydantic import BaseModel
+from typing import Optional, Tuple, Type
+from schemas.common import parse_fields
+from services import analytics_service, profiler
+
+
+class FieldSelector:
+    """Dependency that reads the `fields=` query parameter for a response model.
+
+    Resolves to None when the parameter is absent, so routes fall back to
+    returning full models.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated list of fields to include in each item"
+        )
+    ) -> Optional[Tuple[str, ...]]:
+        if fields is None:
+            return None
+        try:
+            return parse_fields(self.model, fields)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject the request unless it carries the configured admin token"""
+    if not profiler.token:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Admin token not configured. Set EDUTRACK_ADMIN_TOKEN."
+        )
+    if not profiler.authorized(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+def require_numpy():
+    """Reject analytics and report requests when NumPy is not installed"""
+    if not analytics_service.available:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Analytics require numpy")
@@ -0,0 +1,159 @@
+import contextvars
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from routes.tracing import TracedRoute
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it every response is JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+JSON_MEDIA_RANGES = ("application/json", "application/*", "*/*")
+BODY_FORMAT_SCOPE_KEY = "edutrack.body_format"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Largest piece a streamed gzip body is inflated into at a time
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+_msgpack_response: contextvars.ContextVar[bool] = contextvars.ContextVar("edutrack_msgpack_response", default=False)
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def _quality(media_range: str) -> float:
+    for param in media_range.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the Accept header ranks MessagePack at least as high as JSON"""
+    if not accept or "msgpack" not in accept:
+        return False
+    qualities: Dict[str, float] = {}
+    for media_range in accept.split(","):
+        qualities[_media_type(media_range)] = _quality(media_range)
+    msgpack_q = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    # The most specific JSON range present decides how much JSON is wanted
+    json_q = next((qualities[media_range] for media_range in JSON_MEDIA_RANGES if media_range in qualities), 0.0)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+class EncodedResponse(JSONResponse):
+    """JSONResponse that renders MessagePack instead when the request asked for it"""
+
+    def render(self, content: Any) -> bytes:
+        if _msgpack_response.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content, default=str)
+        return super().render(content)
+
+
+def _gunzip(body: bytes) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, MAX_BODY_BYTES)
+    except zlib.error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip request body")
+    if decompressor.unconsumed_tail:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Request body too large")
+    return data
+
+
+class EncodedRequest(Request):
+    """Request whose body may be gzip-encoded and whose JSON may be MessagePack"""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if self.headers.get("content-encoding", "").lower() == "gzip":
+                body = _gunzip(body)
+            self._body = body
+        return self._body
+
+    async def decoded_stream(self) -> AsyncIterator[bytes]:
+        """The body as it arrives, inflated piece by piece when gzip-encoded.
+
+        Used by routes that stream bodies too large to buffer, which apply
+        their own limits to the decoded bytes. Other encodings get 415.
+        """
+        encoding = self.headers.get("content-encoding", "identity").strip().lower() or "identity"
+        if encoding == "identity":
+            async for chunk in self.stream():
+                yield chunk
+            return
+        if encoding != "gzip":
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Encoding: {encoding}"
+            )
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        async for chunk in self.stream():
+            while chunk:
+                try:
+                    data = decompressor.decompress(chunk, STREAM_CHUNK_BYTES)
+                except zlib.error:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip request body")
+                chunk = decompressor.unconsumed_tail
+                if data:
+                    yield data
+        if not decompressor.eof:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Truncated gzip request body")
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            if self.scope.get(BODY_FORMAT_SCOPE_KEY) == "msgpack":
+                try:
+                    self._json = msgpack.unpackb(body)
+                except (ValueError, msgpack.UnpackException):
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid MessagePack request body")
+            else:
+                self._json = json.loads(body)
+        return self._json
+
+
+class EncodedRoute(TracedRoute):
+    """TracedRoute that negotiates MessagePack for request and response bodies.
+
+    Responses built with EncodedResponse are packed as MessagePack when the
+    Accept header prefers it. A MessagePack request body is decoded in place
+    of JSON: the request is shown to FastAPI as JSON and EncodedRequest.json()
+    unpacks it, so body validation is unchanged. Error responses stay JSON.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def encoded_handler(request: Request) -> Response:
+            scope = request.scope
+            if _media_type(request.headers.get("content-type", "")) in MSGPACK_MEDIA_TYPES:
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="MessagePack is not supported by this server"
+                    )
+                scope[BODY_FORMAT_SCOPE_KEY] = "msgpack"
+                scope["headers"] = [
+                    (name, value) for name, value in scope["headers"] if name != b"content-type"
+                ] + [(b"content-type", b"application/json")]
+            request = EncodedRequest(scope, request.receive)
+            token = _msgpack_response.set(msgpack is not None and wants_msgpack(request.headers.get("accept")))
+            try:
+                return await handler(request)
+            finally:
+                _msgpack_response.reset(token)
+
+        return encoded_handler
@@ -1,16 +1,14 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from schemas.enrollment import Enrollment, EnrollmentCreate, EnrollmentUpdate, EnrollmentWithDetails
-from services.enrollment_service import EnrollmentService
-from services.user_service import UserService
-from services.course_service import CourseService
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Tuple
+from routes.dependencies import FieldSelector
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.common import BatchGetRequest
+from schemas.enrollment import Enrollment, EnrollmentBatch, EnrollmentBulkComplete, EnrollmentBulkCompleteResult, EnrollmentCreate, EnrollmentUpdate, EnrollmentWithDetails
+from services import user_service, course_service, enrollment_service
 
-router = APIRouter(prefix="/enrollments", tags=["enrollments"])
+router = APIRouter(prefix="/enrollments", tags=["enrollments"], route_class=EncodedRoute, default_response_class=EncodedResponse)
 
-# Initialize services
-user_service = UserService()
-course_service = CourseService()
-enrollment_service = EnrollmentService(user_service, course_service)
+select_enrollment_fields = FieldSelector(EnrollmentWithDetails)
 
 
 @router.post("/", response_model=Enrollment, status_code=status.HTTP_201_CREATED)
@@ -26,13 +24,46 @@ def create_enrollment(enrollment_data: EnrollmentCreate):
 
 
 @router.get("/", response_model=List[EnrollmentWithDetails])
-def get_all_enrollments():
+def get_all_enrollments(fields: Optional[Tuple[str, ...]] = Depends(select_enrollment_fields)):
     """Get all enrollments"""
-    return enrollment_service.get_all_enrollments()
+    enrollments = enrollment_service.get_all_enrollments(fields)
+    if fields:
+        return EncodedResponse(enrollments)
+    return enrollments
+
+
+@router.post("/batch-get", response_model=EnrollmentBatch)
+def batch_get_enrollments(request: BatchGetRequest):
+    """Get many enrollments with user and course details in one call, reporting IDs that were not found"""
+    found, missing = enrollment_service.get_enrollments(request.ids)
+    return EnrollmentBatch(found=found, missing=missing)
+
+
+@router.post("/bulk-complete", response_model=EnrollmentBulkCompleteResult)
+def bulk_complete_enrollments(request: EnrollmentBulkComplete):
+    """Mark every enrollment in a course, or a given set of enrollments, as completed"""
+    if request.course_id is not None:
+        if not course_service.get_course(request.course_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        completed, already_completed, missing = enrollment_service.complete_course(request.course_id)
+    else:
+        completed, already_completed, missing = enrollment_service.mark_completion_many(request.enrollment_ids)
+    
+    return EnrollmentBulkCompleteResult(
+        completed=completed,
+        already_completed=already_completed,
+        missing=missing
+    )
 
 
 @router.get("/{enrollment_id}", response_model=EnrollmentWithDetails)
-def get_enrollment(enrollment_id: int):
+def get_enrollment(
+    enrollment_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(select_enrollment_fields)
+):
     """Get a specific enrollment by ID"""
     enrollment = enrollment_service.get_enrollment(enrollment_id)
     if not enrollment:
@@ -42,20 +73,16 @@ def get_enrollment(enrollment_id: int):
         )
     
     # Get user and course details
-    user = user_service.get_user(enrollment.user_id)
-    course = course_service.get_course(enrollment.course_id)
-    
-    if not user or not course:
+    enrollment_detail = enrollment_service.with_details(enrollment, fields)
+    if enrollment_detail is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Associated user or course not found"
         )
     
-    return EnrollmentWithDetails(
-        **enrollment.dict(),
-        user_name=user.name,
-        course_title=course.title
-    )
+    if fields:
+        return EncodedResponse(enrollment_detail)
+    return enrollment_detail
 
 
 @router.put("/{enrollment_id}", response_model=Enrollment)
@@ -83,7 +110,10 @@ def mark_course_completion(enrollment_id: int):
 
 
 @router.get("/user/{user_id}", response_model=List[EnrollmentWithDetails])
-def get_user_enrollments(user_id: int):
+def get_user_enrollments(
+    user_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(select_enrollment_fields)
+):
     """Get all enrollments for a specific user"""
     # Check if user exists
     user = user_service.get_user(user_id)
@@ -93,7 +123,10 @@ def get_user_enrollments(user_id: int):
             detail="User not found"
         )
     
-    return enrollment_service.get_user_enrollments(user_id)
+    enrollments = enrollment_service.get_user_enrollments(user_id, fields)
+    if fields:
+        return EncodedResponse(enrollments)
+    return enrollments
 
 
 @router.delete("/{enrollment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,107 @@
+import anyio
+from typing import List
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from middleware.metrics import MetricsRegistry, render_gauges
+from routes.dependencies import require_admin_token
+from schemas.monitoring import CacheStats, ReadinessReport, StoreStats
+from services import user_service, course_service, enrollment_service, snapshot_service, tracer, admission, idempotency_cache
+from services.versioned_store import VersionedStore
+
+router = APIRouter(tags=["monitoring"])
+
+metrics_registry = MetricsRegistry()
+
+
+def store_rows():
+    return [
+        ("users", len(user_service.users)),
+        ("courses", len(course_service.courses)),
+        ("enrollments", enrollment_service.count()),
+    ]
+
+
+def index_sizes():
+    return [
+        ("user_prefix_keys", len(user_service.search_index.keys)),
+        ("course_search_terms", len(course_service.search_index.postings)),
+        ("enrollment_by_user", sum(len(shard.by_user) for shard in enrollment_service.shards)),
+        ("enrollment_by_course", sum(len(shard.by_course) for shard in enrollment_service.shards)),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus metrics: per-route request counts, errors and latency, plus store gauges"""
+    # Async so the threadpool statistics are read from the event loop
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    lines = metrics_registry.render()
+    lines += render_gauges("edutrack_store_rows", "Rows held in each store.", "store", store_rows())
+    lines += render_gauges("edutrack_index_entries", "Entries held in each index.", "index", index_sizes())
+    lines += render_gauges("edutrack_threadpool", "Worker threadpool usage.", "state", [
+        ("capacity", limiter.total_tokens),
+        ("busy", statistics.borrowed_tokens),
+        ("queued", statistics.tasks_waiting),
+    ])
+    lines += render_gauges("edutrack_admission_rejected", "Requests rejected by admission control.", "reason",
+                           admission.rejected.items())
+    lines += render_gauges("edutrack_admission_in_flight", "Expensive requests in flight.", "limit", [
+        ("concurrency", admission.concurrency or 0),
+        ("in_flight", admission.in_flight),
+    ])
+    lines += render_gauges("edutrack_idempotency", "Idempotency-Key cache entries and replayed responses.", "kind", [
+        ("keys", len(idempotency_cache)),
+        ("replayed", idempotency_cache.replayed),
+    ])
+    lines += render_gauges("edutrack_startup_seconds", "Seconds spent in each startup phase.", "phase",
+                           getattr(request.app.state, "startup_seconds", {}).items())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@router.get("/traces", dependencies=[Depends(require_admin_token)])
+def recent_traces(limit: int = Query(20, ge=1, le=100)):
+    """Most recent sampled request traces, newest first"""
+    return tracer.recent_traces(limit)
+
+
+def store_stats(rows: int, stores: List[VersionedStore]) -> StoreStats:
+    hits = sum(store.snapshot_hits for store in stores)
+    misses = sum(store.snapshot_misses for store in stores)
+    return StoreStats(
+        rows=rows,
+        approx_bytes=sum(store.approx_bytes() for store in stores),
+        snapshot_cache=CacheStats(
+            hits=hits,
+            misses=misses,
+            hit_rate=round(hits / (hits + misses), 4) if hits + misses else None
+        )
+    )
+
+
+@router.get("/ready", response_model=ReadinessReport)
+def readiness(request: Request):
+    """Readiness plus row counts, approximate memory per store and index, and cache hit rates"""
+    stores = {
+        "users": store_stats(len(user_service.users), [user_service.users]),
+        "courses": store_stats(len(course_service.courses), [course_service.courses]),
+        "enrollments": store_stats(
+            enrollment_service.count(), [shard.enrollments for shard in enrollment_service.shards]
+        ),
+    }
+    index_bytes = {
+        "user_prefix": user_service.search_index.approx_bytes(),
+        "course_search": course_service.search_index.approx_bytes(),
+        "enrollment_lookups": enrollment_service.index_bytes(),
+    }
+    report = ReadinessReport(
+        status="ready" if getattr(request.app.state, "ready", False) else "starting",
+        stores=stores,
+        index_bytes=index_bytes,
+        approx_total_bytes=sum(store.approx_bytes for store in stores.values()) + sum(index_bytes.values()),
+        snapshot_age_seconds=snapshot_service.age_seconds(),
+        startup_seconds=getattr(request.app.state, "startup_seconds", {})
+    )
+    if report.status != "ready":
+        return JSONResponse(report.model_dump(), status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return report
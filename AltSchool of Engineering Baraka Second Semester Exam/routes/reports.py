@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from routes.dependencies import require_numpy
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.reports import JobStatus, ReportJob, ReportKind
+from services import report_service
+
+router = APIRouter(prefix="/reports", tags=["reports"], route_class=EncodedRoute, default_response_class=EncodedResponse)
+
+
+@router.post(
+    "/{kind}", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_numpy)]
+)
+def start_report(kind: ReportKind, response: Response):
+    """Start a report job, or return the job already computed for the current data"""
+    job = report_service.submit(kind)
+    if job.status == JobStatus.done:
+        response.status_code = status.HTTP_200_OK
+    response.headers["Location"] = f"/reports/{job.id}"
+    return job
+
+
+@router.get("/{job_id}", response_model=ReportJob)
+def get_report(job_id: str):
+    """Get a report job's status, and its result once done"""
+    job = report_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report job not found")
+    return job
@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import functools
+import time
+from typing import Any, Callable, Optional
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+from services.profiling import active_profile
+from services.tracing import current_span, record, span
+
+ENDPOINT_SPAN = "endpoint"
+TIMINGS_SCOPE_KEY = "edutrack.timings"
+LIST_FIELDS = ("results", "found")
+
+_timings: contextvars.ContextVar[Optional["RequestTimings"]] = contextvars.ContextVar("edutrack_timings", default=None)
+
+
+class RequestTimings:
+    """perf_counter marks for one request's route handler, left in the ASGI scope"""
+
+    __slots__ = ("route", "started", "endpoint_started", "endpoint_finished", "finished", "rows")
+
+    def __init__(self, route: str, started: float):
+        self.route = route
+        self.started = started
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.rows: Optional[int] = None
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """Rows in an endpoint result: list length, or the length of a batch/search model's list"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, BaseModel):
+        for field in LIST_FIELDS:
+            value = getattr(result, field, None)
+            if isinstance(value, list):
+                return len(value)
+    return None
+
+
+def _instrument_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    # Keep the wrapper's kind so FastAPI still runs sync endpoints in the threadpool
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(**values):
+            timings = _timings.get()
+            if timings is not None:
+                timings.endpoint_started = time.perf_counter()
+            if current_span() is None:
+                result = await call(**values)
+            else:
+                with span(ENDPOINT_SPAN, function=call.__name__):
+                    result = await call(**values)
+            if timings is not None:
+                timings.endpoint_finished = time.perf_counter()
+                timings.rows = count_rows(result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(call)
+    def timed_wrapper(**values):
+        timings = _timings.get()
+        if timings is not None:
+            timings.endpoint_started = time.perf_counter()
+        if current_span() is None:
+            result = call(**values)
+        else:
+            with span(ENDPOINT_SPAN, function=call.__name__):
+                result = call(**values)
+        if timings is not None:
+            timings.endpoint_finished = time.perf_counter()
+            timings.rows = count_rows(result)
+        return result
+
+    @functools.wraps(call)
+    def wrapper(**values):
+        profile = active_profile()
+        if profile is None:
+            return timed_wrapper(**values)
+        # Sync endpoints run in a worker thread, which the request's loop-thread profile cannot see
+        with profile.thread():
+            return timed_wrapper(**values)
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that splits requests into validate, endpoint and encode stages.
+
+    FastAPI parses and validates the request, calls the endpoint and then
+    serializes its result inside one handler. The endpoint call is wrapped so
+    its start and end are marked in RequestTimings, which the slow-request log
+    reads from the scope; for traced requests the endpoint gets its own span
+    and the time before and after it becomes the validate and encode spans.
+    The wrapper also extends a request profile to the worker thread running
+    a sync endpoint.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        self.dependant.call = _instrument_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+        trace_name = f"{','.join(sorted(self.methods))} {self.path}"
+
+        async def timed_handler(request: Request) -> Response:
+            timings = request.scope[TIMINGS_SCOPE_KEY] = RequestTimings(self.path, time.perf_counter())
+            token = _timings.set(timings)
+            try:
+                response = await handler(request)
+            finally:
+                timings.finished = time.perf_counter()
+                _timings.reset(token)
+            return response
+
+        async def traced_handler(request: Request) -> Response:
+            if current_span() is None:
+                return await timed_handler(request)
+            with span("route", route=self.path) as route_span:
+                route_span.trace.name = trace_name
+                response = await timed_handler(request)
+                timings = request.scope[TIMINGS_SCOPE_KEY]
+                if timings.endpoint_finished is not None:
+                    record("validate", timings.started, timings.endpoint_started)
+                    record(
+                        "encode", timings.endpoint_finished, timings.finished,
+                        bytes=len(getattr(response, "body", b""))
+                    )
+                return response
+
+        return traced_handler
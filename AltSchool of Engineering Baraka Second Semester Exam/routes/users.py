@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from schemas.user import User, UserCreate, UserUpdate
-from services.user_service import UserService
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional, Tuple
+from routes.dependencies import FieldSelector
+from routes.encoding import EncodedResponse, EncodedRoute
+from schemas.common import BatchGetRequest, project
+from schemas.user import User, UserBatch, UserBulkDeactivate, UserBulkDeactivateResult, UserCreate, UserUpdate
+from services import user_service
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=EncodedRoute, default_response_class=EncodedResponse)
 
-# Initialize user service
-user_service = UserService()
+select_user_fields = FieldSelector(User)
 
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -16,13 +18,47 @@ def create_user(user_data: UserCreate):
 
 
 @router.get("/", response_model=List[User])
-def get_all_users():
+def get_all_users(fields: Optional[Tuple[str, ...]] = Depends(select_user_fields)):
     """Get all users"""
-    return user_service.get_all_users()
+    users = user_service.get_all_users()
+    if fields:
+        return EncodedResponse([project(user, fields) for user in users])
+    return users
+
+
+@router.post("/batch-get", response_model=UserBatch)
+def batch_get_users(request: BatchGetRequest):
+    """Get many users by ID in one call, reporting IDs that were not found"""
+    found, missing = user_service.get_users(request.ids)
+    return UserBatch(found=found, missing=missing)
+
+
+@router.post("/bulk-deactivate", response_model=UserBulkDeactivateResult)
+def bulk_deactivate_users(request: UserBulkDeactivate):
+    """Deactivate many users at once and summarize what changed"""
+    deactivated, already_inactive, missing = user_service.deactivate_users(request.ids)
+    return UserBulkDeactivateResult(
+        deactivated=deactivated,
+        already_inactive=already_inactive,
+        missing=missing
+    )
+
+
+@router.get("/search", response_model=List[User])
+def search_users(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[Tuple[str, ...]] = Depends(select_user_fields)
+):
+    """Typeahead lookup of users whose name, any name word, or email starts with prefix"""
+    users = user_service.search_users(prefix, limit)
+    if fields:
+        return EncodedResponse([project(user, fields) for user in users])
+    return users
 
 
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: int):
+def get_user(user_id: int, fields: Optional[Tuple[str, ...]] = Depends(select_user_fields)):
     """Get a specific user by ID"""
     user = user_service.get_user(user_id)
     if not user:
@@ -30,6 +66,8 @@ def get_user(user_id: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    if fields:
+        return EncodedResponse(project(user, fields))
     return user
 
 
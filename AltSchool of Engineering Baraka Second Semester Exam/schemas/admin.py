@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import datetime
+
+
+class SnapshotInfo(BaseModel):
+    path: Optional[str]
+    rows: Dict[str, int] = {}
+    last_saved_at: Optional[datetime] = None
+    last_loaded_at: Optional[datetime] = None
+    last_load_seconds: Optional[float] = None
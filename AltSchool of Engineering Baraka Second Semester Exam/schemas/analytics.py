@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+from enum import Enum
+
+
+class UserStatus(str, Enum):
+    active = "active"
+    inactive = "inactive"
+    deleted = "deleted"
+
+
+class CompletionRate(BaseModel):
+    enrollments: int
+    completed: int
+    completion_rate: Optional[float] = None
+
+
+class WeekCompletion(CompletionRate):
+    week_start: date
+
+
+class CourseCompletion(CompletionRate):
+    course_id: int
+    title: Optional[str] = None
+    is_open: Optional[bool] = None
+
+
+class UserStatusCompletion(CompletionRate):
+    status: UserStatus
+
+
+class CompletionByWeek(CompletionRate):
+    weeks: List[WeekCompletion]
+
+
+class CompletionByCourse(CompletionRate):
+    courses: List[CourseCompletion]
+
+
+class CompletionByUserStatus(CompletionRate):
+    statuses: List[UserStatusCompletion]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -29,3 +29,16 @@ class Course(CourseBase):
 
 class CourseEnrollmentStatus(BaseModel):
     is_open: bool
+
+
+class CourseSearchResults(BaseModel):
+    query: str
+    total: int
+    skip: int
+    limit: int
+    results: List[Course]
+
+
+class CourseBatch(BaseModel):
+    found: List[Course]
+    missing: List[int]
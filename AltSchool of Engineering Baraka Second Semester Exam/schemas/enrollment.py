@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime, date
 
 
@@ -29,3 +29,25 @@ class Enrollment(EnrollmentBase):
 class EnrollmentWithDetails(Enrollment):
     user_name: str
     course_title: str
+
+
+class EnrollmentBatch(BaseModel):
+    found: List[EnrollmentWithDetails]
+    missing: List[int]
+
+
+class EnrollmentBulkComplete(BaseModel):
+    course_id: Optional[int] = None
+    enrollment_ids: Optional[List[int]] = Field(None, max_length=10000)
+
+    @model_validator(mode="after")
+    def check_target(self) -> "EnrollmentBulkComplete":
+        if (self.course_id is None) == (self.enrollment_ids is None):
+            raise ValueError("Provide exactly one of course_id or enrollment_ids")
+        return self
+
+
+class EnrollmentBulkCompleteResult(BaseModel):
+    completed: List[int]
+    already_completed: List[int]
+    missing: List[int]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+
+
+class StoreStats(BaseModel):
+    rows: int
+    approx_bytes: int
+    snapshot_cache: CacheStats
+
+
+class ReadinessReport(BaseModel):
+    status: str
+    stores: Dict[str, StoreStats]
+    index_bytes: Dict[str, int]
+    approx_total_bytes: int
+    snapshot_age_seconds: Optional[float] = None
+    startup_seconds: Dict[str, float] = {}
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+from enum import Enum
+
+
+class ReportKind(str, Enum):
+    course_completion = "course-completion"
+    user_activity = "user-activity"
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ReportJob(BaseModel):
+    id: str
+    kind: ReportKind
+    status: JobStatus
+    data_version: int
+    stale: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    seconds: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
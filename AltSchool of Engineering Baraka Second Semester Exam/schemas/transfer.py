@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List
+from enum import Enum
+
+
+class DataKind(str, Enum):
+    users = "users"
+    courses = "courses"
+    enrollments = "enrollments"
+
+
+class RowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ImportSummary(BaseModel):
+    kind: DataKind
+    rows: int
+    imported: int
+    failed: int
+    errors: List[RowError]
+    errors_truncated: bool = False
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -29,3 +29,18 @@ class User(UserBase):
 
 class UserDeactivate(BaseModel):
     is_active: bool = False
+
+
+class UserBatch(BaseModel):
+    found: List[User]
+    missing: List[int]
+
+
+class UserBulkDeactivate(BaseModel):
+    ids: List[int] = Field(..., max_length=10000)
+
+
+class UserBulkDeactivateResult(BaseModel):
+    deactivated: List[int]
+    already_inactive: List[int]
+    missing: List[int]
@@ -1,8 +1,55 @@
+import os
 from services.user_service import UserService
 from services.course_service import CourseService
 from services.enrollment_service import EnrollmentService
+from services.csv_service import CsvService
+from services.snapshot_service import SnapshotService
+from services.report_service import DEFAULT_WORKERS, ReportService
+from services.analytics import AnalyticsService
+from services.tracing import DEFAULT_SAMPLE_RATE, Tracer
+from services.profiling import Profiler
+from services.slow_log import DEFAULT_THRESHOLD_MS, SlowRequestLog
+from services.idempotency import DEFAULT_TTL, MAX_KEYS, IdempotencyCache
+from services.rate_limit import DEFAULT_CLIENT_CONCURRENCY, DEFAULT_LIST_CONCURRENCY, AdmissionController, RateLimit, parse_route_limits
 
 # Initialize services
 user_service = UserService()
 course_service = CourseService()
 enrollment_service = EnrollmentService(user_service, course_service)
+csv_service = CsvService(user_service, course_service, enrollment_service)
+snapshot_service = SnapshotService(
+    user_service, course_service, enrollment_service,
+    path=os.environ.get("EDUTRACK_SNAPSHOT_PATH")
+)
+analytics_service = AnalyticsService(user_service, course_service, enrollment_service)
+report_service = ReportService(
+    analytics_service,
+    workers=int(os.environ.get("EDUTRACK_REPORT_WORKERS", DEFAULT_WORKERS))
+)
+
+# Diagnostics
+tracer = Tracer(
+    sample_rate=float(os.environ.get("EDUTRACK_TRACE_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)),
+    path=os.environ.get("EDUTRACK_TRACE_FILE")
+)
+profiler = Profiler(token=os.environ.get("EDUTRACK_ADMIN_TOKEN"))
+slow_request_log = SlowRequestLog(
+    threshold_ms=float(os.environ.get("EDUTRACK_SLOW_REQUEST_MS", DEFAULT_THRESHOLD_MS)),
+    path=os.environ.get("EDUTRACK_SLOW_LOG")
+)
+
+# Admission control; a concurrency of 0 disables that cap
+list_concurrency = int(os.environ.get("EDUTRACK_LIST_CONCURRENCY", DEFAULT_LIST_CONCURRENCY))
+client_concurrency = int(os.environ.get("EDUTRACK_CLIENT_CONCURRENCY", DEFAULT_CLIENT_CONCURRENCY))
+admission = AdmissionController(
+    client_limit=RateLimit.parse(os.environ["EDUTRACK_RATE_LIMIT"]) if os.environ.get("EDUTRACK_RATE_LIMIT") else None,
+    route_limits=parse_route_limits(os.environ.get("EDUTRACK_ROUTE_RATE_LIMITS", "")),
+    concurrency=list_concurrency or None,
+    client_concurrency=client_concurrency or None
+)
+
+# Stored responses for create requests retried with an Idempotency-Key
+idempotency_cache = IdempotencyCache(
+    ttl=float(os.environ.get("EDUTRACK_IDEMPOTENCY_TTL", DEFAULT_TTL)),
+    max_keys=int(os.environ.get("EDUTRACK_IDEMPOTENCY_KEYS", MAX_KEYS))
+)
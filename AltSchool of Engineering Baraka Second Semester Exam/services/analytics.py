@@ -0,0 +1,270 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from datetime import date
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from schemas.analytics import UserStatus
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.tracing import traced
+from services.user_service import UserService
+from services.versioned_store import VersionedStore
+
+# Imported on first use by _load_numpy(): it takes longer to import than all
+# the services together, and most workers never serve analytics.
+# Optional: without it the analytics endpoints answer 501.
+np = None
+
+# Column name -> (row getter, NumPy dtype)
+Columns = Dict[str, Tuple[Callable[[Any], Any], str]]
+
+USER_COLUMNS: Columns = {
+    "id": (attrgetter("id"), "i8"),
+    "is_active": (attrgetter("is_active"), "?"),
+}
+COURSE_COLUMNS: Columns = {
+    "id": (attrgetter("id"), "i8"),
+    "title": (attrgetter("title"), "O"),
+    "is_open": (attrgetter("is_open"), "?"),
+}
+ENROLLMENT_COLUMNS: Columns = {
+    "user_id": (attrgetter("user_id"), "i8"),
+    "course_id": (attrgetter("course_id"), "i8"),
+    "completed": (attrgetter("completed"), "?"),
+    # Proleptic ordinal; day 1 (0001-01-01) is a Monday, so weeks are (day - 1) // 7
+    "enrolled_day": (lambda enrollment: enrollment.enrolled_date.toordinal(), "i4"),
+}
+
+# Codes of the user status lookup table, in UserStatus order
+STATUSES = list(UserStatus)
+ACTIVE, INACTIVE, DELETED = range(len(STATUSES))
+
+
+class ColumnCache:
+    """Columns of one or more VersionedStores, kept as NumPy arrays.
+
+    Chunks of a store snapshot are never changed once shared: a write copies
+    the chunk first. So a chunk that is the same dict as at the last refresh
+    still has the same rows, and only chunks written since then are
+    converted again. The arrays of all chunks are joined once per change of
+    the store versions and reused until the next write.
+
+    One build runs at a time, without holding the lock. Callers that find
+    one running wait for it and use its arrays if they are at least as new
+    as the stores were when they called; refresh() waits on the event loop
+    instead of in a threadpool thread.
+    """
+
+    def __init__(self, columns: Columns):
+        self.columns = columns
+        self._versions: Optional[Tuple[int, ...]] = None
+        self._chunks: Dict[Tuple[int, int], Tuple[Dict[int, Any], List["np.ndarray"]]] = {}
+        self._arrays: Dict[str, "np.ndarray"] = {}
+        self._building: Optional[Future] = None
+        self._lock = threading.Lock()
+        self.chunk_hits = 0
+        self.chunk_misses = 0
+
+    def _fresh(self, versions: Tuple[int, ...]) -> bool:
+        # Store versions only grow, so newer arrays serve older requests too
+        return self._versions is not None and all(built >= wanted for built, wanted in zip(self._versions, versions))
+
+    def _convert(self, rows: List[Any]) -> List["np.ndarray"]:
+        return [np.fromiter(map(getter, rows), dtype, len(rows)) for getter, dtype in self.columns.values()]
+
+    def arrays(self, stores: Sequence[VersionedStore]) -> Dict[str, "np.ndarray"]:
+        return self.versioned(stores)[1]
+
+    def versioned(self, stores: Sequence[VersionedStore]) -> Tuple[Tuple[int, ...], Dict[str, "np.ndarray"]]:
+        """The arrays, with the versions of the store snapshots they were built from"""
+        versions = tuple(store.version for store in stores)
+        while True:
+            with self._lock:
+                if self._fresh(versions):
+                    return self._versions, self._arrays
+                building = self._building
+                if building is None:
+                    building = self._building = Future()
+                    break
+            # Another thread is building: wait for it, then check again
+            building.exception()
+        try:
+            built = self._build(stores)
+        except BaseException as exc:
+            with self._lock:
+                self._building = None
+            building.set_exception(exc)
+            raise
+        with self._lock:
+            self._building = None
+        building.set_result(built)
+        return built
+
+    async def refresh(self, stores: Sequence[VersionedStore]):
+        """Bring the arrays up to date, waiting for a running build without a thread"""
+        versions = tuple(store.version for store in stores)
+        while True:
+            with self._lock:
+                if self._fresh(versions):
+                    return
+                building = self._building
+            if building is None:
+                await run_in_threadpool(self.arrays, stores)
+                return
+            await asyncio.wait([asyncio.wrap_future(building)])
+
+    def _build(self, stores: Sequence[VersionedStore]) -> Tuple[Tuple[int, ...], Dict[str, "np.ndarray"]]:
+        # Only the thread holding self._building gets here, so no lock is needed
+        snapshots = [store.snapshot() for store in stores]
+        chunks = {}
+        for store_no, snapshot in enumerate(snapshots):
+            for chunk_no in sorted(snapshot.chunks):
+                chunk = snapshot.chunks[chunk_no]
+                cached = self._chunks.get((store_no, chunk_no))
+                if cached is None or cached[0] is not chunk:
+                    cached = (chunk, self._convert(list(chunk.values())))
+                    self.chunk_misses += 1
+                else:
+                    self.chunk_hits += 1
+                chunks[(store_no, chunk_no)] = cached
+        arrays = {
+            name: np.concatenate([converted[i] for _, converted in chunks.values()] or [np.empty(0, dtype)])
+            for i, (name, (_, dtype)) in enumerate(self.columns.items())
+        }
+        versions = tuple(snapshot.version for snapshot in snapshots)
+        with self._lock:
+            self._chunks = chunks
+            self._arrays = arrays
+            self._versions = versions
+        return versions, arrays
+
+
+def _load_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def _rate(completed: int, enrollments: int) -> Optional[float]:
+    return round(completed / enrollments, 4) if enrollments else None
+
+
+def _group(keys: "np.ndarray", completed: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Group keys, enrollments and completions per distinct key, in key order.
+
+    Keys are small dense integers (ids, week numbers, status codes), so
+    counting them with bincount beats sorting them.
+    """
+    if not len(keys):
+        empty = np.empty(0, "i8")
+        return empty, empty, empty
+    offset = keys.min()
+    shifted = keys - offset
+    counts = np.bincount(shifted)
+    done = np.bincount(shifted[completed], minlength=len(counts))
+    present = np.flatnonzero(counts)
+    return present + offset, counts[present], done[present]
+
+
+def _rows(keys: "np.ndarray", counts: "np.ndarray", done: "np.ndarray") -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "enrollments": count, "completed": finished, "completion_rate": _rate(finished, count)}
+        for key, count, finished in zip(keys.tolist(), counts.tolist(), done.tolist())
+    ]
+
+
+class AnalyticsService:
+    """Completion analytics computed with vectorized group-bys over store columns.
+
+    The stores are copied into NumPy arrays by ColumnCache, incrementally,
+    so after the first request only rows written since the last one are
+    converted. Grouping millions of enrollments then takes a few bincount
+    calls instead of a Python loop over row objects. ReportService reads
+    the same caches for its report jobs.
+    """
+
+    def __init__(self, user_service: UserService, course_service: CourseService, enrollment_service: EnrollmentService):
+        self.user_service = user_service
+        self.course_service = course_service
+        self.enrollment_service = enrollment_service
+        self.users = ColumnCache(USER_COLUMNS)
+        self.courses = ColumnCache(COURSE_COLUMNS)
+        self.enrollments = ColumnCache(ENROLLMENT_COLUMNS)
+        self._available: Optional[bool] = None
+
+    @property
+    def available(self) -> bool:
+        """Whether NumPy can be imported; checked on first use only"""
+        if self._available is None:
+            self._available = _load_numpy()
+        return self._available
+
+    def user_columns(self) -> Dict[str, "np.ndarray"]:
+        return self.users.arrays([self.user_service.users])
+
+    def course_columns(self) -> Dict[str, "np.ndarray"]:
+        return self.courses.arrays([self.course_service.courses])
+
+    def _enrollment_stores(self) -> List[VersionedStore]:
+        return [shard.enrollments for shard in self.enrollment_service.shards]
+
+    def enrollment_columns(self) -> Dict[str, "np.ndarray"]:
+        return self.enrollments.arrays(self._enrollment_stores())
+
+    async def refresh(self, users: bool = False):
+        """Update the enrollment (and user) columns before a group-by runs in a thread.
+
+        Requests arriving during a slow first build wait for it on the event
+        loop rather than each holding a threadpool thread.
+        """
+        await self.enrollments.refresh(self._enrollment_stores())
+        if users:
+            await self.users.refresh([self.user_service.users])
+
+    def _totals(self, completed: "np.ndarray", **groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+        total, total_done = len(completed), int(np.count_nonzero(completed))
+        return {"enrollments": total, "completed": total_done, "completion_rate": _rate(total_done, total), **groups}
+
+    @traced
+    def completion_by_week(self) -> Dict[str, Any]:
+        """Completion rate of enrollments grouped by the week (from Monday) they were made in"""
+        columns = self.enrollment_columns()
+        weeks = _rows(*_group((columns["enrolled_day"] - 1) // 7, columns["completed"]))
+        for row in weeks:
+            row["week_start"] = date.fromordinal(row.pop("key") * 7 + 1)
+        return self._totals(columns["completed"], weeks=weeks)
+
+    @traced
+    def completion_by_course(self) -> Dict[str, Any]:
+        """Completion rate per course; title and is_open are None for deleted courses"""
+        columns = self.enrollment_columns()
+        courses = _rows(*_group(columns["course_id"], columns["completed"]))
+        store = self.course_service.courses
+        for row in courses:
+            course = store.get(row["key"])
+            row["course_id"] = row.pop("key")
+            row["title"] = course.title if course is not None else None
+            row["is_open"] = course.is_open if course is not None else None
+        return self._totals(columns["completed"], courses=courses)
+
+    @traced
+    def completion_by_user_status(self) -> Dict[str, Any]:
+        """Completion rate for enrollments of active, inactive and deleted users"""
+        columns = self.enrollment_columns()
+        users = self.user_columns()
+        user_ids = columns["user_id"]
+        # Ids are allocated sequentially, so a table indexed by id stays small
+        size = int(max(users["id"].max(initial=0), user_ids.max(initial=0))) + 1
+        status = np.full(size, DELETED, "i1")
+        status[users["id"]] = np.where(users["is_active"], ACTIVE, INACTIVE)
+        statuses = _rows(*_group(status[user_ids], columns["completed"]))
+        for row in statuses:
+            row["status"] = STATUSES[row.pop("key")]
+        return self._totals(columns["completed"], statuses=statuses)
@@ -1,52 +1,144 @@
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Iterable, Tuple
 from datetime import datetime
-from schemas.user import User, UserCreate, UserUpdate
+from schemas.course import Course, CourseCreate, CourseUpdate
+from services.journal import Journaled, journaled
+from services.search_index import InvertedIndex
+from services.tracing import traced
+from services.versioned_store import VersionedStore
 
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+class CourseService(Journaled):
+    store_name = "courses"
 
-class UserService:
     def __init__(self):
-        self.users: Dict[int, User] = {}
+        self.courses: VersionedStore[Course] = VersionedStore()
         self.next_id = 1
+        self.search_index = InvertedIndex()
+
+    def _index(self, course: Course):
+        self.search_index.replace(
+            course.id,
+            [(course.title, TITLE_WEIGHT), (course.description, DESCRIPTION_WEIGHT)]
+        )
 
-    def create_user(self, user_data: UserCreate) -> User:
-        user = User(
+    @traced
+    @journaled
+    def create_course(self, course_data: CourseCreate) -> Course:
+        course = Course(
             id=self.next_id,
-            name=user_data.name,
-            email=user_data.email,
-            is_active=True,
+            title=course_data.title,
+            description=course_data.description,
+            is_open=True,
             created_at=datetime.now()
         )
-        self.users[self.next_id] = user
+        self.courses[self.next_id] = course
+        self._index(course)
         self.next_id += 1
-        return user
+        self._journal_put(course)
+        return course
+
+    @traced
+    @journaled
+    def create_courses(self, courses_data: List[CourseCreate]) -> List[Course]:
+        """Bulk insert already-validated courses without re-validating each model"""
+        created_at = datetime.now()
+        courses = []
+        for course_data in courses_data:
+            course = Course.model_construct(
+                id=self.next_id,
+                title=course_data.title,
+                description=course_data.description,
+                is_open=True,
+                created_at=created_at
+            )
+            self.courses[self.next_id] = course
+            self._index(course)
+            self.next_id += 1
+            self._journal_put(course)
+            courses.append(course)
+        return courses
+
+    def restore(self, courses: List[Course], next_id: int):
+        """Replace the store with trusted courses and rebuild the search index"""
+        self.courses = VersionedStore((course.id, course) for course in courses)
+        self.next_id = next_id
+        self.search_index = InvertedIndex()
+        for course in courses:
+            self._index(course)
 
-    def get_user(self, user_id: int) -> Optional[User]:
-        return self.users.get(user_id)
+    def get_course(self, course_id: int) -> Optional[Course]:
+        return self.courses.get(course_id)
 
-    def get_all_users(self) -> List[User]:
-        return list(self.users.values())
+    @traced
+    def get_courses(self, course_ids: Iterable[int]) -> Tuple[List[Course], List[int]]:
+        found, missing = [], []
+        for course_id in dict.fromkeys(course_ids):
+            course = self.courses.get(course_id)
+            if course:
+                found.append(course)
+            else:
+                missing.append(course_id)
+        return found, missing
 
-    def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
-        if user_id not in self.users:
+    @traced
+    def get_all_courses(self) -> List[Course]:
+        return self.courses.values()
+
+    @traced
+    def search_courses(self, query: str, skip: int = 0, limit: int = 20) -> Tuple[int, List[Course]]:
+        total, course_ids = self.search_index.search(query, skip, limit)
+        courses = (self.courses.get(course_id) for course_id in course_ids)
+        return total, [course for course in courses if course is not None]
+
+    @traced
+    @journaled
+    def update_course(self, course_id: int, course_data: CourseUpdate) -> Optional[Course]:
+        if course_id not in self.courses:
             return None
         
-        user = self.users[user_id]
-        update_data = user_data.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        update_data = course_data.dict(exclude_unset=True)
+        # Swap in an updated copy so readers never see a half-applied update
+        course = self.courses[course_id].model_copy(update=update_data)
+        self.courses[course_id] = course
         
-        return user
+        if "title" in update_data or "description" in update_data:
+            self._index(course)
+        self._journal_put(course)
+        return course
 
-    def delete_user(self, user_id: int) -> bool:
-        if user_id in self.users:
-            del self.users[user_id]
+    @traced
+    @journaled
+    def delete_course(self, course_id: int) -> bool:
+        if course_id in self.courses:
+            del self.courses[course_id]
+            self.search_index.remove(course_id)
+            self._journal_delete(course_id)
             return True
         return False
 
-    def deactivate_user(self, user_id: int) -> Optional[User]:
-        if user_id not in self.users:
+    @traced
+    @journaled
+    def close_enrollment(self, course_id: int) -> Optional[Course]:
+        if course_id not in self.courses:
             return None
         
-        self.users[user_id].is_active = False
-        return self.users[user_id]
+        course = self.courses[course_id].model_copy(update={"is_open": False})
+        self.courses[course_id] = course
+        self._journal_put(course)
+        return course
+
+    def apply_put(self, data: Dict[str, Any]):
+        course = Course.model_validate(data)
+        self.courses[course.id] = course
+        self._index(course)
+        self.next_id = max(self.next_id, course.id + 1)
+
+    def apply_delete(self, course_id: int):
+        self.courses.pop(course_id, None)
+        self.search_index.remove(course_id)
+
+    def journal_rows(self) -> List[Course]:
+        return self.courses.values()
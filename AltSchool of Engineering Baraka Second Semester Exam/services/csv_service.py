@@ -0,0 +1,189 @@
+import csv
+import io
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from schemas.course import CourseCreate
+from schemas.enrollment import EnrollmentCreate
+from schemas.transfer import DataKind, ImportSummary, RowError
+from schemas.user import UserCreate
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.user_service import UserService
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# Longest record, in characters, held while waiting for its end
+MAX_RECORD_CHARS = 1024 * 1024
+
+CREATE_SCHEMAS: Dict[DataKind, Type[BaseModel]] = {
+    DataKind.users: UserCreate,
+    DataKind.courses: CourseCreate,
+    DataKind.enrollments: EnrollmentCreate,
+}
+
+EXPORT_COLUMNS: Dict[DataKind, Tuple[str, ...]] = {
+    DataKind.users: ("id", "name", "email", "is_active", "created_at"),
+    DataKind.courses: ("id", "title", "description", "is_open", "created_at"),
+    DataKind.enrollments: ("id", "user_id", "course_id", "enrolled_date", "completed", "created_at"),
+}
+
+
+def format_validation_error(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+
+class RecordTooLarge(ValueError):
+    pass
+
+
+class CsvImport:
+    """Incremental CSV importer for one data kind.
+
+    Text is fed in arbitrary chunks. Complete records are validated with the
+    kind's create schema and inserted through the service bulk path every
+    CHUNK_SIZE rows, so memory stays bounded by the chunk size no matter how
+    large the upload is. Only the first MAX_REPORTED_ERRORS row errors are kept.
+    A record longer than MAX_RECORD_CHARS, for example a body without any
+    newline, stops the import with RecordTooLarge instead of being buffered.
+    """
+
+    def __init__(self, kind: DataKind, csv_service: "CsvService"):
+        self.kind = kind
+        self.schema = CREATE_SCHEMAS[kind]
+        self.csv_service = csv_service
+        self.header: Optional[List[str]] = None
+        self.pending_text = ""
+        self.pending_record: List[str] = []
+        self.pending_chars = 0
+        self.records: List[str] = []
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[RowError] = []
+
+    def feed(self, text: str):
+        lines = (self.pending_text + text).split("\n")
+        self.pending_text = lines.pop()
+        for line in lines:
+            self._add_line(line + "\n")
+        self._check_length(len(self.pending_text))
+        if len(self.records) >= CHUNK_SIZE:
+            self._flush()
+
+    def finish(self) -> ImportSummary:
+        if self.pending_text:
+            self._add_line(self.pending_text)
+            self.pending_text = ""
+        if self.pending_record:
+            # Unterminated quoted field: hand it to the parser as-is
+            self.records.append("".join(self.pending_record))
+            self.pending_record = []
+            self.pending_chars = 0
+        self._flush()
+        return ImportSummary(
+            kind=self.kind,
+            rows=self.rows,
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors)
+        )
+
+    def _check_length(self, extra: int):
+        if self.pending_chars + extra > MAX_RECORD_CHARS:
+            raise RecordTooLarge(
+                f"CSV record longer than {MAX_RECORD_CHARS} characters; "
+                f"{self.imported} rows were imported before it"
+            )
+
+    def _add_line(self, line: str):
+        # A record is complete once its quotes balance; escaped quotes ("") keep the count even
+        self._check_length(len(line))
+        self.pending_record.append(line)
+        self.pending_chars += len(line)
+        record = "".join(self.pending_record) if len(self.pending_record) > 1 else line
+        if record.count('"') % 2 == 0:
+            self.pending_record = []
+            self.pending_chars = 0
+            if record.strip():
+                self.records.append(record)
+
+    def _error(self, row: int, errors: List[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(row=row, errors=errors))
+
+    def _flush(self):
+        records, self.records = self.records, []
+        if not records:
+            return
+
+        reader = csv.reader(records)
+        if self.header is None:
+            self.header = [column.strip() for column in next(reader, [])]
+
+        valid: List[Tuple[int, BaseModel]] = []
+        for values in reader:
+            self.rows += 1
+            # Row numbers count data rows, starting at 1 after the header
+            row = self.rows
+            if len(values) != len(self.header):
+                self._error(row, [f"expected {len(self.header)} columns, got {len(values)}"])
+                continue
+            try:
+                valid.append((row, self.schema(**dict(zip(self.header, values)))))
+            except ValidationError as exc:
+                self._error(row, format_validation_error(exc))
+
+        results = self.csv_service.insert(self.kind, [item for _, item in valid])
+        for (row, _), result in zip(valid, results):
+            if result is None:
+                self._error(row, ["Cannot enroll user. User may not exist, be inactive, course may not exist, be closed, or user may already be enrolled."])
+            else:
+                self.imported += 1
+
+
+class CsvService:
+    def __init__(self, user_service: UserService, course_service: CourseService, enrollment_service: EnrollmentService):
+        self.user_service = user_service
+        self.course_service = course_service
+        self.enrollment_service = enrollment_service
+
+    def start_import(self, kind: DataKind) -> CsvImport:
+        return CsvImport(kind, self)
+
+    def insert(self, kind: DataKind, items: List[BaseModel]) -> List[Optional[BaseModel]]:
+        if kind == DataKind.users:
+            return self.user_service.create_users(items)
+        if kind == DataKind.courses:
+            return self.course_service.create_courses(items)
+        return self.enrollment_service.create_enrollments(items)
+
+    def _rows(self, kind: DataKind) -> Iterator[BaseModel]:
+        # Snapshots never see later writes, so they are walked chunk by chunk
+        # without copying the row references up front
+        if kind == DataKind.users:
+            return iter(self.user_service.users.snapshot())
+        if kind == DataKind.courses:
+            return iter(self.course_service.courses.snapshot())
+        return self.enrollment_service.iter_enrollments()
+
+    def export(self, kind: DataKind) -> Iterator[str]:
+        """Yield the store as CSV text, CHUNK_SIZE rows at a time"""
+        columns = EXPORT_COLUMNS[kind]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        for count, item in enumerate(self._rows(kind), 1):
+            writer.writerow([
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (getattr(item, column) for column in columns)
+            ])
+            if count % CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
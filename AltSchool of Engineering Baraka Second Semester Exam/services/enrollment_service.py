@@ -1,120 +1,394 @@
-from typing import List, Optional, Dict
+import heapq
+import threading
+from typing import Any, Callable, List, Optional, Dict, Iterable, Iterator, Tuple, Union
 from datetime import datetime, date
+from schemas.common import project
 from schemas.enrollment import Enrollment, EnrollmentCreate, EnrollmentUpdate, EnrollmentWithDetails
+from services.journal import Journaled, journaled
+from services.memory import DICT_BYTES, DICT_ENTRY_BYTES, INT_BYTES, dict_bytes
+from services.tracing import span, traced
 from services.user_service import UserService
+from services.versioned_store import VersionedStore
 from services.course_service import CourseService
 
+DEFAULT_SHARD_COUNT = 16
 
-class EnrollmentService:
-    def __init__(self, user_service: UserService, course_service: CourseService):
-        self.enrollments: Dict[int, Enrollment] = {}
-        self.next_id = 1
+
+def _enrollment_id(enrollment: Enrollment) -> int:
+    return enrollment.id
+
+
+class EnrollmentShard:
+    """One partition of the enrollment store, holding every enrollment of its users.
+
+    Writes and index reads happen under its lock, so writers for users in
+    different shards never contend. Full listings read copy-on-write
+    snapshots of the store and take no lock at all.
+    """
+
+    def __init__(self, enrollments: Iterable[Enrollment] = ()):
+        self.lock = threading.Lock()
+        self.enrollments: VersionedStore[Enrollment] = VersionedStore(
+            (enrollment.id, enrollment) for enrollment in enrollments
+        )
+        # Secondary indexes: user/course id -> ordered set of enrollment ids
+        self.by_user: Dict[int, Dict[int, None]] = {}
+        self.by_course: Dict[int, Dict[int, None]] = {}
+
+    def is_enrolled(self, user_id: int, course_id: int) -> bool:
+        for enrollment_id in self.by_user.get(user_id, ()):
+            if self.enrollments[enrollment_id].course_id == course_id:
+                return True
+        return False
+
+    def add(self, enrollment: Enrollment):
+        self.enrollments[enrollment.id] = enrollment
+        self.by_user.setdefault(enrollment.user_id, {})[enrollment.id] = None
+        self.by_course.setdefault(enrollment.course_id, {})[enrollment.id] = None
+
+    def remove(self, enrollment_id: int) -> Optional[Enrollment]:
+        enrollment = self.enrollments.pop(enrollment_id, None)
+        if enrollment is not None:
+            self._unindex(self.by_user, enrollment.user_id, enrollment_id)
+            self._unindex(self.by_course, enrollment.course_id, enrollment_id)
+        return enrollment
+
+    @staticmethod
+    def _unindex(index: Dict[int, Dict[int, None]], key: int, enrollment_id: int):
+        enrollment_ids = index.get(key)
+        if enrollment_ids is not None:
+            enrollment_ids.pop(enrollment_id, None)
+            if not enrollment_ids:
+                del index[key]
+
+
+class EnrollmentService(Journaled):
+    store_name = "enrollments"
+
+    def __init__(self, user_service: UserService, course_service: CourseService, shard_count: int = DEFAULT_SHARD_COUNT):
+        # Enrollments are partitioned by user id; locations maps enrollment id -> shard
+        self.shards = [EnrollmentShard() for _ in range(shard_count)]
+        self.locations: Dict[int, EnrollmentShard] = {}
+        self._next_id = 1
+        self._id_lock = threading.Lock()
         self.user_service = user_service
         self.course_service = course_service
 
-    def create_enrollment(self, enrollment_data: EnrollmentCreate) -> Optional[Enrollment]:
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    @next_id.setter
+    def next_id(self, value: int):
+        with self._id_lock:
+            self._next_id = value
+
+    def _allocate_id(self) -> int:
+        with self._id_lock:
+            enrollment_id = self._next_id
+            self._next_id += 1
+            return enrollment_id
+
+    def _shard_for_user(self, user_id: int) -> EnrollmentShard:
+        return self.shards[hash(user_id) % len(self.shards)]
+
+    def count(self) -> int:
+        return len(self.locations)
+
+    def index_bytes(self) -> int:
+        """Estimated memory held by the by-user/by-course indexes and the id -> shard map"""
+        rows = self.count()
+        keys = sum(len(shard.by_user) + len(shard.by_course) for shard in self.shards)
+        # Every enrollment id appears once in a by_user set and once in a by_course set
+        return int(dict_bytes(keys, DICT_BYTES) + 2 * rows * (DICT_ENTRY_BYTES + INT_BYTES) + dict_bytes(rows))
+
+    def list_enrollments(self) -> List[Enrollment]:
+        """All enrollments in id order, merged from point-in-time snapshots of every shard"""
+        return list(self.iter_enrollments())
+
+    def iter_enrollments(self) -> Iterator[Enrollment]:
+        """Like list_enrollments, but merged lazily as the snapshots are iterated"""
+        snapshots = [shard.enrollments.snapshot() for shard in self.shards]
+        return heapq.merge(*snapshots, key=_enrollment_id)
+
+    def _merge(self, read: Callable[[EnrollmentShard], List[Enrollment]]) -> List[Enrollment]:
+        runs = []
+        for shard in self.shards:
+            with shard.lock:
+                runs.append(read(shard))
+        return list(heapq.merge(*runs, key=_enrollment_id))
+
+    def can_enroll(self, user_id: int, course_id: int) -> bool:
         # Check if user exists and is active
-        user = self.user_service.get_user(enrollment_data.user_id)
+        user = self.user_service.get_user(user_id)
         if not user or not user.is_active:
-            return None
-        
+            return False
+
         # Check if course exists and is open
-        course = self.course_service.get_course(enrollment_data.course_id)
+        course = self.course_service.get_course(course_id)
         if not course or not course.is_open:
-            return None
-        
+            return False
+
         # Check if user is already enrolled in this course
-        for enrollment in self.enrollments.values():
-            if (enrollment.user_id == enrollment_data.user_id and 
-                enrollment.course_id == enrollment_data.course_id):
+        shard = self._shard_for_user(user_id)
+        with shard.lock:
+            return not shard.is_enrolled(user_id, course_id)
+
+    def _insert(self, enrollment_data: EnrollmentCreate, build: Callable[..., Enrollment], **values: Any) -> Optional[Enrollment]:
+        if not self.can_enroll(enrollment_data.user_id, enrollment_data.course_id):
+            return None
+
+        shard = self._shard_for_user(enrollment_data.user_id)
+        with shard.lock:
+            # Re-check under the lock so concurrent requests cannot double-enroll
+            if shard.is_enrolled(enrollment_data.user_id, enrollment_data.course_id):
                 return None
-        
-        enrollment = Enrollment(
-            id=self.next_id,
-            user_id=enrollment_data.user_id,
-            course_id=enrollment_data.course_id,
+            enrollment = build(
+                id=self._allocate_id(),
+                user_id=enrollment_data.user_id,
+                course_id=enrollment_data.course_id,
+                completed=False,
+                **values
+            )
+            shard.add(enrollment)
+            self.locations[enrollment.id] = shard
+        self._journal_put(enrollment)
+        return enrollment
+
+    def restore(self, enrollments: List[Enrollment], next_id: int):
+        """Replace the store with trusted enrollments, rebuilding indexes in one pass"""
+        shard_count = len(self.shards)
+        partitions: List[List[Enrollment]] = [[] for _ in range(shard_count)]
+        for enrollment in enrollments:
+            partitions[hash(enrollment.user_id) % shard_count].append(enrollment)
+
+        shards = []
+        locations = {}
+        for partition in partitions:
+            shard = EnrollmentShard(partition)
+            by_user, by_course = shard.by_user, shard.by_course
+            for enrollment in partition:
+                enrollment_id = enrollment.id
+                user_ids = by_user.get(enrollment.user_id)
+                if user_ids is None:
+                    user_ids = by_user[enrollment.user_id] = {}
+                user_ids[enrollment_id] = None
+                course_ids = by_course.get(enrollment.course_id)
+                if course_ids is None:
+                    course_ids = by_course[enrollment.course_id] = {}
+                course_ids[enrollment_id] = None
+                locations[enrollment_id] = shard
+            shards.append(shard)
+        self.shards = shards
+        self.locations = locations
+        self.next_id = next_id
+
+    @traced
+    @journaled
+    def create_enrollment(self, enrollment_data: EnrollmentCreate) -> Optional[Enrollment]:
+        return self._insert(
+            enrollment_data,
+            Enrollment,
             enrolled_date=date.today(),
-            completed=False,
             created_at=datetime.now()
         )
-        self.enrollments[self.next_id] = enrollment
-        self.next_id += 1
-        return enrollment
+
+    @traced
+    @journaled
+    def create_enrollments(self, enrollments_data: List[EnrollmentCreate]) -> List[Optional[Enrollment]]:
+        """Bulk insert enrollments, applying the same rules as create_enrollment.
+
+        Returns one entry per input, None where the enrollment was rejected.
+        """
+        created_at = datetime.now()
+        enrolled_date = created_at.date()
+        return [
+            self._insert(
+                enrollment_data,
+                Enrollment.model_construct,
+                enrolled_date=enrolled_date,
+                created_at=created_at
+            )
+            for enrollment_data in enrollments_data
+        ]
 
     def get_enrollment(self, enrollment_id: int) -> Optional[Enrollment]:
-        return self.enrollments.get(enrollment_id)
+        shard = self.locations.get(enrollment_id)
+        return shard.enrollments.get(enrollment_id) if shard else None
 
-    def get_all_enrollments(self) -> List[EnrollmentWithDetails]:
+    def with_details(
+        self, enrollment: Enrollment, fields: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Union[EnrollmentWithDetails, Dict[str, Any]]]:
+        """Join an enrollment with its user name and course title.
+
+        When fields are given, a projected dict is returned instead of a model.
+        Returns None if the user or course no longer exists.
+        """
+        user = self.user_service.get_user(enrollment.user_id)
+        course = self.course_service.get_course(enrollment.course_id)
+
+        if not user or not course:
+            return None
+        if fields:
+            return project(enrollment, fields, user_name=user.name, course_title=course.title)
+        return EnrollmentWithDetails(
+            **enrollment.dict(),
+            user_name=user.name,
+            course_title=course.title
+        )
+
+    @traced
+    def get_enrollments(self, enrollment_ids: Iterable[int]) -> Tuple[List[EnrollmentWithDetails], List[int]]:
+        found, missing = [], []
+        for enrollment_id in dict.fromkeys(enrollment_ids):
+            enrollment = self.get_enrollment(enrollment_id)
+            enrollment_detail = self.with_details(enrollment) if enrollment else None
+            if enrollment_detail:
+                found.append(enrollment_detail)
+            else:
+                missing.append(enrollment_id)
+        return found, missing
+
+    def _details(self, enrollments: List[Enrollment], fields: Optional[Tuple[str, ...]]) -> List[EnrollmentWithDetails]:
         enrollments_with_details = []
-        for enrollment in self.enrollments.values():
-            user = self.user_service.get_user(enrollment.user_id)
-            course = self.course_service.get_course(enrollment.course_id)
-            
-            if user and course:
-                enrollment_detail = EnrollmentWithDetails(
-                    **enrollment.dict(),
-                    user_name=user.name,
-                    course_title=course.title
-                )
-                enrollments_with_details.append(enrollment_detail)
-        
+        with span("details", rows=len(enrollments)):
+            for enrollment in enrollments:
+                enrollment_detail = self.with_details(enrollment, fields)
+                if enrollment_detail:
+                    enrollments_with_details.append(enrollment_detail)
         return enrollments_with_details
 
-    def get_user_enrollments(self, user_id: int) -> List[EnrollmentWithDetails]:
-        user_enrollments = []
-        for enrollment in self.enrollments.values():
-            if enrollment.user_id == user_id:
-                user = self.user_service.get_user(enrollment.user_id)
-                course = self.course_service.get_course(enrollment.course_id)
-                
-                if user and course:
-                    enrollment_detail = EnrollmentWithDetails(
-                        **enrollment.dict(),
-                        user_name=user.name,
-                        course_title=course.title
-                    )
-                    user_enrollments.append(enrollment_detail)
-        
-        return user_enrollments
-
-    def get_course_enrollments(self, course_id: int) -> List[EnrollmentWithDetails]:
-        course_enrollments = []
-        for enrollment in self.enrollments.values():
-            if enrollment.course_id == course_id:
-                user = self.user_service.get_user(enrollment.user_id)
-                course = self.course_service.get_course(enrollment.course_id)
-                
-                if user and course:
-                    enrollment_detail = EnrollmentWithDetails(
-                        **enrollment.dict(),
-                        user_name=user.name,
-                        course_title=course.title
-                    )
-                    course_enrollments.append(enrollment_detail)
-        
-        return course_enrollments
+    @traced
+    def get_all_enrollments(self, fields: Optional[Tuple[str, ...]] = None) -> List[EnrollmentWithDetails]:
+        with span("scan"):
+            enrollments = self.list_enrollments()
+        return self._details(enrollments, fields)
+
+    @traced
+    def get_user_enrollments(self, user_id: int, fields: Optional[Tuple[str, ...]] = None) -> List[EnrollmentWithDetails]:
+        shard = self._shard_for_user(user_id)
+        with span("scan"), shard.lock:
+            enrollments = [shard.enrollments[enrollment_id] for enrollment_id in shard.by_user.get(user_id, ())]
+        return self._details(enrollments, fields)
+
+    @traced
+    def get_course_enrollments(self, course_id: int, fields: Optional[Tuple[str, ...]] = None) -> List[EnrollmentWithDetails]:
+        with span("scan"):
+            enrollments = self._merge(lambda shard: [
+                shard.enrollments[enrollment_id] for enrollment_id in shard.by_course.get(course_id, ())
+            ])
+        return self._details(enrollments, fields)
 
+    @traced
+    @journaled
     def update_enrollment(self, enrollment_id: int, enrollment_data: EnrollmentUpdate) -> Optional[Enrollment]:
-        if enrollment_id not in self.enrollments:
+        shard = self.locations.get(enrollment_id)
+        if shard is None:
             return None
-        
-        enrollment = self.enrollments[enrollment_id]
+
         update_data = enrollment_data.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(enrollment, field, value)
-        
+        with shard.lock:
+            enrollment = shard.enrollments.get(enrollment_id)
+            if enrollment is None:
+                return None
+            # Swap in an updated copy so readers never see a half-applied update
+            enrollment = enrollment.model_copy(update=update_data)
+            shard.enrollments[enrollment_id] = enrollment
+
+        self._journal_put(enrollment)
         return enrollment
 
+    @traced
+    @journaled
     def mark_completion(self, enrollment_id: int) -> Optional[Enrollment]:
-        if enrollment_id not in self.enrollments:
+        shard = self.locations.get(enrollment_id)
+        if shard is None:
             return None
-        
-        self.enrollments[enrollment_id].completed = True
-        return self.enrollments[enrollment_id]
 
+        with shard.lock:
+            enrollment = shard.enrollments.get(enrollment_id)
+            if enrollment is None:
+                return None
+            enrollment = enrollment.model_copy(update={"completed": True})
+            shard.enrollments[enrollment_id] = enrollment
+        self._journal_put(enrollment)
+        return enrollment
+
+    @traced
+    @journaled
+    def mark_completion_many(self, enrollment_ids: Iterable[int]) -> Tuple[List[int], List[int], List[int]]:
+        """Mark many enrollments complete, taking each shard's lock once.
+
+        Returns (newly completed, already completed, missing) enrollment ids.
+        """
+        completed, already_completed, missing = [], [], []
+        by_shard: Dict[int, Tuple[EnrollmentShard, List[int]]] = {}
+        for enrollment_id in dict.fromkeys(enrollment_ids):
+            shard = self.locations.get(enrollment_id)
+            if shard is None:
+                missing.append(enrollment_id)
+            else:
+                by_shard.setdefault(id(shard), (shard, []))[1].append(enrollment_id)
+
+        changed = []
+        for shard, shard_ids in by_shard.values():
+            with shard.lock:
+                for enrollment_id in shard_ids:
+                    enrollment = shard.enrollments.get(enrollment_id)
+                    if enrollment is None:
+                        missing.append(enrollment_id)
+                    elif enrollment.completed:
+                        already_completed.append(enrollment_id)
+                    else:
+                        enrollment = enrollment.model_copy(update={"completed": True})
+                        shard.enrollments[enrollment_id] = enrollment
+                        changed.append(enrollment)
+                        completed.append(enrollment_id)
+
+        for enrollment in changed:
+            self._journal_put(enrollment)
+        return completed, already_completed, missing
+
+    @traced
+    @journaled
+    def complete_course(self, course_id: int) -> Tuple[List[int], List[int], List[int]]:
+        """Mark every enrollment in a course complete"""
+        enrollment_ids = []
+        for shard in self.shards:
+            with shard.lock:
+                enrollment_ids.extend(shard.by_course.get(course_id, ()))
+        return self.mark_completion_many(enrollment_ids)
+
+    def _remove(self, enrollment_id: int) -> bool:
+        shard = self.locations.pop(enrollment_id, None)
+        if shard is None:
+            return False
+        with shard.lock:
+            return shard.remove(enrollment_id) is not None
+
+    @traced
+    @journaled
     def delete_enrollment(self, enrollment_id: int) -> bool:
-        if enrollment_id in self.enrollments:
-            del self.enrollments[enrollment_id]
+        if self._remove(enrollment_id):
+            self._journal_delete(enrollment_id)
             return True
-        return False
\ No newline at end of file
+        return False
+
+    def apply_put(self, data: Dict[str, Any]):
+        enrollment = Enrollment.model_validate(data)
+        shard = self._shard_for_user(enrollment.user_id)
+        with shard.lock:
+            if enrollment.id in shard.enrollments:
+                # User and course never change, so the indexes are already right
+                shard.enrollments[enrollment.id] = enrollment
+            else:
+                shard.add(enrollment)
+            self.locations[enrollment.id] = shard
+        with self._id_lock:
+            self._next_id = max(self._next_id, enrollment.id + 1)
+
+    def apply_delete(self, enrollment_id: int):
+        self._remove(enrollment_id)
+
+    def journal_rows(self) -> List[Enrollment]:
+        return self.list_enrollments()
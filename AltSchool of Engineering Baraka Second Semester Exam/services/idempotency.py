@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from services.rate_limit import RoutePatterns
+
+DEFAULT_TTL = 24 * 60 * 60
+MAX_KEYS = 10000
+MAX_KEY_LENGTH = 255
+# Larger responses are passed through without being stored
+MAX_STORED_BODY = 1024 * 1024
+
+IDEMPOTENT_ROUTES = (
+    "POST /users/",
+    "POST /courses/",
+    "POST /enrollments/",
+)
+
+# (client, route, Idempotency-Key)
+CacheKey = Tuple[str, str, str]
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyEntry:
+    __slots__ = ("fingerprint", "expires", "response")
+
+    def __init__(self, fingerprint: bytes, expires: float):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        # None while the first request with the key is still running
+        self.response: Optional[StoredResponse] = None
+
+
+class IdempotencyCache:
+    """Responses to create requests sent with an Idempotency-Key header.
+
+    Entries are keyed by client, route and key, and live in an OrderedDict
+    kept in least recently used order, so lookup, insert and eviction are
+    O(1). At most max_keys entries are kept, evicting the least recently
+    used, and each expires ttl seconds after its first request. Expired
+    entries are dropped when looked up or when they reach the LRU end.
+
+    Used only from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_keys: int = MAX_KEYS, routes: Sequence[str] = IDEMPOTENT_ROUTES):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.routes = RoutePatterns(routes)
+        self.entries: "OrderedDict[CacheKey, IdempotencyEntry]" = OrderedDict()
+        self.replayed = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: CacheKey) -> Optional[IdempotencyEntry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def reserve(self, key: CacheKey, fingerprint: bytes) -> IdempotencyEntry:
+        """Record that a request with this key has started"""
+        now = time.monotonic()
+        entry = self.entries[key] = IdempotencyEntry(fingerprint, now + self.ttl)
+        self.entries.move_to_end(key)
+        while self.entries:
+            oldest_key, oldest = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_keys and oldest.expires > now:
+                break
+            del self.entries[oldest_key]
+        return entry
+
+    def complete(self, key: CacheKey, entry: IdempotencyEntry, response: StoredResponse):
+        # The entry may have been evicted while its request ran
+        if self.entries.get(key) is entry:
+            entry.response = response
+
+    def discard(self, key: CacheKey, entry: IdempotencyEntry):
+        """Forget a request that failed, so a retry runs it again"""
+        if self.entries.get(key) is entry:
+            del self.entries[key]
+
+    def reset(self):
+        self.entries.clear()
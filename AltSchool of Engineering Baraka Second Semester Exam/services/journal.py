@@ -0,0 +1,265 @@
+import fcntl
+import functools
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from pydantic import BaseModel
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Compact the log once it is this large and twice its size after the last compaction
+DEFAULT_COMPACT_BYTES = 64 * 1024 * 1024
+
+
+class Journaled(ABC):
+    """Base class for services whose changes can be shared through a SharedJournal.
+
+    Services call _journal_put/_journal_delete after every mutation, wrap
+    mutating methods in @journaled, implement apply_put/apply_delete to
+    replay changes made by other workers, and journal_rows to list every
+    live row when the log is compacted.
+    """
+
+    store_name: str = ""
+    journal: Optional["SharedJournal"] = None
+    next_id: int
+
+    def _journal_put(self, item: BaseModel):
+        if self.journal is not None:
+            self.journal.append(self.store_name, "put", item.model_dump(mode="json"))
+
+    def _journal_delete(self, item_id: int):
+        if self.journal is not None:
+            self.journal.append(self.store_name, "delete", item_id)
+
+    @abstractmethod
+    def apply_put(self, data: Dict[str, Any]):
+        """Insert or replace a row written by another worker"""
+
+    @abstractmethod
+    def apply_delete(self, item_id: int):
+        """Delete a row deleted by another worker"""
+
+    @abstractmethod
+    def journal_rows(self) -> Iterable[BaseModel]:
+        """Every live row, written as puts when the log is compacted"""
+
+
+def journaled(func: F) -> F:
+    """Run a mutating service method as one journal transaction.
+
+    The checks, the change and its log entries then happen together under
+    the log lock, so they see every other worker's writes.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: Journaled, *args, **kwargs):
+        journal = self.journal
+        if journal is None:
+            return func(self, *args, **kwargs)
+        with journal.transaction():
+            return func(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class SharedJournal:
+    """Append-only operation log shared by every worker process.
+
+    Each line records the full state of one changed row, or a deleted id.
+    A write runs as a transaction inside a single service call: it takes
+    an exclusive flock on the log, replays anything other workers appended,
+    applies its change locally, appends it and unlocks. Nothing is locked
+    while a request awaits. Readers take no lock: before serving a request
+    they replay whatever has been appended since they last looked, which
+    costs a stat and an fstat when nothing changed.
+
+    Once the log grows past compact_bytes (and twice its size after the
+    last compaction) the writer holding the lock rewrites it as a snapshot:
+    a header line, then one put per live row. The new file replaces the old
+    one by rename, and other workers notice the new inode, finish reading
+    the old file and continue after the snapshot in the new one.
+    """
+
+    def __init__(self, path: str, *services: Journaled, compact_bytes: int = DEFAULT_COMPACT_BYTES):
+        self.path = path
+        self.services: Dict[str, Journaled] = {service.store_name: service for service in services}
+        self.compact_bytes = compact_bytes
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self.offset = 0
+        self.compacted_size = 0
+        self.compactions = 0
+        self.pending: List[bytes] = []
+        self.write_lock = threading.RLock()
+        self.read_lock = threading.Lock()
+        self.depth = 0
+        for service in services:
+            service.journal = self
+
+    def close(self):
+        for service in self.services.values():
+            service.journal = None
+        os.close(self.fd)
+
+    def _rotated(self) -> bool:
+        """Whether another worker has replaced the log since we opened it"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self.fd).st_ino
+        except FileNotFoundError:
+            return False
+
+    def has_updates(self) -> bool:
+        with self.read_lock:
+            return os.fstat(self.fd).st_size > self.offset or self._rotated()
+
+    def catch_up(self) -> int:
+        """Apply entries appended by other workers and return how many were applied"""
+        with self.read_lock:
+            rotated = self._rotated()
+        if not rotated:
+            return self._apply_new()
+        # Moving to the new file needs the log lock, like a write
+        with self.write_lock:
+            if self.depth:
+                return self._apply_new()
+            applied = self._lock_file()
+            try:
+                return applied + self._apply_new()
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _apply_new(self) -> int:
+        with self.read_lock:
+            size = os.fstat(self.fd).st_size
+            if size <= self.offset:
+                return 0
+            data = os.pread(self.fd, size - self.offset, self.offset)
+            # Only consume complete lines; a partial tail is picked up next time
+            end = data.rfind(b"\n") + 1
+            self.offset += end
+            applied = 0
+            for line in data[:end].splitlines():
+                entry = json.loads(line)
+                if entry["op"] == "compacted":
+                    for store, next_id in entry["next_ids"].items():
+                        service = self.services[store]
+                        service.next_id = max(service.next_id, next_id)
+                    continue
+                service = self.services[entry["store"]]
+                if entry["op"] == "put":
+                    service.apply_put(entry["data"])
+                else:
+                    service.apply_delete(entry["data"])
+                applied += 1
+            return applied
+
+    def _lock_file(self) -> int:
+        """Take the flock on the current log file, following any compaction.
+
+        Returns how many entries were left to apply from replaced files.
+        """
+        applied = 0
+        while True:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            if not self._rotated():
+                return applied
+            # Nobody writes to a replaced file: read what is left, then move on
+            applied += self._apply_new()
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+            first = os.pread(fd, 4096, 0)
+            header = json.loads(first[:first.index(b"\n")])
+            with self.read_lock:
+                os.close(self.fd)
+                self.fd = fd
+                # Our rows already match the snapshot, so skip to the entries after it
+                self.offset = self.compacted_size = header["end"]
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Lock the log across threads and processes and catch up first.
+
+        Entries appended inside are written when the outermost transaction
+        ends, whether or not the body raised, since the local change has
+        already been made. Transactions nest within a thread.
+        """
+        with self.write_lock:
+            if self.depth == 0:
+                self._lock_file()
+            self.depth += 1
+            try:
+                if self.depth == 1:
+                    self._apply_new()
+                yield
+            finally:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        self._write_pending()
+                        if self.compact_bytes and self.offset >= max(self.compact_bytes, 2 * self.compacted_size):
+                            self._compact()
+                    finally:
+                        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def append(self, store: str, op: str, data: Any):
+        line = json.dumps({"store": store, "op": op, "data": data}, separators=(",", ":"))
+        # Outside a transaction (startup, scripts) this writes the entry on its own
+        with self.transaction():
+            self.pending.append(line.encode("utf-8") + b"\n")
+
+    def _write_pending(self):
+        if not self.pending:
+            return
+        payload = b"".join(self.pending)
+        self.pending = []
+        # We hold the flock and are caught up, so our own entries need no replay.
+        # Writing under read_lock keeps catch_up in other threads of this worker
+        # from reading them before offset moves past them.
+        with self.read_lock:
+            os.write(self.fd, payload)
+            self.offset = os.fstat(self.fd).st_size
+
+    def compact(self):
+        """Rewrite the log as a snapshot of the current rows"""
+        with self.transaction():
+            self._compact()
+
+    def _compact(self):
+        # Inside a transaction: caught up, and no other worker writes meanwhile
+        self._write_pending()
+        rows = b"".join(
+            json.dumps(
+                {"store": store, "op": "put", "data": row.model_dump(mode="json")}, separators=(",", ":")
+            ).encode("utf-8") + b"\n"
+            for store, service in self.services.items()
+            for row in service.journal_rows()
+        )
+        next_ids = {store: service.next_id for store, service in self.services.items()}
+        # The header records where the rows end, for workers switching over from the old file
+        end = len(rows)
+        while True:
+            header = json.dumps({"op": "compacted", "end": end, "next_ids": next_ids}).encode("utf-8") + b"\n"
+            if len(header) + len(rows) == end:
+                break
+            end = len(header) + len(rows)
+
+        temp_path = f"{self.path}.compact"
+        fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, header + rows)
+            os.fsync(fd)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.close(fd)
+            raise
+        # Writers waiting on the old file wake up, see it was replaced and move over
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        with self.read_lock:
+            os.close(self.fd)
+            self.fd = fd
+            self.offset = self.compacted_size = end
+        self.compactions += 1
@@ -0,0 +1,49 @@
+import struct
+import sys
+from typing import Any, Sequence
+
+SAMPLE_SIZE = 32
+
+
+def _per_entry(container: Any, entries: int) -> float:
+    return sys.getsizeof(container) / entries
+
+
+# Per-entry costs measured on this interpreter instead of hard-coded
+POINTER_BYTES = struct.calcsize("P")
+INT_BYTES = sys.getsizeof(10 ** 6)
+FLOAT_BYTES = sys.getsizeof(1.0)
+STR_BYTES = sys.getsizeof("")
+TUPLE_BYTES = sys.getsizeof(())
+DICT_BYTES = sys.getsizeof({0: None})
+DICT_ENTRY_BYTES = _per_entry(dict.fromkeys(range(1024)), 1024)
+
+
+def str_bytes(count: int, chars: int) -> int:
+    """Approximate size of `count` ASCII strings holding `chars` characters in total"""
+    return count * STR_BYTES + chars
+
+
+def dict_bytes(entries: int, value_bytes: float = 0.0) -> int:
+    """Approximate size of a dict with int keys, plus `value_bytes` per value"""
+    return int(DICT_BYTES + entries * (DICT_ENTRY_BYTES + INT_BYTES + value_bytes))
+
+
+def approx_size(value: Any) -> int:
+    """Shallow size of an object plus its attribute dict and attribute values"""
+    size = sys.getsizeof(value)
+    attributes = getattr(value, "__dict__", None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes) + sum(sys.getsizeof(item) for item in attributes.values())
+    fields_set = getattr(value, "__pydantic_fields_set__", None)
+    if fields_set is not None:
+        size += sys.getsizeof(fields_set)
+    return size
+
+
+def sampled_size(values: Sequence[Any]) -> int:
+    """Estimate the total approx_size of values from an evenly spaced sample"""
+    if not values:
+        return 0
+    sample = values[::max(1, len(values) // SAMPLE_SIZE)]
+    return int(sum(approx_size(value) for value in sample) * len(values) / len(sample))
@@ -0,0 +1,119 @@
+import contextvars
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_LINES = 60
+SORT_KEYS = ("cumulative", "tottime", "calls")
+MAX_SAMPLE_SECONDS = 60.0
+
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "edutrack_profile", default=None
+)
+
+
+class RequestProfile:
+    """cProfile data for one request, gathered from every thread it ran on"""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the calling thread for the duration of the block"""
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def render(self, sort: str = "cumulative", limit: int = PROFILE_LINES) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self.profiles[0], stream=out)
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def active_profile() -> Optional[RequestProfile]:
+    return _active_profile.get()
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = os.path.relpath(filename, APP_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+
+class Profiler:
+    """Opt-in profiling of live requests, guarded by the admin token.
+
+    Profiling stays off unless a token is configured. A request carrying the
+    token is profiled with cProfile on the event loop and on the worker
+    thread that runs its endpoint. sample() instead watches every thread for
+    a time window and counts collapsed stacks, ready for flame graph tools.
+    """
+
+    def __init__(self, token: Optional[str] = None):
+        self.token = token
+        self._busy = threading.Lock()
+
+    def authorized(self, token: Optional[str]) -> bool:
+        if not self.token or not token:
+            return False
+        return hmac.compare_digest(self.token.encode(), token.encode())
+
+    @contextmanager
+    def profile_request(self) -> Iterator[Optional[RequestProfile]]:
+        """Profile the current request; yields None if another profile is running"""
+        # cProfile hooks are per thread, so overlapping loop-thread profiles would clash
+        if not self._busy.acquire(blocking=False):
+            yield None
+            return
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        try:
+            with profile.thread():
+                yield profile
+        finally:
+            _active_profile.reset(token)
+            self._busy.release()
+
+    def sample(self, seconds: float, interval: float = 0.005) -> List[str]:
+        """Sample app stacks on all threads and return collapsed stack lines, busiest first"""
+        own_thread = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.monotonic() + min(seconds, MAX_SAMPLE_SECONDS)
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    # Idle threads only have interpreter and library frames on their stack
+                    in_app = in_app or (code.co_filename.startswith(APP_ROOT) and "site-packages" not in code.co_filename)
+                    stack.append(_frame_name(code))
+                    frame = frame.f_back
+                if in_app:
+                    counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return [f"{stack} {count}" for stack, count in counts.most_common()]
@@ -0,0 +1,169 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from starlette.routing import compile_path
+
+MAX_BUCKETS = 10000
+DEFAULT_LIST_CONCURRENCY = 4
+DEFAULT_CLIENT_CONCURRENCY = 2
+
+# Routes that walk a whole store; they share the concurrency cap
+EXPENSIVE_ROUTES = (
+    "GET /users/",
+    "GET /courses/",
+    "GET /enrollments/",
+    "GET /courses/{course_id}/enrollments",
+    "GET /data/export/{kind}",
+    "GET /analytics/completion/{grouping}",
+)
+
+
+class RateLimit(NamedTuple):
+    rate: float
+    burst: float
+
+    @classmethod
+    def parse(cls, text: str) -> "RateLimit":
+        """Parse "rate" or "rate/burst", in requests per second; burst defaults to rate"""
+        rate, _, burst = text.partition("/")
+        return cls(float(rate), float(burst or rate))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, limit: RateLimit, now: float):
+        self.rate = limit.rate
+        self.capacity = max(limit.burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Refill, then return 0 if a token is available, else seconds until one is"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+def parse_route_limits(text: str) -> Dict[str, RateLimit]:
+    """Parse "GET /enrollments/=5/10;GET /users/=20" into route limits"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        route, _, limit = item.rpartition("=")
+        limits[route.strip()] = RateLimit.parse(limit)
+    return limits
+
+
+class RoutePatterns:
+    """Matches "METHOD /path/{param}" route templates against a request"""
+
+    def __init__(self, routes: Sequence[str]):
+        self.by_method: Dict[str, List[Tuple[str, re.Pattern]]] = {}
+        for route in routes:
+            method, _, path = route.partition(" ")
+            self.by_method.setdefault(method.upper(), []).append((route, compile_path(path)[0]))
+
+    def match(self, method: str, path: str) -> Optional[str]:
+        for route, pattern in self.by_method.get(method, ()):
+            if pattern.match(path):
+                return route
+        return None
+
+
+class AdmissionController:
+    """Per-client rate limits and a concurrency cap on expensive routes.
+
+    Every client gets a token bucket for all of its requests (client_limit)
+    and one per rate-limited route (route_limits), keyed by the client id.
+    Buckets live in an LRU of at most max_buckets entries, so a check is a
+    few dict operations whatever the number of clients. Requests to
+    expensive routes beyond `concurrency` in flight, or beyond
+    `client_concurrency` for one client, are shed instead of queueing for the
+    threadpool. That keeps threads and the GIL free for cheap routes, and one
+    client cannot take every slot.
+
+    Used only from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        client_limit: Optional[RateLimit] = None,
+        route_limits: Optional[Dict[str, RateLimit]] = None,
+        concurrency: Optional[int] = DEFAULT_LIST_CONCURRENCY,
+        client_concurrency: Optional[int] = DEFAULT_CLIENT_CONCURRENCY,
+        expensive_routes: Sequence[str] = EXPENSIVE_ROUTES,
+        max_buckets: int = MAX_BUCKETS
+    ):
+        self.client_limit = client_limit
+        self.concurrency = concurrency
+        self.client_concurrency = client_concurrency
+        self.max_buckets = max_buckets
+        self.expensive = RoutePatterns(expensive_routes)
+        self.set_route_limits(route_limits or {})
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.in_flight = 0
+        self.client_in_flight: Dict[str, int] = {}
+        self.rejected = {"rate_limited": 0, "shed": 0}
+
+    def set_route_limits(self, route_limits: Dict[str, RateLimit]):
+        self.route_limits = route_limits
+        self.limited = RoutePatterns(route_limits)
+
+    def _bucket(self, client: str, key: str, limit: RateLimit, now: float) -> TokenBucket:
+        bucket = self.buckets.get((client, key))
+        if bucket is None:
+            bucket = self.buckets[(client, key)] = TokenBucket(limit, now)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end((client, key))
+        return bucket
+
+    def check_rate(self, client: str, method: str, path: str) -> float:
+        """Seconds the client must wait before this request is allowed, 0 if allowed now.
+
+        A token is taken from the client and route buckets only when both
+        allow the request, so rejected requests cost the client nothing.
+        """
+        now = time.monotonic()
+        buckets = []
+        if self.client_limit is not None:
+            buckets.append(self._bucket(client, "*", self.client_limit, now))
+        route = self.limited.match(method, path) if self.route_limits else None
+        if route is not None:
+            buckets.append(self._bucket(client, route, self.route_limits[route], now))
+        wait = max((bucket.wait(now) for bucket in buckets), default=0.0)
+        if wait:
+            self.rejected["rate_limited"] += 1
+            return wait
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    def capped(self, method: str, path: str) -> bool:
+        return self.concurrency is not None and self.expensive.match(method, path) is not None
+
+    def acquire(self, client: str) -> bool:
+        """Reserve a slot for an expensive request; release it with release() when True"""
+        held = self.client_in_flight.get(client, 0)
+        if self.in_flight >= self.concurrency or (
+            self.client_concurrency is not None and held >= self.client_concurrency
+        ):
+            self.rejected["shed"] += 1
+            return False
+        self.in_flight += 1
+        self.client_in_flight[client] = held + 1
+        return True
+
+    def release(self, client: str):
+        self.in_flight -= 1
+        held = self.client_in_flight.pop(client) - 1
+        if held:
+            self.client_in_flight[client] = held
+
+    def reset(self):
+        self.buckets.clear()
@@ -0,0 +1,144 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from kernels.reports import course_completion, user_activity
+from schemas.reports import JobStatus, ReportJob, ReportKind
+from services.analytics import AnalyticsService, ColumnCache
+from services.versioned_store import VersionedStore
+
+DEFAULT_WORKERS = 2
+MAX_JOBS = 100
+
+
+class ReportService:
+    """Runs heavy reports as background jobs in a process pool.
+
+    A job first takes the columns its report needs from the analytics
+    column caches, on a dispatcher thread, and then runs the report
+    function from kernels.reports in a worker process, so the aggregation
+    neither blocks a request nor holds the server's GIL. The caches convert
+    only rows written since they were last used, and are shared with the
+    analytics endpoints. Jobs are tagged with the newest version of the
+    store snapshots their columns were built from, which may be newer than
+    the stores were at submit. While the stores a report reads are
+    unchanged, submitting the same kind again returns the existing job,
+    finished or not, instead of starting a new one.
+
+    Worker processes are spawned, not forked, because the server process
+    has threads whose locks a fork could copy in a held state.
+    """
+
+    def __init__(self, analytics: AnalyticsService, workers: int = DEFAULT_WORKERS, keep: int = MAX_JOBS):
+        self.analytics = analytics
+        self.workers = workers
+        self.keep = keep
+        self.jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self.latest: Dict[ReportKind, ReportJob] = {}
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[ThreadPoolExecutor] = None
+        self._pool: Optional[Executor] = None
+
+    def _sources(self, kind: ReportKind) -> List[Tuple[ColumnCache, List[VersionedStore]]]:
+        """The column caches a report reads, each with the stores it is built from"""
+        analytics = self.analytics
+        enrollments = (analytics.enrollments, [shard.enrollments for shard in analytics.enrollment_service.shards])
+        if kind == ReportKind.course_completion:
+            return [(analytics.courses, [analytics.course_service.courses]), enrollments]
+        return [(analytics.users, [analytics.user_service.users]), enrollments]
+
+    def data_version(self, kind: ReportKind) -> int:
+        """Changes whenever a store the report reads is written to or replaced"""
+        return max(store.version for _, stores in self._sources(kind) for store in stores)
+
+    def _executors(self) -> Tuple[Executor, Executor]:
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = ThreadPoolExecutor(self.workers, thread_name_prefix="edutrack-report")
+            if self._pool is None:
+                # Imported here: multiprocessing is only needed once a report runs
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._dispatcher, self._pool
+
+    def submit(self, kind: ReportKind) -> ReportJob:
+        version = self.data_version(kind)
+        with self._lock:
+            job = self.latest.get(kind)
+            if job is not None and job.data_version == version and job.status != JobStatus.failed:
+                return job.model_copy()
+            job = ReportJob(
+                id=uuid.uuid4().hex, kind=kind, status=JobStatus.pending,
+                data_version=version, created_at=datetime.now()
+            )
+            self.jobs[job.id] = self.latest[kind] = job
+            while len(self.jobs) > self.keep:
+                self.jobs.popitem(last=False)
+            submitted = job.model_copy()
+        dispatcher, _ = self._executors()
+        dispatcher.submit(self._run, job)
+        return submitted
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return job.model_copy(update={"stale": job.data_version != self.data_version(job.kind)})
+
+    def _prepare(self, kind: ReportKind) -> Tuple[Callable[..., Dict[str, Any]], tuple, int]:
+        """The report function, the columns it needs and the data version they were built from"""
+        versions: List[int] = []
+        columns = []
+        for cache, stores in self._sources(kind):
+            built, arrays = cache.versioned(stores)
+            versions.extend(built)
+            columns.append(arrays)
+        first, enrollments = columns
+        version = max(versions)
+        if kind == ReportKind.course_completion:
+            return course_completion, (
+                first["id"], first["title"], first["is_open"], enrollments["course_id"], enrollments["completed"]
+            ), version
+        return user_activity, (first["id"], first["is_active"], enrollments["user_id"], enrollments["completed"]), version
+
+    def _update(self, job: ReportJob, **values: Any):
+        with self._lock:
+            for name, value in values.items():
+                setattr(job, name, value)
+
+    def _run(self, job: ReportJob):
+        started = time.perf_counter()
+        self._update(job, status=JobStatus.running, started_at=datetime.now())
+        try:
+            report, args, version = self._prepare(job.kind)
+            self._update(job, data_version=version)
+            _, pool = self._executors()
+            result = pool.submit(report, *args).result()
+        except Exception as exc:
+            from concurrent.futures.process import BrokenProcessPool
+            if isinstance(exc, BrokenProcessPool):
+                with self._lock:
+                    self._pool = None
+            self._update(
+                job, status=JobStatus.failed, error=f"{type(exc).__name__}: {exc}",
+                finished_at=datetime.now(), seconds=round(time.perf_counter() - started, 3)
+            )
+            return
+        self._update(
+            job, status=JobStatus.done, result=result,
+            finished_at=datetime.now(), seconds=round(time.perf_counter() - started, 3)
+        )
+
+    def close(self):
+        with self._lock:
+            dispatcher, pool = self._dispatcher, self._pool
+            self._dispatcher = self._pool = None
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=False, cancel_futures=True)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,319 @@
+import bisect
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+from services.memory import (
+    DICT_BYTES, DICT_ENTRY_BYTES, FLOAT_BYTES, INT_BYTES, POINTER_BYTES, TUPLE_BYTES, dict_bytes, str_bytes
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse runs of whitespace"""
+    return " ".join(text.lower().split())
+
+
+class InvertedIndex:
+    """Token -> {doc_id: weight} postings for ranked keyword search.
+
+    Each document is indexed from one or more weighted fields, so a match in
+    a title can count for more than a match in a description. Postings are
+    also grouped into tiers of equal weight, each holding sorted doc ids, so
+    a search can visit the highest-scoring documents first and stop once the
+    requested page can no longer change.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.tiers: Dict[str, Dict[float, "SortedKeys"]] = {}
+        self.doc_tokens: Dict[int, Tuple[str, ...]] = {}
+        # Kept up to date on every change so approx_bytes() is O(1)
+        self.entries = 0
+        self.token_chars = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_tokens)
+
+    def add(self, doc_id: int, fields: Iterable[Tuple[str, float]]):
+        weights: Counter = Counter()
+        for text, field_weight in fields:
+            for token in tokenize(text):
+                weights[token] += field_weight
+
+        for token, weight in weights.items():
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = {}
+                self.tiers[token] = {}
+                self.token_chars += len(token)
+            if doc_id in docs:
+                self._untier(token, doc_id, docs[doc_id])
+            else:
+                self.entries += 1
+            docs[doc_id] = weight
+            tier = self.tiers[token].get(weight)
+            if tier is None:
+                tier = self.tiers[token][weight] = SortedKeys()
+            tier.add(doc_id)
+        self.doc_tokens[doc_id] = tuple(weights)
+
+    def remove(self, doc_id: int):
+        for token in self.doc_tokens.pop(doc_id, ()):
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            weight = docs.pop(doc_id, None)
+            if weight is not None:
+                self.entries -= 1
+                self._untier(token, doc_id, weight)
+            if not docs:
+                del self.postings[token]
+                del self.tiers[token]
+                self.token_chars -= len(token)
+
+    def _untier(self, token: str, doc_id: int, weight: float):
+        tiers = self.tiers[token]
+        tiers[weight].remove(doc_id)
+        if not tiers[weight]:
+            del tiers[weight]
+
+    def replace(self, doc_id: int, fields: Iterable[Tuple[str, float]]):
+        self.remove(doc_id)
+        self.add(doc_id, fields)
+
+    def approx_bytes(self) -> int:
+        """Estimated memory held by the postings and per-document token lists"""
+        terms = len(self.postings)
+        postings = (
+            terms * (DICT_ENTRY_BYTES + DICT_BYTES) + str_bytes(terms, self.token_chars)
+            + self.entries * (DICT_ENTRY_BYTES + INT_BYTES + FLOAT_BYTES + POINTER_BYTES)
+        )
+        doc_tokens = dict_bytes(len(self.doc_tokens), TUPLE_BYTES) + self.entries * POINTER_BYTES
+        return int(postings + doc_tokens)
+
+    def search(self, query: str, skip: int = 0, limit: int = 20) -> Tuple[int, List[int]]:
+        """Return (total matches, doc ids for the requested page) ranked by score.
+
+        Every query token must match (AND semantics). Scores are the sum of
+        the field weights multiplied by the token's inverse document frequency;
+        ties go to the lower doc id.
+
+        The rarest token's tiers are visited from the highest weight down, and
+        the walk stops once a tier's best possible score cannot beat the
+        page's last result. A one-token query therefore scores only about
+        skip + limit documents however common the token is. With more tokens
+        the total still needs one membership pass over the rarest token's
+        postings, but no scoring or sorting of them.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return 0, []
+
+        matched = []
+        for token in tokens:
+            docs = self.postings.get(token)
+            if not docs:
+                return 0, []
+            matched.append((token, docs))
+
+        # Start from the rarest token so the candidate set is as small as possible
+        matched.sort(key=lambda item: len(item[1]))
+        total_docs = len(self.doc_tokens)
+        rare_token, rare_docs = matched[0]
+        rare_idf = math.log(1 + total_docs / len(rare_docs))
+        others = [(docs, math.log(1 + total_docs / len(docs))) for _, docs in matched[1:]]
+        if others:
+            total = sum(1 for doc_id in rare_docs if all(doc_id in docs for docs, _ in others))
+        else:
+            total = len(rare_docs)
+        if not total:
+            return 0, []
+
+        # The most the other tokens can add to any document's score
+        others_max = sum(max(self.tiers[token]) * idf for (token, _), (_, idf) in zip(matched[1:], others))
+        wanted = skip + limit
+        top: List[Tuple[float, int]] = []  # min-heap of (score, -doc_id)
+        for weight in sorted(self.tiers[rare_token], reverse=True):
+            if len(top) == wanted and weight * rare_idf + others_max < top[0][0]:
+                break
+            for doc_id in self.tiers[rare_token][weight]:
+                if others and not all(doc_id in docs for docs, _ in others):
+                    continue
+                item = (weight * rare_idf + sum(docs[doc_id] * idf for docs, idf in others), -doc_id)
+                if len(top) < wanted:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+                elif not others:
+                    # The rest of this tier ties on score and loses on doc id
+                    break
+        ranked = sorted(top, reverse=True)
+        return total, [-neg_id for _, neg_id in ranked[skip:]]
+
+
+class SortedKeys:
+    """Sorted list of keys (strings or ints) split into bounded blocks.
+
+    Inserting into one flat sorted list moves every later element, which gets
+    slow with millions of keys. Blocks keep each insert or delete to a
+    memmove of at most LOAD * 2 elements.
+    """
+
+    LOAD = 1000
+
+    def __init__(self):
+        self.blocks: List[List[str]] = []
+        self.maxes: List[str] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[str]:
+        for block in self.blocks:
+            yield from block
+
+    @classmethod
+    def from_sorted(cls, keys: List[str]) -> "SortedKeys":
+        """Build from keys that are already sorted, without per-key inserts"""
+        sorted_keys = cls()
+        sorted_keys.blocks = [keys[i:i + cls.LOAD] for i in range(0, len(keys), cls.LOAD)]
+        sorted_keys.maxes = [block[-1] for block in sorted_keys.blocks]
+        sorted_keys.size = len(keys)
+        return sorted_keys
+
+    def add(self, key: str):
+        self.size += 1
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            return
+
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            pos -= 1
+            self.blocks[pos].append(key)
+            self.maxes[pos] = key
+        else:
+            bisect.insort(self.blocks[pos], key)
+
+        block = self.blocks[pos]
+        if len(block) > self.LOAD * 2:
+            self.blocks[pos:pos + 1] = [block[:self.LOAD], block[self.LOAD:]]
+            self.maxes[pos:pos + 1] = [block[self.LOAD - 1], block[-1]]
+
+    def remove(self, key: str) -> bool:
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            return False
+        block = self.blocks[pos]
+        idx = bisect.bisect_left(block, key)
+        if idx == len(block) or block[idx] != key:
+            return False
+
+        del block[idx]
+        self.size -= 1
+        if not block:
+            del self.blocks[pos]
+            del self.maxes[pos]
+        elif idx == len(block):
+            self.maxes[pos] = block[-1]
+        return True
+
+    def iter_from(self, key: str) -> Iterator[str]:
+        """Yield keys in order, starting at the first key >= key"""
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            return
+        block = self.blocks[pos]
+        yield from block[bisect.bisect_left(block, key):]
+        for block in self.blocks[pos + 1:]:
+            yield from block
+
+
+class PrefixIndex:
+    """Typeahead index mapping normalized terms to document ids.
+
+    Keys are stored as "term\x00id" so the same term can point at many
+    documents while staying unique and sortable as plain strings.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self):
+        self.keys = SortedKeys()
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        # Characters held by the keys and by the doc_terms tuples, for approx_bytes()
+        self.key_chars = 0
+        self.term_chars = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    @classmethod
+    def bulk_load(cls, docs: Iterable[Tuple[int, Iterable[str]]]) -> "PrefixIndex":
+        """Build an index for many documents with one sort instead of per-key inserts"""
+        index = cls()
+        keys = []
+        for doc_id, terms in docs:
+            unique_terms = tuple(dict.fromkeys(term for term in terms if term))
+            index.doc_terms[doc_id] = unique_terms
+            keys.extend(f"{term}{cls.SEPARATOR}{doc_id}" for term in unique_terms)
+        keys.sort()
+        index.key_chars = sum(map(len, keys))
+        index.term_chars = sum(len(term) for terms in index.doc_terms.values() for term in terms)
+        index.keys = SortedKeys.from_sorted(keys)
+        return index
+
+    def add(self, doc_id: int, terms: Iterable[str]):
+        unique_terms = tuple(dict.fromkeys(term for term in terms if term))
+        for term in unique_terms:
+            key = f"{term}{self.SEPARATOR}{doc_id}"
+            self.keys.add(key)
+            self.key_chars += len(key)
+            self.term_chars += len(term)
+        self.doc_terms[doc_id] = unique_terms
+
+    def remove(self, doc_id: int):
+        for term in self.doc_terms.pop(doc_id, ()):
+            key = f"{term}{self.SEPARATOR}{doc_id}"
+            if self.keys.remove(key):
+                self.key_chars -= len(key)
+            self.term_chars -= len(term)
+
+    def replace(self, doc_id: int, terms: Iterable[str]):
+        self.remove(doc_id)
+        self.add(doc_id, terms)
+
+    def approx_bytes(self) -> int:
+        """Estimated memory held by the sorted keys and per-document term lists"""
+        keys = len(self.keys)
+        sorted_keys = str_bytes(keys, self.key_chars) + keys * POINTER_BYTES
+        doc_terms = (
+            dict_bytes(len(self.doc_terms), TUPLE_BYTES) + keys * POINTER_BYTES
+            + str_bytes(keys, self.term_chars)
+        )
+        return sorted_keys + doc_terms
+
+    def search(self, prefix: str, limit: int = 10) -> List[int]:
+        """Return up to `limit` distinct doc ids whose terms start with prefix, in term order"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matches: Dict[int, None] = {}
+        for key in self.keys.iter_from(prefix):
+            if not key.startswith(prefix):
+                break
+            matches[int(key.rsplit(self.SEPARATOR, 1)[1])] = None
+            if len(matches) >= limit:
+                break
+        return list(matches)
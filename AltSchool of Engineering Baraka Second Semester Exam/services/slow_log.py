@@ -0,0 +1,100 @@
+import json
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD_MS = 500.0
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+
+logger = logging.getLogger("edutrack.slow_requests")
+
+
+class JsonLinesLog:
+    """JSON-lines log written by a background thread.
+
+    record() never blocks: it puts the entry on a bounded queue and, when the
+    queue is full, drops it and counts the drop. A daemon thread drains the
+    queue in batches to a JSON-lines file, or to a logger when no path is set.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, capacity: int = QUEUE_SIZE,
+        name: str = "json-lines-log", log: logging.Logger = logger
+    ):
+        self.path = path
+        self.name = name
+        self.logger = log
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(capacity)
+        self.written = 0
+        self.dropped = 0
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]):
+        if self._writer is None:
+            self._start()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued entry has been written"""
+        if self._writer is not None:
+            self.queue.join()
+
+    def close(self):
+        if self._writer is not None:
+            self.queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _start(self):
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            entries: List[Optional[Dict[str, Any]]] = [self.queue.get()]
+            while len(entries) < BATCH_SIZE:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([entry for entry in entries if entry is not None])
+            except Exception:
+                self.logger.exception("Failed to write %s", self.name)
+            finally:
+                for _ in entries:
+                    self.queue.task_done()
+            if None in entries:
+                return
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        if not entries:
+            return
+        lines = [json.dumps(entry, separators=(",", ":"), default=str) for entry in entries]
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+        else:
+            for line in lines:
+                self.logger.warning(line)
+        self.written += len(entries)
+
+
+class SlowRequestLog(JsonLinesLog):
+    """Structured log of requests slower than a threshold.
+
+    Entries are written like any JsonLinesLog, to the edutrack.slow_requests
+    logger when no path is set.
+    """
+
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS, path: Optional[str] = None, capacity: int = QUEUE_SIZE):
+        super().__init__(path, capacity, name="slow-request-log")
+        self.threshold = threshold_ms / 1000
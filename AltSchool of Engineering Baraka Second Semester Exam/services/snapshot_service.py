@@ -0,0 +1,204 @@
+import gc
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from schemas.common import construct_many
+from schemas.course import Course
+from schemas.enrollment import Enrollment
+from schemas.user import User
+from services.course_service import CourseService
+from services.enrollment_service import EnrollmentService
+from services.user_service import UserService
+
+MAGIC = b"EDUSNAP1"
+TABLE_HEADER = struct.Struct("<qq")
+BLOCK_LENGTH = struct.Struct("<q")
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Column layout per table. Every column is stored as one or two contiguous
+# blocks so it can be read back with a single array.frombytes() call.
+TABLES: Tuple[Tuple[str, Type[BaseModel], Tuple[Tuple[str, str], ...]], ...] = (
+    ("users", User, (
+        ("id", "int"), ("name", "str"), ("email", "str"),
+        ("is_active", "bool"), ("created_at", "datetime"),
+    )),
+    ("courses", Course, (
+        ("id", "int"), ("title", "str"), ("description", "str"),
+        ("is_open", "bool"), ("created_at", "datetime"),
+    )),
+    ("enrollments", Enrollment, (
+        ("id", "int"), ("user_id", "int"), ("course_id", "int"),
+        ("enrolled_date", "date"), ("completed", "bool"), ("created_at", "datetime"),
+    )),
+)
+
+
+def _int_array(values) -> array:
+    column = array("q", values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _read_int_array(buffer) -> array:
+    column = array("q")
+    column.frombytes(buffer)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _encode_column(kind: str, values: List[Any]) -> List[bytes]:
+    if kind == "int":
+        return [_int_array(values).tobytes()]
+    if kind == "bool":
+        return [bytes(bytearray(map(bool, values)))]
+    if kind == "date":
+        return [_int_array(value.toordinal() for value in values).tobytes()]
+    if kind == "datetime":
+        return [_int_array((value - EPOCH) // MICROSECOND for value in values).tobytes()]
+
+    # Strings: one UTF-8 blob plus character offsets into the decoded text
+    offsets = [0]
+    for value in values:
+        offsets.append(offsets[-1] + len(value))
+    return [_int_array(offsets).tobytes(), "".join(values).encode("utf-8")]
+
+
+def _decode_column(kind: str, blocks: List[memoryview]) -> Sequence[Any]:
+    if kind == "int":
+        return _read_int_array(blocks[0]).tolist()
+    if kind == "bool":
+        return [value == 1 for value in blocks[0]]
+    if kind == "date":
+        return list(map(date.fromordinal, _read_int_array(blocks[0])))
+    if kind == "datetime":
+        return [EPOCH + timedelta(microseconds=value) for value in _read_int_array(blocks[0])]
+
+    offsets = _read_int_array(blocks[0])
+    text = str(blocks[1], "utf-8")
+    return [text[start:end] for start, end in zip(offsets, islice(offsets, 1, None))]
+
+
+class SnapshotService:
+    """Writes and bulk-loads a compact columnar binary snapshot of all stores.
+
+    Layout: MAGIC, then per table a (rows, next_id) header followed by its
+    columns, each as length-prefixed blocks of little-endian int64 arrays,
+    0/1 bytes, or UTF-8 text with character offsets.
+    """
+
+    def __init__(
+        self,
+        user_service: UserService,
+        course_service: CourseService,
+        enrollment_service: EnrollmentService,
+        path: Optional[str] = None
+    ):
+        self.user_service = user_service
+        self.course_service = course_service
+        self.enrollment_service = enrollment_service
+        self.path = path
+        self.last_saved_at: Optional[datetime] = None
+        self.last_loaded_at: Optional[datetime] = None
+        self.last_load_seconds: Optional[float] = None
+
+    def _stores(self) -> Dict[str, Tuple[List[BaseModel], int]]:
+        return {
+            "users": (list(self.user_service.users.values()), self.user_service.next_id),
+            "courses": (list(self.course_service.courses.values()), self.course_service.next_id),
+            "enrollments": (self.enrollment_service.list_enrollments(), self.enrollment_service.next_id),
+        }
+
+    def save(self, path: Optional[str] = None) -> Dict[str, int]:
+        """Write the snapshot atomically and return the row count per table"""
+        path = path or self.path
+        stores = self._stores()
+        counts = {}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            for name, _, columns in TABLES:
+                rows, next_id = stores[name]
+                counts[name] = len(rows)
+                f.write(TABLE_HEADER.pack(len(rows), next_id))
+                for field, kind in columns:
+                    for block in _encode_column(kind, [getattr(row, field) for row in rows]):
+                        f.write(BLOCK_LENGTH.pack(len(block)))
+                        f.write(block)
+        os.replace(tmp_path, path)
+        self.last_saved_at = datetime.now()
+        return counts
+
+    def load(self, path: Optional[str] = None) -> Dict[str, int]:
+        """Replace every store with the snapshot contents and rebuild their indexes"""
+        path = path or self.path
+        started = time.perf_counter()
+        # Millions of new objects would otherwise trigger repeated full GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            tables = self._read(path)
+            self.user_service.restore(*tables["users"])
+            self.course_service.restore(*tables["courses"])
+            self.enrollment_service.restore(*tables["enrollments"])
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        
+        self.last_loaded_at = datetime.now()
+        self.last_load_seconds = time.perf_counter() - started
+        return {name: len(items) for name, (items, _) in tables.items()}
+
+    def _read(self, path: str) -> Dict[str, Tuple[List[BaseModel], int]]:
+        tables = {}
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                if bytes(view[:len(MAGIC)]) != MAGIC:
+                    raise ValueError(f"{path} is not an EduTrack snapshot")
+                pos = len(MAGIC)
+
+                def read_block() -> memoryview:
+                    nonlocal pos
+                    (length,) = BLOCK_LENGTH.unpack_from(view, pos)
+                    pos += BLOCK_LENGTH.size
+                    block = view[pos:pos + length]
+                    pos += length
+                    return block
+
+                for name, model, columns in TABLES:
+                    rows, next_id = TABLE_HEADER.unpack_from(view, pos)
+                    pos += TABLE_HEADER.size
+                    values = {}
+                    for field, kind in columns:
+                        blocks = [read_block() for _ in range(2 if kind == "str" else 1)]
+                        values[field] = _decode_column(kind, blocks)
+                        for block in blocks:
+                            block.release()
+                    tables[name] = (construct_many(model, values), next_id)
+            finally:
+                view.release()
+        return tables
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the snapshot file was last written, or None if there is none"""
+        if self.last_saved_at is not None:
+            return (datetime.now() - self.last_saved_at).total_seconds()
+        if self.path and os.path.exists(self.path):
+            return max(0.0, time.time() - os.path.getmtime(self.path))
+        return None
+
+    def load_if_present(self) -> bool:
+        if self.path and os.path.exists(self.path):
+            self.load()
+            return True
+        return False
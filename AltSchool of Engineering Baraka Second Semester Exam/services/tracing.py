@@ -0,0 +1,178 @@
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+from services.slow_log import JsonLinesLog
+
+DEFAULT_SAMPLE_RATE = 0.01
+MAX_SPANS_PER_TRACE = 1000
+RECENT_TRACES = 100
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+logger = logging.getLogger("edutrack.traces")
+
+# The span new spans nest under; copied into threadpool workers with the context
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("edutrack_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[int], start: float, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = next(trace.span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else self.start
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans recorded for one sampled request"""
+
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(16).hex()
+        self.name = name
+        self.started_at = datetime.now()
+        self.span_ids = itertools.count(1)
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def add(self, name: str, parent: Optional[Span], start: float, end: Optional[float] = None, **attributes: Any) -> Span:
+        span = Span(self, name, parent.span_id if parent else None, start, attributes)
+        span.end = end
+        # list.append is atomic, so spans from threadpool workers need no lock
+        if len(self.spans) < MAX_SPANS_PER_TRACE:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        spans = sorted(self.spans, key=lambda span: (span.start, span.span_id))
+        origin = spans[0].start if spans else 0.0
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": spans[0].to_dict(origin)["duration_ms"] if spans else 0.0,
+            "dropped_spans": self.dropped,
+            "spans": [span.to_dict(origin) for span in spans],
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; a no-op outside a sampled trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace.add(name, parent, time.perf_counter(), **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def record(name: str, start: float, end: float, **attributes: Any):
+    """Add an already-finished child span of the current span from perf_counter times"""
+    parent = _current_span.get()
+    if parent is not None:
+        parent.trace.add(name, parent, start, end, **attributes)
+
+
+def traced(func: F) -> F:
+    """Record each call of func as a span named after its qualified name"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return func(*args, **kwargs)
+        with span(name):
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class Tracer:
+    """Samples requests into traces and collects the finished ones.
+
+    Only a sample_rate fraction of requests is traced; the rest pay for one
+    random() call and a context variable lookup per traced function. The most
+    recent traces are kept in memory and, when a path is set, every trace is
+    also appended to that file as one JSON line by a JsonLinesLog, so the
+    request that finishes a trace never waits on the disk.
+    """
+
+    def __init__(self, sample_rate: float = DEFAULT_SAMPLE_RATE, path: Optional[str] = None, keep: int = RECENT_TRACES):
+        self.sample_rate = sample_rate
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.log = JsonLinesLog(path, name="trace-export", log=logger) if path else None
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Start a trace with a root span if this request is sampled"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield None
+            return
+        trace = Trace(name)
+        root = trace.add(name, None, time.perf_counter(), **attributes)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as exc:
+            root.attributes["error"] = type(exc).__name__
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(token)
+            self.export(trace)
+
+    def export(self, trace: Trace):
+        data = trace.to_dict()
+        self.recent.append(data)
+        if self.log is not None:
+            self.log.record(data)
+
+    def close(self):
+        """Write out traces still waiting in the export queue"""
+        if self.log is not None:
+            self.log.close()
+
+    def recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent traces, newest first"""
+        return list(itertools.islice(reversed(self.recent), limit))
@@ -1,13 +1,28 @@
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Iterable, Tuple
 from datetime import datetime
 from schemas.user import User, UserCreate, UserUpdate
+from services.journal import Journaled, journaled
+from services.search_index import PrefixIndex, normalize
+from services.tracing import traced
+from services.versioned_store import VersionedStore
 
 
-class UserService:
+def user_search_terms(user: User) -> List[str]:
+    """Terms a user can be found by: full name, each name word, and email"""
+    name = normalize(user.name)
+    return [name, *name.split(" ")[1:], normalize(user.email)]
+
+
+class UserService(Journaled):
+    store_name = "users"
+
     def __init__(self):
-        self.users: Dict[int, User] = {}
+        self.users: VersionedStore[User] = VersionedStore()
         self.next_id = 1
+        self.search_index = PrefixIndex()
 
+    @traced
+    @journaled
     def create_user(self, user_data: UserCreate) -> User:
         user = User(
             id=self.next_id,
@@ -17,36 +32,128 @@ class UserService:
             created_at=datetime.now()
         )
         self.users[self.next_id] = user
+        self.search_index.add(user.id, user_search_terms(user))
         self.next_id += 1
+        self._journal_put(user)
         return user
 
+    @traced
+    @journaled
+    def create_users(self, users_data: List[UserCreate]) -> List[User]:
+        """Bulk insert already-validated users without re-validating each model"""
+        created_at = datetime.now()
+        users = []
+        for user_data in users_data:
+            user = User.model_construct(
+                id=self.next_id,
+                name=user_data.name,
+                email=user_data.email,
+                is_active=True,
+                created_at=created_at
+            )
+            self.users[self.next_id] = user
+            self.search_index.add(user.id, user_search_terms(user))
+            self.next_id += 1
+            self._journal_put(user)
+            users.append(user)
+        return users
+
+    def restore(self, users: List[User], next_id: int):
+        """Replace the store with trusted users, rebuilding the prefix index in one pass"""
+        self.users = VersionedStore((user.id, user) for user in users)
+        self.next_id = next_id
+        self.search_index = PrefixIndex.bulk_load((user.id, user_search_terms(user)) for user in users)
+
     def get_user(self, user_id: int) -> Optional[User]:
         return self.users.get(user_id)
 
+    @traced
+    def get_users(self, user_ids: Iterable[int]) -> Tuple[List[User], List[int]]:
+        found, missing = [], []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.users.get(user_id)
+            if user:
+                found.append(user)
+            else:
+                missing.append(user_id)
+        return found, missing
+
+    @traced
     def get_all_users(self) -> List[User]:
-        return list(self.users.values())
+        return self.users.values()
+
+    @traced
+    def search_users(self, prefix: str, limit: int = 10) -> List[User]:
+        users = (self.users.get(user_id) for user_id in self.search_index.search(prefix, limit))
+        return [user for user in users if user is not None]
 
+    @traced
+    @journaled
     def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         if user_id not in self.users:
             return None
         
-        user = self.users[user_id]
         update_data = user_data.dict(exclude_unset=True)
+        # Swap in an updated copy so readers never see a half-applied update
+        user = self.users[user_id].model_copy(update=update_data)
+        self.users[user_id] = user
         
-        for field, value in update_data.items():
-            setattr(user, field, value)
-        
+        if "name" in update_data or "email" in update_data:
+            self.search_index.replace(user_id, user_search_terms(user))
+        self._journal_put(user)
         return user
 
+    @traced
+    @journaled
     def delete_user(self, user_id: int) -> bool:
         if user_id in self.users:
             del self.users[user_id]
+            self.search_index.remove(user_id)
+            self._journal_delete(user_id)
             return True
         return False
 
+    @traced
+    @journaled
     def deactivate_user(self, user_id: int) -> Optional[User]:
         if user_id not in self.users:
             return None
         
-        self.users[user_id].is_active = False
-        return self.users[user_id]
+        user = self.users[user_id].model_copy(update={"is_active": False})
+        self.users[user_id] = user
+        self._journal_put(user)
+        return user
+
+    @traced
+    @journaled
+    def deactivate_users(self, user_ids: Iterable[int]) -> Tuple[List[int], List[int], List[int]]:
+        """Deactivate many users in one pass.
+
+        Returns (newly deactivated, already inactive, missing) user ids.
+        """
+        deactivated, already_inactive, missing = [], [], []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.users.get(user_id)
+            if not user:
+                missing.append(user_id)
+            elif not user.is_active:
+                already_inactive.append(user_id)
+            else:
+                user = user.model_copy(update={"is_active": False})
+                self.users[user_id] = user
+                self._journal_put(user)
+                deactivated.append(user_id)
+        return deactivated, already_inactive, missing
+
+    def apply_put(self, data: Dict[str, Any]):
+        user = User.model_validate(data)
+        self.users[user.id] = user
+        self.search_index.replace(user.id, user_search_terms(user))
+        self.next_id = max(self.next_id, user.id + 1)
+
+    def apply_delete(self, user_id: int):
+        self.users.pop(user_id, None)
+        self.search_index.remove(user_id)
+
+    def journal_rows(self) -> List[User]:
+        return self.users.values()
@@ -0,0 +1,159 @@
+import itertools
+import threading
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+from services.memory import dict_bytes, sampled_size
+
+T = TypeVar("T")
+
+CHUNK_SIZE = 1024
+
+# Versions come from one process-wide counter, so every write, and every new
+# store replacing an old one on restore, gets a version above all earlier ones
+_versions = itertools.count(1)
+
+
+class StoreSnapshot(Generic[T]):
+    """Immutable point-in-time view of a VersionedStore, iterated in id order"""
+
+    def __init__(self, version: int, chunks: Dict[int, Dict[int, T]], size: int):
+        self.version = version
+        self.chunks = chunks
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[T]:
+        for chunk_no in sorted(self.chunks):
+            yield from self.chunks[chunk_no].values()
+
+    def get(self, key: int) -> Optional[T]:
+        chunk = self.chunks.get(key // CHUNK_SIZE)
+        return chunk.get(key) if chunk is not None else None
+
+    def values(self) -> List[T]:
+        return list(self)
+
+
+class VersionedStore(Generic[T]):
+    """Id-keyed map with copy-on-write snapshots for lock-free list reads.
+
+    Rows are grouped into chunks of CHUNK_SIZE consecutive ids. Taking a
+    snapshot copies only the chunk map, so it costs one reference per chunk,
+    and marks every chunk as shared. The first write to a shared chunk copies
+    that chunk before changing it, so snapshots never see later writes.
+    Snapshots are cached until the next write. Stored rows are treated as
+    immutable: updates put a new object instead of changing one in place.
+
+    Memory use is estimated per chunk from a sample of its rows, and only
+    chunks written since the last estimate are measured again.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, T]] = ()):
+        self._chunks: Dict[int, Dict[int, T]] = {}
+        self._shared: Set[int] = set()
+        self._size = 0
+        self._snapshot: Optional[StoreSnapshot[T]] = None
+        self._lock = threading.Lock()
+        self.version = next(_versions)
+        self.snapshot_hits = 0
+        self.snapshot_misses = 0
+        # Chunks written since approx_bytes() last measured them
+        self._dirty: Set[int] = set()
+        self._chunk_bytes: Dict[int, int] = {}
+        self._bytes = 0
+        self._measure_lock = threading.Lock()
+        for key, value in items:
+            chunk = self._chunks.get(key // CHUNK_SIZE)
+            if chunk is None:
+                chunk = self._chunks[key // CHUNK_SIZE] = {}
+            if key not in chunk:
+                self._size += 1
+            chunk[key] = value
+        self._dirty.update(self._chunks)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: int) -> bool:
+        chunk = self._chunks.get(key // CHUNK_SIZE)
+        return chunk is not None and key in chunk
+
+    def get(self, key: int, default: Optional[T] = None) -> Optional[T]:
+        chunk = self._chunks.get(key // CHUNK_SIZE)
+        if chunk is None:
+            return default
+        return chunk.get(key, default)
+
+    def __getitem__(self, key: int) -> T:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def _writable_chunk(self, chunk_no: int) -> Dict[int, T]:
+        chunk = self._chunks.get(chunk_no)
+        if chunk is None:
+            chunk = self._chunks[chunk_no] = {}
+        elif chunk_no in self._shared:
+            chunk = dict(chunk)
+            self._chunks[chunk_no] = chunk
+            self._shared.discard(chunk_no)
+        return chunk
+
+    def __setitem__(self, key: int, value: T):
+        with self._lock:
+            chunk = self._writable_chunk(key // CHUNK_SIZE)
+            if key not in chunk:
+                self._size += 1
+            chunk[key] = value
+            self._dirty.add(key // CHUNK_SIZE)
+            self.version = next(_versions)
+
+    def pop(self, key: int, default: Optional[T] = None) -> Optional[T]:
+        with self._lock:
+            if key not in self:
+                return default
+            chunk = self._writable_chunk(key // CHUNK_SIZE)
+            value = chunk.pop(key)
+            self._size -= 1
+            self._dirty.add(key // CHUNK_SIZE)
+            self.version = next(_versions)
+            return value
+
+    def __delitem__(self, key: int):
+        if key not in self:
+            raise KeyError(key)
+        self.pop(key)
+
+    def snapshot(self) -> StoreSnapshot[T]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            self.snapshot_hits += 1
+            return snapshot
+        self.snapshot_misses += 1
+        with self._lock:
+            snapshot = StoreSnapshot(self.version, dict(self._chunks), self._size)
+            self._shared = set(self._chunks)
+            self._snapshot = snapshot
+        return snapshot
+
+    def values(self) -> List[T]:
+        """All rows as of now, in id order"""
+        return self.snapshot().values()
+
+    def approx_bytes(self) -> int:
+        """Estimated memory held by the rows and chunk maps"""
+        with self._measure_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                chunks = [(chunk_no, self._chunks.get(chunk_no)) for chunk_no in dirty]
+            for chunk_no, chunk in chunks:
+                measured = 0
+                if chunk:
+                    # list() copies the values atomically, so writers need not wait for sampling
+                    measured = sampled_size(list(chunk.values())) + dict_bytes(len(chunk))
+                self._bytes += measured - self._chunk_bytes.pop(chunk_no, 0)
+                if measured:
+                    self._chunk_bytes[chunk_no] = measured
+            return self._bytes
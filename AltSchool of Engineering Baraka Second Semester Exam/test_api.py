@@ -98,6 +98,29 @@ class TestUserEndpoints:
         assert get_response.status_code == 404
 
 
+    def test_search_users_by_prefix(self):
+        """Test typeahead search over user names and emails"""
+        create_response = client.post("/users/", json={"name": "Zelda Quartermain", "email": "zq@example.com"})
+        user_id = create_response.json()["id"]
+        
+        for prefix in ["zel", "QUARTER", "zq@"]:
+            response = client.get("/users/search", params={"prefix": prefix})
+            assert response.status_code == 200
+            assert [user["id"] for user in response.json()] == [user_id]
+
+    def test_search_users_tracks_updates_and_deletes(self):
+        """Test that the prefix index follows user updates and deletions"""
+        create_response = client.post("/users/", json={"name": "Xavier Ortolan", "email": "xo@example.com"})
+        user_id = create_response.json()["id"]
+        
+        client.put(f"/users/{user_id}", json={"name": "Yusuf Ortolan"})
+        assert client.get("/users/search", params={"prefix": "xavier"}).json() == []
+        assert len(client.get("/users/search", params={"prefix": "yusuf"}).json()) == 1
+        
+        client.delete(f"/users/{user_id}")
+        assert client.get("/users/search", params={"prefix": "ortolan"}).json() == []
+
+
 class TestCourseEndpoints:
     """Test cases for Course endpoints"""
     
@@ -185,6 +208,55 @@ class TestCourseEndpoints:
         assert get_response.status_code == 404
 
 
+    def test_search_courses(self):
+        """Test keyword search over course titles and descriptions"""
+        client.post("/courses/", json={"title": "Rust Systems", "description": "Ownership and borrowing"})
+        client.post("/courses/", json={"title": "Go Services", "description": "Build services like Rust Systems teams do"})
+        
+        response = client.get("/courses/search", params={"q": "rust systems"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        # Title matches rank above description matches
+        assert data["results"][0]["title"] == "Rust Systems"
+
+    def test_search_courses_tracks_updates_and_deletes(self):
+        """Test that the search index follows course updates and deletions"""
+        create_response = client.post("/courses/", json={"title": "Elixir Intro", "description": "Learn Elixir"})
+        course_id = create_response.json()["id"]
+        
+        client.put(f"/courses/{course_id}", json={"title": "Phoenix Intro", "description": "Learn Phoenix"})
+        assert client.get("/courses/search", params={"q": "elixir"}).json()["total"] == 0
+        assert client.get("/courses/search", params={"q": "phoenix"}).json()["total"] == 1
+        
+        client.delete(f"/courses/{course_id}")
+        assert client.get("/courses/search", params={"q": "phoenix"}).json()["total"] == 0
+
+    def test_search_index_pages_by_weight_tier(self):
+        """Test that early-stopping search pages match a full ranking"""
+        from services.search_index import InvertedIndex
+
+        index = InvertedIndex()
+        for doc_id in range(1, 201):
+            title = "common rare" if doc_id % 7 == 0 else "common"
+            index.replace(doc_id, [(title, 3.0), ("common" * (doc_id % 3 == 0), 1.0)])
+        index.replace(14, [("common", 3.0)])
+        index.remove(21)
+
+        def ranked(*tokens):
+            import math
+            idfs = {token: math.log(1 + len(index) / len(index.postings[token])) for token in tokens}
+            docs = [doc_id for doc_id in index.doc_tokens if all(doc_id in index.postings[token] for token in tokens)]
+            return sorted(docs, key=lambda doc_id: (
+                -sum(index.postings[token][doc_id] * idfs[token] for token in tokens), doc_id
+            ))
+
+        total, page = index.search("common", skip=5, limit=10)
+        assert (total, page) == (199, ranked("common")[5:15])
+        total, page = index.search("rare common", skip=0, limit=4)
+        assert (total, page) == (26, ranked("rare", "common")[:4])
+
+
 class TestEnrollmentEndpoints:
     """Test cases for Enrollment endpoints"""
     
@@ -418,6 +490,840 @@ class TestIntegrationScenarios:
         assert completed_enrollment is not None
         assert completed_enrollment["completed"] is True
 
+    def test_batch_get_reports_missing_ids(self):
+        """Test resolving many users, courses and enrollments in one call each"""
+        user_id = client.post("/users/", json={"name": "Uma Batch", "email": "uma@example.com"}).json()["id"]
+        course_id = client.post("/courses/", json={"title": "Batch Course", "description": "Batched"}).json()["id"]
+        enrollment_id = client.post(
+            "/enrollments/", json={"user_id": user_id, "course_id": course_id}
+        ).json()["id"]
+        
+        users = client.post("/users/batch-get", json={"ids": [user_id, 99999]}).json()
+        assert [user["id"] for user in users["found"]] == [user_id]
+        assert users["missing"] == [99999]
+        
+        courses = client.post("/courses/batch-get", json={"ids": [99999, course_id]}).json()
+        assert [course["id"] for course in courses["found"]] == [course_id]
+        assert courses["missing"] == [99999]
+        
+        enrollments = client.post("/enrollments/batch-get", json={"ids": [enrollment_id, 99999]}).json()
+        assert enrollments["found"][0]["user_name"] == "Uma Batch"
+        assert enrollments["missing"] == [99999]
+
+    def test_sparse_fieldsets(self):
+        """Test that fields= limits the keys returned by read endpoints"""
+        user_id = client.post("/users/", json={"name": "Fay Fields", "email": "fay@example.com"}).json()["id"]
+        course_id = client.post("/courses/", json={"title": "Fields 101", "description": "Projection"}).json()["id"]
+        client.post("/enrollments/", json={"user_id": user_id, "course_id": course_id})
+        
+        response = client.get(f"/users/{user_id}", params={"fields": "id,name"})
+        assert response.json() == {"id": user_id, "name": "Fay Fields"}
+        
+        response = client.get(f"/courses/{course_id}/enrollments", params={"fields": "user_name,enrolled_date"})
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data[0]) == {"user_name", "enrolled_date"}
+        assert data[0]["user_name"] == "Fay Fields"
+        
+        response = client.get("/courses/", params={"fields": "title,bogus"})
+        assert response.status_code == 400
+
+    def test_bulk_complete_course_and_deactivate_users(self):
+        """Test completing a whole cohort and deactivating its users in bulk"""
+        course_id = client.post("/courses/", json={"title": "Cohort Course", "description": "Bulk"}).json()["id"]
+        user_ids = [
+            client.post("/users/", json={"name": f"Cohort {i}", "email": f"cohort{i}@example.com"}).json()["id"]
+            for i in range(3)
+        ]
+        enrollment_ids = [
+            client.post("/enrollments/", json={"user_id": user_id, "course_id": course_id}).json()["id"]
+            for user_id in user_ids
+        ]
+        client.patch(f"/enrollments/{enrollment_ids[0]}/complete")
+        
+        response = client.post("/enrollments/bulk-complete", json={"course_id": course_id})
+        assert response.status_code == 200
+        data = response.json()
+        assert sorted(data["completed"]) == sorted(enrollment_ids[1:])
+        assert data["already_completed"] == [enrollment_ids[0]]
+        assert all(e["completed"] for e in client.get(f"/courses/{course_id}/enrollments").json())
+        
+        response = client.post("/users/bulk-deactivate", json={"ids": user_ids + [99999]})
+        data = response.json()
+        assert data["deactivated"] == user_ids
+        assert data["missing"] == [99999]
+        
+        response = client.post("/enrollments/bulk-complete", json={})
+        assert response.status_code == 422
+
+    def test_csv_import_and_export(self):
+        """Test streaming CSV import with per-row errors, then export"""
+        csv_body = (
+            "name,email\n"
+            "Csv One,csv.one@example.com\n"
+            "\"Two, Csv\",csv.two@example.com\n"
+            "Broken,not-an-email\n"
+        )
+        response = client.post("/data/import/users", content=csv_body.encode())
+        assert response.status_code == 200
+        summary = response.json()
+        assert summary["rows"] == 3
+        assert summary["imported"] == 2
+        assert summary["errors"][0]["row"] == 3
+        assert any(user["name"] == "Two, Csv" for user in client.get("/users/search", params={"prefix": "two"}).json())
+        
+        response = client.get("/data/export/users")
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines[0] == "id,name,email,is_active,created_at"
+        assert any("csv.one@example.com" in line for line in lines[1:])
+
+    def test_csv_export_streams_snapshot(self):
+        """Test export walks one store snapshot lazily, unaffected by writes made while it streams"""
+        import importlib
+        from services import csv_service, user_service
+        from schemas.transfer import DataKind
+        rows = [f"Streamed {n},streamed.{n}@example.com" for n in range(2500)]
+        client.post("/data/import/users", content=("name,email\n" + "\n".join(rows)).encode())
+        users = len(user_service.users)
+
+        assert not isinstance(csv_service._rows(DataKind.users), list)
+        export = csv_service.export(DataKind.users)
+        first = next(export)
+        assert first.count("\n") == 1 + importlib.import_module("services.csv_service").CHUNK_SIZE
+        client.post("/users/", json={"name": "Late", "email": "late.export@example.com"})
+        text = first + "".join(export)
+        assert len(text.splitlines()) == 1 + users
+        assert "late.export@example.com" not in text
+
+    def test_csv_import_gzip(self, monkeypatch):
+        """Test a gzip-encoded CSV upload is inflated while streaming, with the record limit on inflated text"""
+        import gzip
+        import importlib
+        csv_body = "name,email\n" + "".join(f"Zipped {i},zipped{i}@example.com\n" for i in range(300))
+        headers = {"Content-Encoding": "gzip"}
+        response = client.post("/data/import/users", content=gzip.compress(csv_body.encode()), headers=headers)
+        assert response.status_code == 200
+        assert response.json()["rows"] == 300 and response.json()["imported"] == 300
+
+        assert client.post("/data/import/users", content=b"not gzip", headers=headers).status_code == 400
+        truncated = gzip.compress(csv_body.encode())[:-20]
+        assert client.post("/data/import/users", content=truncated, headers=headers).status_code == 400
+        response = client.post("/data/import/users", content=b"name,email\n", headers={"Content-Encoding": "br"})
+        assert response.status_code == 415
+
+        monkeypatch.setattr(importlib.import_module("services.csv_service"), "MAX_RECORD_CHARS", 100)
+        bomb = gzip.compress(b"name,email\n" + b"x" * 10_000_000)
+        assert client.post("/data/import/users", content=bomb, headers=headers).status_code == 413
+
+    def test_csv_import_rejects_oversized_records(self, monkeypatch):
+        """Test a record longer than the limit stops the import with 413"""
+        import importlib
+        monkeypatch.setattr(importlib.import_module("services.csv_service"), "MAX_RECORD_CHARS", 100)
+        response = client.post("/data/import/users", content=b"name,email\n" + b"x" * 500)
+        assert response.status_code == 413
+        # An unterminated quoted field spanning many lines is capped too
+        response = client.post("/data/import/users", content=b'name,email\n"' + b"line\n" * 100)
+        assert response.status_code == 413
+        response = client.post("/data/import/users", content=b"name,email\nShort Row,short.row@example.com\n")
+        assert response.json()["imported"] == 1
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test saving a binary snapshot and loading it back into the stores"""
+        from services import profiler, snapshot_service, user_service, enrollment_service
+        
+        user_id = client.post("/users/", json={"name": "Sam Snapshot", "email": "sam@example.com"}).json()["id"]
+        course_id = client.post("/courses/", json={"title": "Snapshots", "description": "Cold start"}).json()["id"]
+        client.post("/enrollments/", json={"user_id": user_id, "course_id": course_id})
+        before_users = client.get("/users/").json()
+        before_enrollments = client.get(f"/enrollments/user/{user_id}").json()
+        
+        snapshot_service.path = str(tmp_path / "edutrack.snapshot")
+        profiler.token = "secret"
+        try:
+            assert client.post("/admin/snapshot").status_code == 403
+            assert client.get("/admin/snapshot").status_code == 403
+            response = client.post("/admin/snapshot", headers={"X-Admin-Token": "secret"})
+            assert response.status_code == 200
+            assert response.json()["rows"]["users"] == len(before_users)
+            
+            user_service.restore([], 1)
+            enrollment_service.restore([], 1)
+            assert snapshot_service.load_if_present()
+        finally:
+            snapshot_service.path = None
+            profiler.token = None
+        
+        assert client.get("/users/").json() == before_users
+        assert client.get(f"/enrollments/user/{user_id}").json() == before_enrollments
+        assert client.get("/users/search", params={"prefix": "sam"}).json()[0]["id"] == user_id
+
+    def test_shared_journal_syncs_workers(self, tmp_path):
+        """Test that two workers sharing a journal see each other's writes"""
+        from schemas.user import UserCreate
+        from services.course_service import CourseService
+        from services.enrollment_service import EnrollmentService
+        from services.journal import SharedJournal
+        from services.user_service import UserService
+        
+        def start_worker():
+            users, courses = UserService(), CourseService()
+            enrollments = EnrollmentService(users, courses)
+            return users, SharedJournal(str(tmp_path / "shared.log"), users, courses, enrollments)
+        
+        users_a, journal_a = start_worker()
+        users_b, journal_b = start_worker()
+        try:
+            created = users_a.create_user(UserCreate(name="Wendy Worker", email="wendy@example.com"))
+            
+            journal_b.catch_up()
+            assert users_b.get_user(created.id).name == "Wendy Worker"
+            
+            # Ids keep increasing across workers because writers catch up under the lock
+            users_a.create_user(UserCreate(name="Xena Worker", email="xena@example.com"))
+            with journal_b.transaction():
+                second = users_b.create_user(UserCreate(name="Walt Worker", email="walt@example.com"))
+                users_b.deactivate_user(created.id)
+            assert second.id == created.id + 2
+            
+            journal_a.catch_up()
+            assert users_a.get_user(second.id).name == "Walt Worker"
+            assert users_a.get_user(created.id).is_active is False
+            assert [user.id for user in users_a.search_users("walt")] == [second.id]
+        finally:
+            journal_a.close()
+            journal_b.close()
+
+    def test_shared_journal_catch_up_during_write(self, tmp_path, monkeypatch):
+        """Test a catch_up racing a write does not replay our entries or skip others'"""
+        import importlib
+        import os
+        import threading
+        from schemas.user import UserCreate
+        from services.course_service import CourseService
+        from services.enrollment_service import EnrollmentService
+        from services.journal import SharedJournal
+        from services.user_service import UserService
+
+        journal_module = importlib.import_module("services.journal")
+        path = str(tmp_path / "shared.log")
+
+        def start_worker():
+            users, courses = UserService(), CourseService()
+            return users, SharedJournal(path, users, courses, EnrollmentService(users, courses))
+
+        users_a, journal_a = start_worker()
+        users_b, journal_b = start_worker()
+        real_write = os.write
+
+        def write_then_catch_up(fd, data):
+            written = real_write(fd, data)
+            # A request thread of the same worker catching up right after the write
+            reader = threading.Thread(target=journal_a.catch_up)
+            reader.start()
+            reader.join(0.2)
+            return written
+
+        try:
+            monkeypatch.setattr(journal_module.os, "write", write_then_catch_up)
+            users_a.create_user(UserCreate(name="Racing Writer", email="a@example.com"))
+            monkeypatch.setattr(journal_module.os, "write", real_write)
+            assert journal_a.offset == os.path.getsize(path)
+
+            journal_b.catch_up()
+            other = users_b.create_user(UserCreate(name="Other Worker", email="b@example.com"))
+            journal_a.catch_up()
+            assert users_a.get_user(other.id).name == "Other Worker"
+            assert journal_a.offset == os.path.getsize(path)
+        finally:
+            journal_a.close()
+            journal_b.close()
+
+    def test_shared_journal_compaction(self, tmp_path):
+        """Test that a compacted journal keeps every worker, old and new, in step"""
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+        from schemas.course import CourseCreate
+        from schemas.enrollment import EnrollmentCreate
+        from schemas.user import UserCreate, UserUpdate
+        from services.course_service import CourseService
+        from services.enrollment_service import EnrollmentService
+        from services.journal import Journaled, SharedJournal
+        from services.user_service import UserService
+        
+        class Incomplete(Journaled):
+            store_name = "incomplete"
+        
+        with pytest.raises(TypeError):
+            Incomplete()
+        
+        path = str(tmp_path / "shared.log")
+        
+        def start_worker(compact_bytes=0):
+            users, courses = UserService(), CourseService()
+            enrollments = EnrollmentService(users, courses)
+            journal = SharedJournal(path, users, courses, enrollments, compact_bytes=compact_bytes)
+            journal.catch_up()
+            return users, courses, enrollments, journal
+        
+        users_a, courses_a, enrollments_a, journal_a = start_worker(compact_bytes=4096)
+        users_b, _, enrollments_b, journal_b = start_worker()
+        journals = [journal_a, journal_b]
+        try:
+            course = courses_a.create_course(CourseCreate(title="Logs", description="Compaction"))
+            user = users_a.create_user(UserCreate(name="Rita Rename", email="rita@example.com"))
+            enrollment = enrollments_a.create_enrollment(EnrollmentCreate(user_id=user.id, course_id=course.id))
+            doomed = users_a.create_user(UserCreate(name="Dora Deleted", email="dora@example.com"))
+            users_a.delete_user(doomed.id)
+            # Many concurrent writes, each locking the log on its own
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                list(pool.map(
+                    lambda n: users_a.update_user(user.id, UserUpdate(name=f"Rita Rename {n}")), range(100)
+                ))
+            assert journal_a.compactions >= 1
+            assert os.path.getsize(path) < 4096
+            
+            # A worker started before the compaction moves over to the new file
+            enrollments_b.mark_completion(enrollment.id)
+            assert users_b.get_user(user.id).name.startswith("Rita Rename ")
+            assert users_b.get_user(doomed.id) is None
+            journal_a.catch_up()
+            assert enrollments_a.get_enrollment(enrollment.id).completed is True
+            
+            # A worker started after it replays the snapshot, and keeps ids past deleted rows
+            users_c, _, enrollments_c, journal_c = start_worker()
+            journals.append(journal_c)
+            assert users_c.get_user(user.id) == users_a.get_user(user.id)
+            assert enrollments_c.get_enrollment(enrollment.id).completed is True
+            assert users_c.create_user(UserCreate(name="Nia New", email="nia@example.com")).id == doomed.id + 1
+        finally:
+            for journal in journals:
+                journal.close()
+
+    def test_sharded_enrollments_under_concurrent_writes(self):
+        """Test that concurrent enrollment writes across shards stay consistent"""
+        from concurrent.futures import ThreadPoolExecutor
+        from schemas.course import CourseCreate
+        from schemas.enrollment import EnrollmentCreate
+        from schemas.user import UserCreate
+        from services.course_service import CourseService
+        from services.enrollment_service import EnrollmentService
+        from services.user_service import UserService
+        
+        users, courses = UserService(), CourseService()
+        enrollments = EnrollmentService(users, courses, shard_count=4)
+        user_ids = [users.create_user(UserCreate(name=f"Shard {i}", email=f"shard{i}@example.com")).id for i in range(8)]
+        course_id = courses.create_course(CourseCreate(title="Sharding", description="Locks")).id
+        
+        # Every user tries to enroll three times at once; only one attempt each may win
+        requests = [EnrollmentCreate(user_id=user_id, course_id=course_id) for user_id in user_ids * 3]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(enrollments.create_enrollment, requests))
+        
+        created = [result for result in results if result is not None]
+        assert sorted(e.user_id for e in created) == user_ids
+        assert len({e.id for e in created}) == len(user_ids)
+        assert [e.id for e in enrollments.get_course_enrollments(course_id)] == sorted(e.id for e in created)
+        assert sum(1 for shard in enrollments.shards if shard.enrollments) == 4
+
+    def test_store_snapshots_are_point_in_time(self):
+        """Test that list snapshots are unaffected by later writes"""
+        from services.versioned_store import VersionedStore
+        
+        store = VersionedStore((i, f"row {i}") for i in range(1, 3000))
+        before = store.snapshot()
+        assert store.snapshot() is before
+        
+        store[5] = "changed"
+        store.pop(2048)
+        store[5000] = "new"
+        
+        assert before.get(5) == "row 5"
+        assert len(before.values()) == 2999
+        after = store.values()
+        assert after[4] == "changed"
+        assert len(after) == 2999
+        assert after[-1] == "new"
+
+    def test_metrics_endpoint(self):
+        """Test Prometheus metrics are recorded per route template"""
+        client.get("/users/")
+        client.get("/users/999999")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'edutrack_http_requests_total{method="GET",route="/users/"}' in body
+        assert 'edutrack_http_request_errors_total{method="GET",route="/users/{user_id}",class="4xx"}' in body
+        assert 'edutrack_http_request_duration_seconds_bucket{method="GET",route="/users/",le="+Inf"}' in body
+        assert 'edutrack_store_rows{store="users"}' in body
+        assert 'edutrack_threadpool{state="queued"}' in body
+
+    def test_request_tracing(self, tmp_path):
+        """Test that sampled requests record nested spans"""
+        import json
+        from services import profiler, tracer
+        from services.tracing import Tracer
+
+        user = client.post("/users/", json={"name": "Traced User", "email": "traced@example.com"}).json()
+        course = client.post("/courses/", json={"title": "Tracing", "description": "Spans"}).json()
+        client.post("/enrollments/", json={"user_id": user["id"], "course_id": course["id"]})
+
+        sample_rate, tracer.sample_rate = tracer.sample_rate, 1.0
+        try:
+            response = client.get(f"/courses/{course['id']}/enrollments")
+        finally:
+            tracer.sample_rate = 0.0
+        assert response.status_code == 200
+
+        # Sampling stays off, so the /traces requests cannot become the latest trace
+        profiler.token = "secret"
+        try:
+            assert client.get("/traces", params={"limit": 1}).status_code == 403
+            traces = client.get("/traces", params={"limit": 1}, headers={"X-Admin-Token": "secret"}).json()
+        finally:
+            profiler.token = None
+            tracer.sample_rate = sample_rate
+        assert len(traces) == 1
+        trace = traces[0]
+        assert trace["name"] == "GET /courses/{course_id}/enrollments"
+        spans = {span["name"]: span for span in trace["spans"]}
+        assert {"route", "validate", "endpoint", "EnrollmentService.get_course_enrollments",
+                "scan", "details", "encode"} <= set(spans)
+        assert spans["details"]["attributes"]["rows"] == 1
+        assert spans["details"]["parent_id"] == spans["EnrollmentService.get_course_enrollments"]["span_id"]
+        assert spans["EnrollmentService.get_course_enrollments"]["parent_id"] == spans["endpoint"]["span_id"]
+        assert spans["encode"]["start_ms"] >= spans["endpoint"]["start_ms"]
+        assert trace["spans"][0]["attributes"]["status_code"] == 200
+
+        # Exported traces are written by the background writer
+        exporter = Tracer(sample_rate=1.0, path=str(tmp_path / "traces.jsonl"))
+        with exporter.trace("exported"):
+            pass
+        exporter.close()
+        lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+        assert [json.loads(line)["name"] for line in lines] == ["exported"]
+
+    def test_request_profiling(self):
+        """Test profiling a request and sampling a window with the admin token"""
+        from services import profiler
+
+        course = client.post("/courses/", json={"title": "Profiled", "description": "Hot spots"}).json()
+        url = f"/courses/{course['id']}/enrollments"
+
+        assert client.get(url, headers={"X-Profile": "secret"}).json() == []
+        assert client.post("/admin/profile", params={"seconds": 0.01}).status_code == 409
+
+        profiler.token = "secret"
+        try:
+            response = client.get(url, headers={"X-Profile": "secret"})
+            assert response.status_code == 200
+            assert response.headers["x-profiled-status"] == "200"
+            assert "get_course_enrollments" in response.text
+            assert client.get(url, headers={"X-Profile": "wrong"}).json() == []
+
+            assert client.post("/admin/profile", params={"seconds": 0.01}).status_code == 403
+            response = client.post(
+                "/admin/profile", params={"seconds": 0.05}, headers={"X-Admin-Token": "secret"}
+            )
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+        finally:
+            profiler.token = None
+
+    def test_slow_request_log(self, tmp_path):
+        """Test that requests over the threshold are logged with their breakdown"""
+        import json
+        from services import slow_request_log
+
+        course = client.post("/courses/", json={"title": "Slow Log", "description": "Timing"}).json()
+        threshold, path = slow_request_log.threshold, slow_request_log.path
+        slow_request_log.threshold, slow_request_log.path = 0.0, str(tmp_path / "slow.jsonl")
+        try:
+            response = client.get(f"/courses/{course['id']}/enrollments", headers={"X-Client-Id": "tenant-7"})
+            slow_request_log.flush()
+        finally:
+            slow_request_log.threshold, slow_request_log.path = threshold, path
+
+        entries = [json.loads(line) for line in (tmp_path / "slow.jsonl").read_text().splitlines()]
+        entry = entries[-1]
+        assert entry["route"] == "/courses/{course_id}/enrollments"
+        assert entry["path_params"] == {"course_id": str(course["id"])}
+        assert entry["status"] == 200
+        assert entry["rows"] == 0
+        assert entry["response_bytes"] == len(response.content)
+        assert entry["client"] == "tenant-7"
+        assert {"total", "routing", "validate", "endpoint", "encode", "send"} <= set(entry["timings_ms"])
+
+    def test_readiness_endpoint(self):
+        """Test readiness reporting with row counts, memory estimates and cache stats"""
+        with TestClient(app) as ready_client:
+            before = ready_client.get("/ready").json()
+            for i in range(50):
+                ready_client.post("/users/", json={"name": f"Ready User {i}", "email": f"ready{i}@example.com"})
+            ready_client.get("/users/")
+            ready_client.get("/users/")
+            response = ready_client.get("/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        users = data["stores"]["users"]
+        assert users["rows"] == before["stores"]["users"]["rows"] + 50
+        assert users["approx_bytes"] > before["stores"]["users"]["approx_bytes"]
+        assert users["snapshot_cache"]["hits"] >= 1
+        assert 0 < users["snapshot_cache"]["hit_rate"] <= 1
+        assert data["index_bytes"]["user_prefix"] > before["index_bytes"]["user_prefix"]
+        assert data["approx_total_bytes"] >= users["approx_bytes"] + data["index_bytes"]["user_prefix"]
+        assert {"import", "load", "total"} <= set(data["startup_seconds"])
+        assert data["startup_seconds"]["total"] >= data["startup_seconds"]["import"] > 0
+
+    def test_openapi_schema_is_cached(self):
+        """Test the OpenAPI schema is built once and startup phases are exported"""
+        from fastapi import FastAPI
+        from main import report_startup
+        from routes import analytics, monitoring
+
+        # A separate app, so the shared app's startup and shutdown hooks do not run again
+        precomputed = FastAPI()
+        precomputed.include_router(analytics.router)
+        precomputed.include_router(monitoring.router)
+        precomputed.state.startup_seconds = {}
+        report_startup(precomputed, "precompute")
+        assert precomputed.openapi_schema is not None
+        assert precomputed.state.ready is True
+        assert set(precomputed.state.startup_seconds) == {"openapi", "total"}
+
+        precomputed_client = TestClient(precomputed)
+        schema = precomputed_client.get("/openapi.json")
+        assert schema.status_code == 200
+        assert "/analytics/completion/weekly" in schema.json()["paths"]
+        assert precomputed.openapi() is precomputed.openapi_schema
+        metrics = precomputed_client.get("/metrics").text
+        assert 'edutrack_startup_seconds{phase="openapi"}' in metrics
+
+    def test_admission_control(self):
+        """Test per-client and per-route rate limits and shedding of expensive routes"""
+        from services import admission
+        from services.rate_limit import RateLimit
+
+        async def other_peer(scope, receive, send):
+            scope["client"] = ("203.0.113.7", 50000)
+            await app(scope, receive, send)
+
+        other = TestClient(other_peer)
+        admission.client_limit = RateLimit(rate=0.001, burst=2)
+        admission.set_route_limits({"GET /courses/search": RateLimit(rate=0.001, burst=1)})
+        try:
+            assert client.get("/courses/search", params={"q": "x"}).status_code == 200
+            response = client.get("/courses/search", params={"q": "x"})
+            assert response.status_code == 429
+            assert int(response.headers["retry-after"]) >= 1
+            assert client.get("/health").status_code == 200
+            assert client.get("/health").status_code == 429
+            # X-Client-Id is only a label, so a new one does not get a new bucket
+            assert client.get("/health", headers={"X-Client-Id": "b"}).status_code == 429
+            assert other.get("/health").status_code == 200
+        finally:
+            admission.client_limit = None
+            admission.set_route_limits({})
+            admission.reset()
+
+        assert admission.capped("GET", "/courses/1/enrollments")
+        assert not admission.capped("GET", "/courses/search")
+        for _ in range(admission.client_concurrency):
+            assert admission.acquire("testclient")
+        try:
+            response = client.get("/enrollments/", headers={"X-Client-Id": "other"})
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "1"
+            assert other.get("/enrollments/").status_code == 200
+            while admission.in_flight < admission.concurrency:
+                assert admission.acquire(f"client-{admission.in_flight}")
+            assert other.get("/enrollments/").status_code == 503
+            assert client.get("/courses/search", params={"q": "x"}).status_code == 200
+        finally:
+            admission.in_flight = 0
+            admission.client_in_flight.clear()
+        assert client.get("/enrollments/").status_code == 200
+
+        metrics = client.get("/metrics").text
+        assert 'edutrack_http_requests_total{method="GET",route="/courses/search"}' in metrics
+        assert 'edutrack_admission_rejected{reason="shed"}' in metrics
+
+    def test_response_encodings(self):
+        """Test gzip compression and MessagePack responses and request bodies"""
+        import gzip
+        import json
+        msgpack = pytest.importorskip("msgpack")
+
+        users = [
+            client.post("/users/", json={"name": f"Packed {i}", "email": f"packed{i}@example.com"}).json()
+            for i in range(20)
+        ]
+
+        response = client.get("/users/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        small = client.get(f"/users/{users[0]['id']}", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+        response = client.get("/users/", headers={"Accept": "application/msgpack"})
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == client.get("/users/").json()
+        response = client.get("/users/", params={"fields": "id,name"}, headers={"Accept": "application/msgpack"})
+        assert msgpack.unpackb(response.content)[0].keys() == {"id", "name"}
+        response = client.get("/users/", headers={"Accept": "application/json, application/msgpack;q=0.5"})
+        assert response.headers["content-type"] == "application/json"
+
+        ids = [user["id"] for user in users[:3]] + [999999]
+        response = client.post(
+            "/users/batch-get",
+            content=msgpack.packb({"ids": ids}),
+            headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+        )
+        assert response.status_code == 200
+        assert msgpack.unpackb(response.content)["missing"] == [999999]
+
+        response = client.post(
+            "/users/bulk-deactivate",
+            content=gzip.compress(json.dumps({"ids": ids[:2]}).encode()),
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+        assert response.json()["deactivated"] == ids[:2]
+
+        response = client.post(
+            "/users/batch-get", content=b"\xc1", headers={"Content-Type": "application/msgpack"}
+        )
+        assert response.status_code == 400
+
+    def test_report_jobs(self):
+        """Test report jobs run in the background and are cached per data version"""
+        import subprocess
+        import sys
+        import time
+        pytest.importorskip("numpy")
+
+        # Worker processes import the report functions without building the services
+        subprocess.run(
+            [sys.executable, "-c", "import sys, kernels.reports; assert 'services' not in sys.modules"], check=True
+        )
+
+        def wait_for(job_id):
+            for _ in range(300):
+                job = client.get(f"/reports/{job_id}").json()
+                if job["status"] in ("done", "failed"):
+                    return job
+                time.sleep(0.1)
+            raise AssertionError("report job did not finish")
+
+        user = client.post("/users/", json={"name": "Reporter", "email": "reporter@example.com"}).json()
+        course = client.post("/courses/", json={"title": "Reported", "description": "Counted"}).json()
+        enrollment = client.post("/enrollments/", json={"user_id": user["id"], "course_id": course["id"]}).json()
+        client.patch(f"/enrollments/{enrollment['id']}/complete")
+
+        response = client.post("/reports/course-completion")
+        assert response.status_code in (200, 202)
+        assert response.headers["location"] == f"/reports/{response.json()['id']}"
+        job = wait_for(response.json()["id"])
+        assert job["status"] == "done", job["error"]
+        row = next(row for row in job["result"]["courses"] if row["course_id"] == course["id"])
+        assert row == {
+            "course_id": course["id"], "title": "Reported", "is_open": True,
+            "enrollments": 1, "completed": 1, "completion_rate": 1.0
+        }
+
+        cached = client.post("/reports/course-completion")
+        assert cached.status_code == 200
+        assert cached.json()["id"] == job["id"]
+
+        client.post("/courses/", json={"title": "Changes the data", "description": "New version"})
+        assert client.get(f"/reports/{job['id']}").json()["stale"] is True
+        fresh = client.post("/reports/course-completion").json()
+        assert fresh["id"] != job["id"]
+        assert fresh["data_version"] > job["data_version"]
+
+        activity = wait_for(client.post("/reports/user-activity").json()["id"])
+        users = client.get("/users/").json()
+        assert activity["result"]["users"] == len(users)
+        assert activity["result"]["active"] == sum(user["is_active"] for user in users)
+        assert sum(activity["result"]["enrollments_per_user"].values()) == len(users)
+
+        assert client.get("/reports/missing").status_code == 404
+        assert client.post("/reports/unknown").status_code == 422
+
+    def test_report_version_from_columns(self, monkeypatch):
+        """Test a write between submit and the column read is counted in the job's data version"""
+        import time
+        from services import report_service
+        pytest.importorskip("numpy")
+
+        prepare = report_service._prepare
+
+        def write_then_prepare(kind):
+            client.post("/courses/", json={"title": "Written after submit", "description": "Read by the job"})
+            return prepare(kind)
+
+        monkeypatch.setattr(report_service, "_prepare", write_then_prepare)
+        # Changes the data first, so an earlier job is not reused
+        client.post("/courses/", json={"title": "Written before submit", "description": "New version"})
+        submitted = client.post("/reports/course-completion").json()
+        assert submitted["status"] == "pending"
+        for _ in range(300):
+            job = client.get(f"/reports/{submitted['id']}").json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.1)
+        assert job["status"] == "done", job["error"]
+        assert job["data_version"] > submitted["data_version"]
+        assert job["stale"] is False
+        assert any(row["title"] == "Written after submit" for row in job["result"]["courses"])
+
+    def test_idempotency_keys(self):
+        """Test retried creates with an Idempotency-Key replay the first response"""
+        from services import idempotency_cache, user_service
+
+        user_data = {"name": "Retrying Client", "email": "retry@example.com"}
+        headers = {"Idempotency-Key": "create-retry-user"}
+        first = client.post("/users/", json=user_data, headers=headers)
+        assert first.status_code == 201
+        assert "idempotent-replayed" not in first.headers
+        users = len(user_service.users)
+
+        retry = client.post("/users/", json=user_data, headers=headers)
+        assert retry.status_code == 201
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert retry.json() == first.json()
+        assert len(user_service.users) == users
+
+        # Same key with another body, or on another route, or from another client
+        conflict = client.post("/users/", json={**user_data, "name": "Changed"}, headers=headers)
+        assert conflict.status_code == 422
+        course = client.post("/courses/", json={"title": "Keyed", "description": "Other route"}, headers=headers)
+        assert course.status_code == 201 and "idempotent-replayed" not in course.headers
+        async def other_peer(scope, receive, send):
+            scope["client"] = ("203.0.113.7", 50000)
+            await app(scope, receive, send)
+
+        other = TestClient(other_peer).post("/users/", json=user_data, headers=headers)
+        assert other.status_code == 201 and other.json()["id"] != first.json()["id"]
+        # X-Client-Id is only a label, so it cannot reach another client's keys
+        spoofed = client.post("/users/", json=user_data, headers={**headers, "X-Client-Id": "other-client"})
+        assert spoofed.headers["idempotent-replayed"] == "true"
+
+        # Client errors are stored too
+        invalid = {"name": "No email"}
+        assert client.post("/users/", json=invalid, headers={"Idempotency-Key": "invalid-user"}).status_code == 422
+        repeat = client.post("/users/", json=invalid, headers={"Idempotency-Key": "invalid-user"})
+        assert repeat.status_code == 422 and repeat.headers["idempotent-replayed"] == "true"
+        assert client.post("/users/", json=user_data, headers={"Idempotency-Key": "x" * 256}).status_code == 400
+
+    def test_idempotency_body_limit(self, monkeypatch):
+        """Test request bodies buffered for an Idempotency-Key are capped"""
+        import importlib
+        monkeypatch.setattr(importlib.import_module("middleware.idempotency"), "MAX_BODY_BYTES", 64)
+
+        headers = {"Idempotency-Key": "too-large"}
+        response = client.post("/users/", json={"name": "L" * 100, "email": "large@example.com"}, headers=headers)
+        assert response.status_code == 413
+        assert client.post("/users/", json={"name": "L", "email": "l@example.com"}, headers=headers).status_code == 201
+
+    def test_idempotency_cache_eviction(self):
+        """Test the idempotency cache evicts least recently used and expired keys"""
+        import time
+        from services.idempotency import IdempotencyCache, StoredResponse
+
+        cache = IdempotencyCache(ttl=60, max_keys=2)
+        response = StoredResponse(201, [], b"{}")
+        for name in ("a", "b"):
+            cache.complete(("c", "r", name), cache.reserve(("c", "r", name), b"body"), response)
+        assert cache.get(("c", "r", "a")).response == response
+        cache.reserve(("c", "r", "c"), b"body")
+        assert cache.get(("c", "r", "b")) is None
+        assert cache.get(("c", "r", "a")) is not None
+
+        cache.ttl = 0.01
+        entry = cache.reserve(("c", "r", "d"), b"body")
+        time.sleep(0.02)
+        assert cache.get(("c", "r", "d")) is None
+        cache.complete(("c", "r", "d"), entry, response)
+        assert cache.get(("c", "r", "d")) is None
+        assert len(cache) == 1
+
+    def test_column_cache_shares_one_build(self):
+        """Test concurrent readers of a stale column cache wait for one shared build"""
+        pytest.importorskip("numpy")
+        import asyncio
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from types import SimpleNamespace
+        from services import analytics_service
+        from services.analytics import USER_COLUMNS, ColumnCache
+        from services.versioned_store import VersionedStore
+
+        class SlowCache(ColumnCache):
+            def _build(self, stores):
+                self.builds += 1
+                time.sleep(0.1)
+                return super()._build(stores)
+
+        assert analytics_service.available
+        store = VersionedStore((i, SimpleNamespace(id=i, is_active=i % 2 == 0)) for i in range(1, 3001))
+        cache = SlowCache(USER_COLUMNS)
+        cache.builds = 0
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.arrays([store]), range(8)))
+        assert cache.builds == 1 and cache.chunk_misses == 3
+        assert all(result is results[0] for result in results)
+        assert results[0]["id"].tolist() == list(range(1, 3001))
+
+        store[4] = SimpleNamespace(id=4, is_active=False)
+
+        async def readers():
+            await asyncio.gather(*(cache.refresh([store]) for _ in range(8)))
+
+        asyncio.run(readers())
+        assert cache.builds == 2 and cache.chunk_misses == 4
+        assert cache.arrays([store])["is_active"].sum() == 1499
+
+    def test_completion_analytics(self):
+        """Test vectorized completion analytics by week, course and user status"""
+        pytest.importorskip("numpy")
+        from datetime import date, timedelta
+
+        active = client.post("/users/", json={"name": "Analyst", "email": "analyst@example.com"}).json()
+        inactive = client.post("/users/", json={"name": "Dormant", "email": "dormant@example.com"}).json()
+        course = client.post("/courses/", json={"title": "Analyzed", "description": "Grouped"}).json()
+        first = client.post("/enrollments/", json={"user_id": active["id"], "course_id": course["id"]}).json()
+        client.post("/enrollments/", json={"user_id": inactive["id"], "course_id": course["id"]})
+        client.patch(f"/users/{inactive['id']}/deactivate")
+
+        by_course = client.get("/analytics/completion/courses").json()
+        row = next(row for row in by_course["courses"] if row["course_id"] == course["id"])
+        assert row == {
+            "course_id": course["id"], "title": "Analyzed", "is_open": True,
+            "enrollments": 2, "completed": 0, "completion_rate": 0.0
+        }
+
+        # A write only reconverts the chunk it touched
+        client.patch(f"/enrollments/{first['id']}/complete")
+        by_course = client.get("/analytics/completion/courses").json()
+        row = next(row for row in by_course["courses"] if row["course_id"] == course["id"])
+        assert (row["completed"], row["completion_rate"]) == (1, 0.5)
+        assert by_course["enrollments"] == len(client.get("/enrollments/").json())
+        assert by_course["enrollments"] == sum(row["enrollments"] for row in by_course["courses"])
+
+        weekly = client.get("/analytics/completion/weekly").json()
+        today = date.today()
+        week = next(row for row in weekly["weeks"] if row["week_start"] == str(today - timedelta(days=today.weekday())))
+        assert week["enrollments"] >= 2 and week["completed"] >= 1
+        assert weekly["completed"] == by_course["completed"]
+
+        statuses = {row["status"]: row for row in client.get("/analytics/completion/user-status").json()["statuses"]}
+        assert statuses["active"]["completed"] >= 1
+        assert statuses["inactive"]["enrollments"] >= 1
+        assert set(statuses) <= {"active", "inactive", "deleted"}
+
     def test_root_endpoint(self):
         """Test root endpoint"""
         response = client.get("/")